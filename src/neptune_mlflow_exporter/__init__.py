@@ -13,7 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from typing import Optional
+from datetime import datetime
+from typing import (
+    Optional,
+    Tuple,
+)
 
 import click
 
@@ -38,6 +42,245 @@ import click
     default=50,
     type=int,
 )
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of MLflow runs exported in parallel",
+    required=False,
+    default=1,
+    type=int,
+)
+@click.option(
+    "--state-dir",
+    "-s",
+    help="Directory where the export progress and the index of existing Neptune runs are kept between exports",
+    required=False,
+    type=str,
+)
+@click.option(
+    "--incremental",
+    "-i",
+    help="Update already exported runs with new metric points, params and tags instead of skipping them",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--metric-workers",
+    help="Number of metric histories fetched from MLflow in parallel",
+    required=False,
+    default=4,
+    type=int,
+)
+@click.option(
+    "--metric-page-size",
+    help="Number of metric points read at once when streaming a metric history from a file or SQL tracking store",
+    required=False,
+    default=10000,
+    type=int,
+)
+@click.option(
+    "--downsample",
+    help="Algorithm used to downsample long metric histories before the upload",
+    required=False,
+    type=click.Choice(["lttb", "stride", "minmax"]),
+)
+@click.option(
+    "--downsample-points",
+    help="Number of points kept in a downsampled metric history",
+    required=False,
+    default=10000,
+    type=int,
+)
+@click.option(
+    "--downsample-keys",
+    help="Glob pattern of the metric keys to downsample, can be repeated. All keys by default",
+    required=False,
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--downsample-exclude",
+    help="Glob pattern of the metric keys exported without downsampling, can be repeated",
+    required=False,
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--artifact-workers",
+    help="Number of artifacts of a run downloaded from MLflow in parallel",
+    required=False,
+    default=4,
+    type=int,
+)
+@click.option(
+    "--max-artifact-bandwidth",
+    help="Max bandwidth used to download artifacts from MLflow, in MB/s",
+    required=False,
+    type=float,
+)
+@click.option(
+    "--staging-dir",
+    help="Directory where artifacts are staged between the download and the upload, e.g. on tmpfs or a fast local disk",
+    required=False,
+    type=str,
+)
+@click.option(
+    "--max-staging-size",
+    help="Max size of the artifacts staged at once, in MB",
+    required=False,
+    type=int,
+)
+@click.option(
+    "--artifact-mount",
+    help="Artifact URI prefix mounted locally, as PREFIX=PATH, e.g. s3://bucket=/mnt/bucket. Can be repeated",
+    required=False,
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--dedup-artifacts",
+    help="Do not upload artifacts identical to already exported ones, but record a reference to them or skip them. "
+    "Requires --state-dir",
+    required=False,
+    type=click.Choice(["reference", "skip"]),
+)
+@click.option(
+    "--pack-threshold",
+    help="Pack files of artifact directories smaller than this size, in KB, into one archive per directory",
+    required=False,
+    type=int,
+)
+@click.option(
+    "--artifact-include",
+    help="Glob pattern of the artifact paths to export, can be repeated. All artifacts by default",
+    required=False,
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--artifact-exclude",
+    help="Glob pattern of the artifact paths not to export, e.g. 'checkpoints/*', can be repeated",
+    required=False,
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--dry-run",
+    help="Only estimate the number of runs, metric points and artifact bytes to export and how long it will take, "
+    "without writing anything to Neptune",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--dry-run-sample",
+    help="Number of runs whose metrics and artifacts are measured during a dry run",
+    required=False,
+    default=20,
+    type=int,
+)
+@click.option(
+    "--progress-interval",
+    help="Seconds between the progress lines with the throughput and the ETA, 0 disables them",
+    required=False,
+    default=10.0,
+    type=float,
+)
+@click.option(
+    "--report-file",
+    help="File where a report of the phase timings and counters is written at the end, "
+    "in the Prometheus text format if it ends with .prom, otherwise as JSON",
+    required=False,
+    type=str,
+)
+@click.option(
+    "--experiment-name",
+    help="Name of an MLflow experiment to export, can be repeated. All active experiments by default",
+    required=False,
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--experiment-id",
+    help="Id of an MLflow experiment to export, can be repeated. All active experiments by default",
+    required=False,
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--filter-string",
+    help="MLflow search filter of the runs to export, e.g. \"tags.team = 'vision' and metrics.accuracy > 0.9\"",
+    required=False,
+    type=str,
+)
+@click.option(
+    "--started-after",
+    help="Export only runs started at or after this local time",
+    required=False,
+    type=click.DateTime(),
+)
+@click.option(
+    "--started-before",
+    help="Export only runs started before this local time",
+    required=False,
+    type=click.DateTime(),
+)
+@click.option(
+    "--lifecycle-stage",
+    help="Lifecycle stage of the runs to export",
+    required=False,
+    default="all",
+    type=click.Choice(["active", "deleted", "all"]),
+)
+@click.option(
+    "--max-runs",
+    help="Maximal number of runs fetched from MLflow, including the ones skipped as already exported",
+    required=False,
+    type=int,
+)
+@click.option(
+    "--snapshot",
+    help="Write the selected runs with their metric histories to a local snapshot in this directory, "
+    "instead of exporting them to Neptune",
+    required=False,
+    type=str,
+)
+@click.option(
+    "--from-snapshot",
+    help="Export the runs from a snapshot in this directory instead of reading them from MLflow",
+    required=False,
+    type=str,
+)
+@click.option(
+    "--watch",
+    help="Keep polling MLflow and export the runs created or updated since the previous poll, until interrupted",
+    is_flag=True,
+)
+@click.option(
+    "--poll-interval",
+    help="Seconds between the polls of MLflow in the watch mode",
+    required=False,
+    default=60.0,
+    type=float,
+)
+@click.option(
+    "--mlflow-rate",
+    help="Maximal number of requests per second sent to the MLflow tracking server",
+    required=False,
+    type=float,
+)
+@click.option(
+    "--neptune-rate",
+    help="Maximal number of Neptune runs opened per second",
+    required=False,
+    type=float,
+)
+@click.option(
+    "--run-retries",
+    help="Number of times the runs which failed to export are retried, after all other runs",
+    required=False,
+    default=2,
+    type=int,
+)
 def sync(
     *,
     project: Optional[str],
@@ -45,6 +288,42 @@ def sync(
     mlflow_tracking_uri: Optional[str],
     exclude_artifacts: bool,
     max_artifact_size: int,
+    workers: int,
+    state_dir: Optional[str],
+    incremental: bool,
+    metric_workers: int,
+    metric_page_size: int,
+    downsample: Optional[str],
+    downsample_points: int,
+    downsample_keys: Tuple[str, ...],
+    downsample_exclude: Tuple[str, ...],
+    artifact_workers: int,
+    max_artifact_bandwidth: Optional[float],
+    staging_dir: Optional[str],
+    max_staging_size: Optional[int],
+    artifact_mount: Tuple[str, ...],
+    dedup_artifacts: Optional[str],
+    pack_threshold: Optional[int],
+    artifact_include: Tuple[str, ...],
+    artifact_exclude: Tuple[str, ...],
+    dry_run: bool,
+    dry_run_sample: int,
+    progress_interval: float,
+    report_file: Optional[str],
+    experiment_name: Tuple[str, ...],
+    experiment_id: Tuple[str, ...],
+    filter_string: Optional[str],
+    started_after: Optional[datetime],
+    started_before: Optional[datetime],
+    lifecycle_stage: str,
+    max_runs: Optional[int],
+    snapshot: Optional[str],
+    from_snapshot: Optional[str],
+    watch: bool,
+    poll_interval: float,
+    mlflow_rate: Optional[float],
+    neptune_rate: Optional[float],
+    run_retries: int,
 ) -> None:
     """Exports MLflow runs to neptune.ai.
 
@@ -59,6 +338,79 @@ def sync(
         max_artifact_size: max size of the artifact to be uploaded to Neptune.
             Unit is in MB.
             For directories this will be treated as the max size of the entire directory.
+        workers: number of MLflow runs exported concurrently.
+            Output is still reported in the order in which the runs were fetched.
+        state_dir: directory with the export journal and the index of existing Neptune runs.
+            If provided, finished parts of each run are recorded there and a rerun resumes
+            partially exported runs instead of skipping them. Later exports only look up
+            the Neptune runs created since the previous one.
+        incremental: whether to update runs that were already exported.
+            Only metric points logged after the last exported one are appended,
+            while params, tags and run info are refreshed.
+        metric_workers: number of metric histories fetched from MLflow concurrently, shared by all runs.
+        metric_page_size: number of points of a metric history fetched and uploaded at once.
+            Metrics which are not downsampled are streamed page by page, if the tracking store supports it.
+        downsample: downsampling algorithm, one of `lttb` (largest-triangle-three-buckets), `stride` (every n-th point)
+            or `minmax` (minimum and maximum of each bucket). If not provided, metrics are exported in full.
+        downsample_points: number of points kept from each downsampled metric history.
+        downsample_keys: glob patterns of the metric keys to downsample. If not provided, all keys are downsampled.
+        downsample_exclude: glob patterns of the metric keys which are always exported in full, e.g. `val/*`.
+        artifact_workers: number of artifacts downloaded from MLflow concurrently, shared by all runs.
+            Uploads to Neptune are queued as soon as the downloads finish and each run is flushed once.
+        max_artifact_bandwidth: max average bandwidth of artifact downloads from MLflow, in MB/s.
+            If not provided, the bandwidth is not limited.
+        staging_dir: directory where artifacts are kept between the download and the upload.
+            If not provided, the system temporary directory is used.
+        max_staging_size: max size of the artifacts staged at once, in MB.
+            Once it is reached, a run flushes its queued uploads before downloading further artifacts.
+            If not provided, the staging size is not limited.
+        artifact_mount: artifact URI prefixes mounted on the local file system, as `PREFIX=PATH`.
+            Artifacts under these prefixes, as well as the ones in local stores, are uploaded straight from
+            their files instead of being downloaded first.
+        dedup_artifacts: what to do with artifacts whose content was already exported, according to
+            the digests recorded in `state_dir`. `reference` records the run and the path of the exported copy
+            under `artifact_references`, `skip` leaves them out. If not provided, all artifacts are uploaded.
+        pack_threshold: size in KB below which files of artifact directories are packed into a single `tar.gz`
+            archive per directory, uploaded with a manifest to `packed_artifacts`. Larger files are uploaded
+            one by one. If not provided, directories are uploaded file by file.
+        artifact_include: glob patterns of the artifact paths to export, e.g. `plots/*`.
+            A matching directory is exported with all its contents. If not provided, all artifacts are exported.
+        artifact_exclude: glob patterns of the artifact paths which are never exported, e.g. `checkpoints`.
+            Excluded directories are neither listed nor downloaded.
+        dry_run: whether to only print an estimate of the export instead of running it. Metric histories
+            and artifacts of a sample of the runs are measured and a few artifacts are downloaded
+            to calibrate the estimated time. Nothing is written to Neptune.
+        dry_run_sample: number of runs measured during a dry run.
+        progress_interval: seconds between the lines reporting the number of processed runs,
+            the throughput and the ETA. The ETA is shown from the start if the runs are read straight from
+            a local store, which can count them, otherwise once all runs were fetched. If 0, no progress is reported.
+        report_file: path of the report with the latency histograms of the export phases and the counters
+            of exported runs, metric points and artifact bytes. Written in the Prometheus text format,
+            e.g. for the node_exporter textfile collector, if the path ends with `.prom`, otherwise as JSON.
+        experiment_name: names of the MLflow experiments to export. If neither names nor ids are provided,
+            all active experiments are exported. Only the selected experiments are fetched from MLflow.
+        experiment_id: ids of the MLflow experiments to export.
+        filter_string: MLflow search filter of the runs to export, evaluated by the tracking server.
+        started_after: local time at or after which the exported runs were started.
+        started_before: local time before which the exported runs were started.
+        lifecycle_stage: lifecycle stage of the exported runs, one of `active`, `deleted` or `all`.
+        max_runs: maximal number of runs fetched from MLflow, including the ones skipped as already exported.
+            MLflow searches return the most recently started runs of all selected experiments first,
+            while runs read directly from a file or SQL store are taken experiment by experiment.
+        snapshot: directory where the selected experiments, runs, params, tags and metric histories are written
+            instead of exporting them, together with a manifest of the artifacts. Neptune is not accessed.
+            An interrupted snapshot is resumed by taking it again into the same directory.
+        from_snapshot: directory of a snapshot to export to Neptune. Metric histories are memory-mapped,
+            and only artifacts are downloaded from the MLflow artifact store.
+        watch: keep exporting, polling MLflow for the runs started or finished since the previous poll
+            and the ones still running. Implies `--incremental`. With a state directory,
+            a restarted watch continues from its last poll.
+        poll_interval: seconds between the starts of consecutive polls in the watch mode.
+        mlflow_rate: maximal number of requests per second sent to MLflow, shared by all workers.
+            Throttled requests and timeouts are retried with an exponential backoff,
+            and the number of concurrent requests is adapted to what the server sustains.
+        neptune_rate: maximal number of Neptune runs opened per second, shared by all workers.
+        run_retries: number of times the runs which failed to export are retried, after all other runs.
     """
 
     # We do not want to import anything if process was executed for autocompletion purposes.
@@ -70,4 +422,40 @@ def sync(
         mlflow_tracking_uri=mlflow_tracking_uri,
         exclude_artifacts=exclude_artifacts,
         max_artifact_size=max_artifact_size,
+        workers=workers,
+        state_dir=state_dir,
+        incremental=incremental,
+        metric_workers=metric_workers,
+        metric_page_size=metric_page_size,
+        downsample=downsample,
+        downsample_points=downsample_points,
+        downsample_keys=downsample_keys,
+        downsample_exclude=downsample_exclude,
+        artifact_workers=artifact_workers,
+        max_artifact_bandwidth=max_artifact_bandwidth,
+        staging_dir=staging_dir,
+        max_staging_size=max_staging_size,
+        artifact_mounts=artifact_mount,
+        artifact_dedup=dedup_artifacts,
+        pack_threshold=pack_threshold,
+        artifact_include=artifact_include,
+        artifact_exclude=artifact_exclude,
+        dry_run=dry_run,
+        dry_run_sample=dry_run_sample,
+        progress_interval=progress_interval,
+        report_file=report_file,
+        experiment_names=experiment_name,
+        experiment_ids=experiment_id,
+        filter_string=filter_string,
+        started_after=started_after,
+        started_before=started_before,
+        lifecycle_stage=lifecycle_stage,
+        max_runs=max_runs,
+        snapshot_dir=snapshot,
+        from_snapshot=from_snapshot,
+        watch=watch,
+        poll_interval=poll_interval,
+        mlflow_rate=mlflow_rate,
+        neptune_rate=neptune_rate,
+        run_retries=run_retries,
     )
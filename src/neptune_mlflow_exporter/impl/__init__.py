@@ -14,7 +14,9 @@
 # limitations under the License.
 #
 
-__all__ = ["NeptuneExporter", "__version__"]
+__all__ = ["NeptuneExporter", "DownsamplingPolicy", "RunSelection", "__version__"]
 
+from neptune_mlflow_exporter.impl.downsampling import DownsamplingPolicy
 from neptune_mlflow_exporter.impl.neptune_exporter import NeptuneExporter
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
 from neptune_mlflow_exporter.impl.version import __version__
@@ -0,0 +1,132 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = [
+    "ArtifactCache",
+    "ArtifactReference",
+    "DEDUP_POLICIES",
+    "DEDUP_REFERENCE",
+    "DEDUP_SKIP",
+    "hash_artifact",
+]
+
+import hashlib
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+# an artifact identical to an already transferred one is recorded as a reference to it
+DEDUP_REFERENCE = "reference"
+# an artifact identical to an already transferred one is left out
+DEDUP_SKIP = "skip"
+DEDUP_POLICIES = (DEDUP_REFERENCE, DEDUP_SKIP)
+
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+@dataclass
+class ArtifactReference:
+    """The run and the path under which identical content was first transferred."""
+
+    run_id: str
+    path: str
+    size: int
+
+
+def hash_artifact(path: str) -> str:
+    """Returns the SHA-256 digest of a file, or of the relative paths and contents of all files in a directory."""
+    if not os.path.isdir(path):
+        return _hash_file(path)
+
+    digest = hashlib.sha256()
+    for current, directories, files in os.walk(path):
+        directories.sort()
+        for name in sorted(files):
+            file_path = os.path.join(current, name)
+            digest.update(os.path.relpath(file_path, path).replace(os.sep, "/").encode())
+            digest.update(_hash_file(file_path).encode())
+
+    return digest.hexdigest()
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BUFFER_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Records the digests of artifacts already transferred to Neptune, so identical ones are not uploaded again.
+
+    The cache is an SQLite database kept in the state directory and shared by all runs and exports.
+    It also counts the bytes which did not have to be uploaded during the export.
+    """
+
+    FILE_NAME = "artifacts.db"
+
+    def __init__(self, state_dir: str, policy: str = DEDUP_REFERENCE):
+        if policy not in DEDUP_POLICIES:
+            raise ValueError(f"Unknown deduplication policy '{policy}', expected one of {', '.join(DEDUP_POLICIES)}")
+
+        os.makedirs(state_dir, exist_ok=True)
+
+        self.policy = policy
+        self.saved_bytes = 0
+        self.saved_artifacts = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(state_dir, self.FILE_NAME), check_same_thread=False, isolation_level=None
+        )
+
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts (digest TEXT PRIMARY KEY, run_id TEXT NOT NULL, "
+                "path TEXT NOT NULL, size INTEGER NOT NULL)"
+            )
+
+    def __enter__(self) -> "ArtifactCache":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def get(self, digest: str) -> Optional[ArtifactReference]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT run_id, path, size FROM artifacts WHERE digest = ?", (digest,)
+            ).fetchone()
+        return ArtifactReference(*row) if row is not None else None
+
+    def add(self, digest: str, size: int, run_id: str, path: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO artifacts (digest, run_id, path, size) VALUES (?, ?, ?, ?)",
+                (digest, run_id, path, size),
+            )
+
+    def record_saved(self, size: int) -> None:
+        with self._lock:
+            self.saved_bytes += size
+            self.saved_artifacts += 1
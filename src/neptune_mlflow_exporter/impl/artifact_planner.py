@@ -0,0 +1,125 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["ArtifactPlanner", "PlannedArtifact"]
+
+import re
+from dataclasses import (
+    dataclass,
+    field,
+)
+from fnmatch import fnmatchcase
+from typing import (
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import mlflow
+from mlflow.entities import FileInfo
+
+
+@dataclass
+class PlannedArtifact:
+    """A file or a whole directory which is exported as a single artifact, with its total size in bytes."""
+
+    info: FileInfo
+    size: int
+
+
+@dataclass
+class _ArtifactNode:
+    info: FileInfo
+    size: int
+    children: List["_ArtifactNode"] = field(default_factory=list)
+    # whether nothing under a directory was filtered out, so it can be exported whole
+    complete: bool = True
+
+
+class ArtifactPlanner:
+    """Decides which artifacts of a run are exported before anything is downloaded.
+
+    The artifact tree is listed recursively and the sizes reported by MLflow are summed up per directory.
+    Directories which fit within the max artifact size are exported whole. Larger ones are split
+    into their files and subdirectories, so only the parts exceeding the limit are dropped.
+
+    Paths are filtered with glob patterns while the tree is listed. Excluded directories, and directories
+    which cannot contain any included path, are not listed at all. A directory with filtered out contents
+    is exported file by file.
+    """
+
+    def __init__(
+        self,
+        client: mlflow.tracking.MlflowClient,
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = (),
+    ):
+        self.mlflow_client = client
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+
+    def plan(self, run_id: str, max_artifact_size: int) -> List[PlannedArtifact]:
+        nodes, _ = self._list_tree(run_id, None, included=not self.include)
+        return list(self._select(nodes, max_artifact_size))
+
+    def _list_tree(self, run_id: str, path: Optional[str], included: bool) -> Tuple[List[_ArtifactNode], bool]:
+        """Returns the nodes under the path which pass the filters, and whether all of them did."""
+        nodes = []
+        complete = True
+
+        for info in self.mlflow_client.list_artifacts(run_id, path):
+            if self._is_excluded(info.path):
+                complete = False
+                continue
+
+            is_included = included or self._is_included(info.path)
+
+            if info.is_dir and (is_included or self._may_include(info.path)):
+                children, children_complete = self._list_tree(run_id, info.path, is_included)
+                if children:
+                    size = sum(child.size for child in children)
+                    nodes.append(_ArtifactNode(info, size, children, complete=children_complete))
+                complete = complete and children_complete
+            elif not info.is_dir and is_included:
+                nodes.append(_ArtifactNode(info, info.file_size or 0))
+            else:
+                complete = False
+
+        return nodes, complete
+
+    def _is_excluded(self, path: str) -> bool:
+        return any(fnmatchcase(path, pattern) for pattern in self.exclude)
+
+    def _is_included(self, path: str) -> bool:
+        return any(fnmatchcase(path, pattern) for pattern in self.include)
+
+    def _may_include(self, directory: str) -> bool:
+        # the paths under a directory can only match patterns whose literal prefix is compatible with it
+        prefix = directory + "/"
+        for pattern in self.include:
+            literal = re.split(r"[*?\[]", pattern, maxsplit=1)[0]
+            if literal.startswith(prefix) or prefix.startswith(literal):
+                return True
+        return False
+
+    def _select(self, nodes: List[_ArtifactNode], max_artifact_size: int) -> Iterator[PlannedArtifact]:
+        for node in nodes:
+            if node.size <= max_artifact_size and node.complete:
+                yield PlannedArtifact(node.info, node.size)
+            elif node.info.is_dir:
+                yield from self._select(node.children, max_artifact_size)
@@ -17,18 +17,31 @@
 __all__ = [
     "FileUploadStrategy",
     "DirectoryUploadStrategy",
+    "PackedDirectoryUploadStrategy",
     "choose_upload_strategy",
+    "get_local_artifact_dir",
 ]
 
-import contextlib
+import hashlib
+import json
 import os
+import tarfile
 import tempfile
 from abc import (
     ABC,
     abstractmethod,
 )
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 from mlflow.artifacts import download_artifacts
 from mlflow.entities import FileInfo
@@ -46,18 +59,10 @@ def get_dir_size(path: str) -> int:
     return sum(f.stat().st_size for f in directory.glob("**/*") if f.is_file())
 
 
-@contextlib.contextmanager
-def preserve_cwd(path):
-    cwd = os.getcwd()
-    os.chdir(path)
-    try:
-        yield
-    finally:
-        os.chdir(cwd)
-
-
 class ArtifactUploadStrategy(ABC):
     BASE_NAMESPACE = "artifacts"
+    # whether the upload creates files of its own, which have to be kept until the run is flushed
+    NEEDS_SCRATCH_DIR = False
 
     def __init__(
         self,
@@ -70,37 +75,180 @@ class ArtifactUploadStrategy(ABC):
         self._max_size = max_file_size
 
     @abstractmethod
-    def upload_to_neptune(self, neptune_run: "Run", info: FileInfo) -> None:
+    def upload_to_neptune(
+        self,
+        neptune_run: "Run",
+        info: FileInfo,
+        source_dir: str,
+        wait: bool = True,
+        scratch_dir: Optional[str] = None,
+    ) -> None:
+        """Uploads an artifact from the directory it was downloaded to, or from the local artifact store.
+
+        Files created for the upload are written to `scratch_dir`. If `wait` is False, the upload is only queued
+        and all files have to be kept until the run is flushed.
+        """
         ...
 
-    def upload_artifact(self, neptune_run: "Run", info: FileInfo, mlflow_run: MlflowRun) -> None:
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            with preserve_cwd(tmpdirname):
-                if not info.is_dir and info.file_size > self._max_size:
-                    return
+    @staticmethod
+    def staged_path(info: FileInfo, staging_dir: str) -> str:
+        """Returns the path the artifact is downloaded to, and uploaded from, within the staging directory."""
+        return os.path.join(staging_dir, info.path)
+
+    def download(self, info: FileInfo, mlflow_run: MlflowRun, staging_dir: str) -> bool:
+        """Downloads the artifact to its path relative to the staging directory, where the upload reads it from.
+
+        Returns False, if the artifact exceeds the max size and should be skipped.
+        """
+        if not info.is_dir and info.file_size > self._max_size:
+            return False
 
-                artifact_uri = mlflow_run.info.artifact_uri
-                download_artifacts(artifact_uri=artifact_uri + "/" + info.path, dst_path=tmpdirname)
+        # MLflow downloads an artifact under its base name, so nested artifacts go to their parent directory
+        staged_path = self.staged_path(info, staging_dir)
+        parent_dir = os.path.dirname(staged_path)
+        os.makedirs(parent_dir, exist_ok=True)
 
-                if info.is_dir and get_dir_size(tmpdirname) > self._max_size:
-                    return
+        artifact_uri = mlflow_run.info.artifact_uri
+        download_artifacts(artifact_uri=artifact_uri + "/" + info.path, dst_path=parent_dir)
 
-                self.upload_to_neptune(neptune_run, info)
+        if info.is_dir and get_dir_size(staged_path) > self._max_size:
+            return False
+
+        return True
+
+    def upload_artifact(self, neptune_run: "Run", info: FileInfo, mlflow_run: MlflowRun) -> None:
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            if self.download(info, mlflow_run, tmpdirname):
+                self.upload_to_neptune(neptune_run, info, tmpdirname, scratch_dir=tmpdirname)
 
 
 class FileUploadStrategy(ArtifactUploadStrategy):
-    def upload_to_neptune(self, neptune_run: "Run", info: FileInfo) -> None:
-        neptune_run[f"{self.BASE_NAMESPACE}/{info.path}"].upload(info.path, wait=True)
+    def upload_to_neptune(
+        self,
+        neptune_run: "Run",
+        info: FileInfo,
+        source_dir: str,
+        wait: bool = True,
+        scratch_dir: Optional[str] = None,
+    ) -> None:
+        file_path = os.path.join(source_dir, info.path)
+        neptune_run[f"{self.BASE_NAMESPACE}/{info.path}"].upload(file_path, wait=wait)
 
 
 class DirectoryUploadStrategy(ArtifactUploadStrategy):
-    def upload_to_neptune(self, neptune_run: "Run", info: FileInfo) -> None:
-        dir_path = str(Path(info.path) / "*")
-        neptune_run[f"{self.BASE_NAMESPACE}/{info.path}"].upload_files(dir_path, wait=True)
+    def upload_to_neptune(
+        self,
+        neptune_run: "Run",
+        info: FileInfo,
+        source_dir: str,
+        wait: bool = True,
+        scratch_dir: Optional[str] = None,
+    ) -> None:
+        dir_path = str(Path(source_dir) / info.path / "*")
+        neptune_run[f"{self.BASE_NAMESPACE}/{info.path}"].upload_files(dir_path, wait=wait)
+
+
+class PackedDirectoryUploadStrategy(ArtifactUploadStrategy):
+    """Uploads the small files of a directory as a single compressed archive, instead of one upload per file.
+
+    Files smaller than `pack_threshold` are streamed into a `tar.gz` archive uploaded to
+    `packed_artifacts/<path>/files`, with a JSON manifest of their paths, sizes and SHA-256 digests
+    in `packed_artifacts/<path>/manifest`. Larger files are uploaded one by one to `artifacts/<path>/<file>`.
+    """
+
+    PACKED_NAMESPACE = "packed_artifacts"
+    NEEDS_SCRATCH_DIR = True
+
+    def __init__(self, *, tracking_uri: str, max_file_size: int, pack_threshold: int):
+        super().__init__(tracking_uri=tracking_uri, max_file_size=max_file_size)
+        self._pack_threshold = pack_threshold
+
+    def upload_to_neptune(
+        self,
+        neptune_run: "Run",
+        info: FileInfo,
+        source_dir: str,
+        wait: bool = True,
+        scratch_dir: Optional[str] = None,
+    ) -> None:
+        directory = os.path.join(source_dir, info.path)
+        small_files, large_files = [], []
+
+        for relative_path in _list_files(directory):
+            if os.path.getsize(os.path.join(directory, relative_path)) < self._pack_threshold:
+                small_files.append(relative_path)
+            else:
+                large_files.append(relative_path)
+
+        for relative_path in large_files:
+            neptune_run[f"{self.BASE_NAMESPACE}/{info.path}/{relative_path}"].upload(
+                os.path.join(directory, relative_path), wait=wait
+            )
 
+        if small_files:
+            package_dir = tempfile.mkdtemp(prefix="packed-", dir=scratch_dir)
+            archive_path, manifest_path = _pack_files(directory, small_files, package_dir)
+            neptune_run[f"{self.PACKED_NAMESPACE}/{info.path}/files"].upload(archive_path, wait=wait)
+            neptune_run[f"{self.PACKED_NAMESPACE}/{info.path}/manifest"].upload(manifest_path, wait=wait)
 
-def choose_upload_strategy(artifact: FileInfo, tracking_uri: str, max_artifact_size: int) -> ArtifactUploadStrategy:
-    if artifact.is_dir:
+
+def _list_files(directory: str) -> List[str]:
+    files = []
+    for current, _, names in os.walk(directory):
+        for name in names:
+            files.append(os.path.relpath(os.path.join(current, name), directory).replace(os.sep, "/"))
+    return sorted(files)
+
+
+class _HashingReader:
+    """Computes the SHA-256 digest of a file while `tarfile` reads it."""
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        block = self._file.read(size)
+        self.digest.update(block)
+        return block
+
+
+def _pack_files(directory: str, relative_paths: List[str], package_dir: str) -> Tuple[str, str]:
+    """Streams the files into `files.tar.gz` in the package directory and writes their `manifest.json` next to it.
+
+    Returns the paths of the archive and the manifest.
+    """
+    archive_path = os.path.join(package_dir, "files.tar.gz")
+    manifest_path = os.path.join(package_dir, "manifest.json")
+    manifest = []
+
+    with tarfile.open(archive_path, "w:gz") as archive:
+        for relative_path in relative_paths:
+            file_path = os.path.join(directory, relative_path)
+            member = archive.gettarinfo(file_path, arcname=relative_path)
+
+            with open(file_path, "rb") as file:
+                reader = _HashingReader(file)
+                archive.addfile(member, reader)
+
+            manifest.append({"path": relative_path, "size": member.size, "sha256": reader.digest.hexdigest()})
+
+    with open(manifest_path, "w") as file:
+        json.dump({"files": manifest}, file, indent=2)
+
+    return archive_path, manifest_path
+
+
+def choose_upload_strategy(
+    artifact: FileInfo, tracking_uri: str, max_artifact_size: int, pack_threshold: Optional[int] = None
+) -> ArtifactUploadStrategy:
+    if artifact.is_dir and pack_threshold is not None:
+        return PackedDirectoryUploadStrategy(
+            tracking_uri=tracking_uri,
+            max_file_size=max_artifact_size,
+            pack_threshold=pack_threshold,
+        )
+    elif artifact.is_dir:
         return DirectoryUploadStrategy(
             tracking_uri=tracking_uri,
             max_file_size=max_artifact_size,
@@ -110,3 +258,26 @@ def choose_upload_strategy(artifact: FileInfo, tracking_uri: str, max_artifact_s
             tracking_uri=tracking_uri,
             max_file_size=max_artifact_size,
         )
+
+
+def get_local_artifact_dir(artifact_uri: str, mounts: Optional[Mapping[str, str]] = None) -> Optional[str]:
+    """Returns the local directory of the artifacts, if they can be read without downloading them.
+
+    Besides `file://` URIs and plain paths, URIs starting with one of the `mounts` prefixes,
+    e.g. `s3://bucket`, are mapped to the directory where that prefix is mounted.
+    """
+    for prefix, mount_dir in (mounts or {}).items():
+        prefix = prefix.rstrip("/")
+        if artifact_uri == prefix or artifact_uri.startswith(prefix + "/"):
+            path = os.path.join(mount_dir, *artifact_uri[len(prefix) :].split("/"))
+            return os.path.abspath(path) if os.path.isdir(path) else None
+
+    parsed = urlparse(artifact_uri)
+
+    # a single letter scheme is a Windows drive
+    if parsed.scheme == "file" or len(parsed.scheme) <= 1:
+        path = url2pathname(parsed.path) if parsed.scheme == "file" else artifact_uri
+        if os.path.isdir(path):
+            return os.path.abspath(path)
+
+    return None
@@ -16,10 +16,22 @@
 
 __all__ = [
     "Fetcher",
+    "FetchedData",
+    "StreamedData",
     "Exporter",
     "ExportConfig",
+    "NeptuneRunIndex",
+    "MetricHistoryFetcher",
+    "ArtifactTransfer",
 ]
 
+from neptune_mlflow_exporter.impl.components.artifact_transfer import ArtifactTransfer
 from neptune_mlflow_exporter.impl.components.config import ExportConfig
 from neptune_mlflow_exporter.impl.components.exporter import Exporter
-from neptune_mlflow_exporter.impl.components.fetcher import Fetcher
+from neptune_mlflow_exporter.impl.components.fetcher import (
+    FetchedData,
+    Fetcher,
+    StreamedData,
+)
+from neptune_mlflow_exporter.impl.components.metric_history import MetricHistoryFetcher
+from neptune_mlflow_exporter.impl.components.run_index import NeptuneRunIndex
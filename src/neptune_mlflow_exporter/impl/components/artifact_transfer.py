@@ -0,0 +1,356 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["ArtifactTransfer"]
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import (
+    Deque,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from mlflow.entities import FileInfo
+from mlflow.entities import Run as MlflowRun
+
+from neptune_mlflow_exporter.impl.artifact_cache import (
+    DEDUP_REFERENCE,
+    ArtifactCache,
+    hash_artifact,
+)
+from neptune_mlflow_exporter.impl.artifact_planner import PlannedArtifact
+from neptune_mlflow_exporter.impl.artifact_strategy import (
+    ArtifactUploadStrategy,
+    choose_upload_strategy,
+    get_local_artifact_dir,
+)
+from neptune_mlflow_exporter.impl.instrumentation import ExportInstrumentation
+from neptune_mlflow_exporter.impl.journal import (
+    RunCheckpoint,
+    artifact_stage,
+)
+from neptune_mlflow_exporter.impl.scheduler import RequestScheduler
+from neptune_mlflow_exporter.impl.staging import (
+    StagingArea,
+    StagingDirectory,
+)
+
+try:
+    from neptune import Run as NeptuneRun
+except ImportError:
+    from neptune.new import Run as NeptuneRun
+
+
+ARTIFACT_REFERENCES_NAMESPACE = "artifact_references"
+
+
+class BandwidthLimiter:
+    """Paces transfers, so that on average no more than `bytes_per_second` are transferred.
+
+    Transfers are charged once they finish, which delays the transfers started after them.
+    """
+
+    def __init__(self, bytes_per_second: float):
+        self.bytes_per_second = bytes_per_second
+        self._lock = threading.Lock()
+        self._available_at = time.monotonic()
+
+    def consume(self, size: int) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._available_at)
+            self._available_at = start + size / self.bytes_per_second
+
+        if start > now:
+            time.sleep(start - now)
+
+
+class ArtifactTransfer:
+    """Transfers the artifacts of a run from MLflow to Neptune as a pipeline.
+
+    Artifacts are downloaded concurrently on a pool shared by all runs, each into its own directory
+    of the staging area. Each finished download is queued for upload in Neptune without waiting for it,
+    while the next ones are still being downloaded. Queued uploads read the staged files, so they are kept
+    until the run is flushed, once after all artifacts or earlier if the staging budget is exhausted.
+
+    Artifacts stored on a local or mounted file system are uploaded straight from their source files instead,
+    without being copied to the staging area.
+
+    If an artifact cache is given, artifacts identical to ones already transferred are not uploaded again.
+    If a pack threshold is given, small files of artifact directories are uploaded as one archive per directory.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_bandwidth: Optional[float] = None,
+        staging_area: Optional[StagingArea] = None,
+        artifact_mounts: Optional[Mapping[str, str]] = None,
+        cache: Optional[ArtifactCache] = None,
+        pack_threshold: Optional[int] = None,
+        instrumentation: Optional[ExportInstrumentation] = None,
+        scheduler: Optional[RequestScheduler] = None,
+    ):
+        self.workers = workers
+        self.staging_area = staging_area or StagingArea()
+        self.artifact_mounts = dict(artifact_mounts or {})
+        self.cache = cache
+        self.pack_threshold = pack_threshold
+        self.instrumentation = instrumentation or ExportInstrumentation()
+        # downloads go to the MLflow artifact store, so they are paced with the other MLflow requests
+        self.scheduler = scheduler or RequestScheduler(
+            "mlflow", max_concurrency=workers, instrumentation=self.instrumentation
+        )
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._limiter = BandwidthLimiter(max_bandwidth) if max_bandwidth else None
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+    def export(
+        self,
+        neptune_run: NeptuneRun,
+        mlflow_run: MlflowRun,
+        artifacts: Sequence[PlannedArtifact],
+        max_artifact_size: int,
+        tracking_uri: Optional[str],
+        checkpoint: RunCheckpoint,
+    ) -> None:
+        pending = [
+            artifact for artifact in artifacts if not checkpoint.is_completed(artifact_stage(artifact.info.path))
+        ]
+        if not pending:
+            return
+
+        transfer = _RunTransfer(neptune_run, mlflow_run, checkpoint)
+        strategies = [
+            choose_upload_strategy(artifact.info, tracking_uri, max_artifact_size, self.pack_threshold)
+            for artifact in pending
+        ]
+
+        local_dir = get_local_artifact_dir(mlflow_run.info.artifact_uri, self.artifact_mounts)
+        if local_dir is not None:
+            self._export_local(transfer, pending, strategies, local_dir)
+        else:
+            self._export_staged(transfer, pending, strategies)
+
+    def _export_local(
+        self,
+        transfer: "_RunTransfer",
+        artifacts: Sequence[PlannedArtifact],
+        strategies: Sequence[ArtifactUploadStrategy],
+        local_dir: str,
+    ) -> None:
+        digests = [
+            self._executor.submit(hash_artifact, os.path.join(local_dir, artifact.info.path))
+            for artifact in artifacts
+            if self.cache is not None
+        ]
+
+        try:
+            for index, (artifact, strategy) in enumerate(zip(artifacts, strategies)):
+                digest = digests[index].result() if digests else None
+
+                scratch_path = None
+                if strategy.NEEDS_SCRATCH_DIR:
+                    scratch_dir = self._reserve(transfer, artifact.size, deque())
+                    transfer.staged.append(scratch_dir)
+                    scratch_path = scratch_dir.path
+
+                self._queue_upload(transfer, artifact, strategy, local_dir, digest, scratch_path)
+                transfer.checkpoint.complete(artifact_stage(artifact.info.path))
+
+            self._flush(transfer)
+        finally:
+            self._release(transfer)
+
+    def _export_staged(
+        self,
+        transfer: "_RunTransfer",
+        artifacts: Sequence[PlannedArtifact],
+        strategies: Sequence[ArtifactUploadStrategy],
+    ) -> None:
+        downloads: Deque[_Download] = deque()
+
+        try:
+            for artifact, strategy in zip(artifacts, strategies):
+                staging_dir = self._reserve(transfer, artifact.size, downloads)
+                future = self._executor.submit(
+                    self._download, strategy, artifact.info, transfer.mlflow_run, staging_dir
+                )
+                downloads.append(_Download(artifact, strategy, staging_dir, future))
+
+                if len(downloads) > 2 * self.workers:
+                    self._queue_download(transfer, downloads.popleft())
+
+            while downloads:
+                self._queue_download(transfer, downloads.popleft())
+            self._flush(transfer)
+        finally:
+            for download in downloads:
+                download.future.cancel()
+            wait([download.future for download in downloads])
+            for download in downloads:
+                download.staging_dir.cleanup()
+
+            self._release(transfer)
+
+    def _reserve(self, transfer: "_RunTransfer", size: int, downloads: Deque["_Download"]) -> StagingDirectory:
+        staging_dir = self.staging_area.try_reserve(size)
+
+        if staging_dir is None:
+            # Everything this run holds is released before waiting for other runs,
+            # so runs never wait for each other while holding staged files.
+            while downloads:
+                self._queue_download(transfer, downloads.popleft())
+            self._flush(transfer)
+            staging_dir = self.staging_area.reserve(size)
+
+        return staging_dir
+
+    def _release(self, transfer: "_RunTransfer") -> None:
+        # queued uploads have to finish before the staged files are removed
+        if transfer.staged:
+            if transfer.queued:
+                with self.instrumentation.phase("artifact_upload"):
+                    transfer.neptune_run.wait()
+            for staging_dir in transfer.staged:
+                staging_dir.cleanup()
+            transfer.staged.clear()
+
+    def _queue_download(self, transfer: "_RunTransfer", download: "_Download") -> None:
+        try:
+            downloaded, digest = download.future.result()
+        except BaseException:
+            download.staging_dir.cleanup()
+            raise
+
+        if not downloaded:
+            download.staging_dir.cleanup()
+        else:
+            transfer.staged.append(download.staging_dir)
+            staging_path = download.staging_dir.path
+            self._queue_upload(transfer, download.artifact, download.strategy, staging_path, digest, staging_path)
+            # accounts for the files created for the upload, e.g. archives of packed directories
+            download.staging_dir.measure()
+
+        transfer.checkpoint.complete(artifact_stage(download.artifact.info.path))
+
+    def _queue_upload(
+        self,
+        transfer: "_RunTransfer",
+        artifact: PlannedArtifact,
+        strategy: ArtifactUploadStrategy,
+        source_dir: str,
+        digest: Optional[str],
+        scratch_dir: Optional[str] = None,
+    ) -> None:
+        """Queues the upload of an artifact, unless an identical one was already transferred."""
+        path = artifact.info.path
+
+        if digest is not None:
+            reference = self.cache.get(digest)
+            if reference is not None:
+                self.cache.record_saved(artifact.size)
+                self.instrumentation.increment("artifacts_deduplicated")
+                if self.cache.policy == DEDUP_REFERENCE:
+                    transfer.neptune_run[f"{ARTIFACT_REFERENCES_NAMESPACE}/{path}"] = {
+                        "sha256": digest,
+                        "mlflow_run_id": reference.run_id,
+                        "artifact_path": reference.path,
+                    }
+                return
+
+            transfer.transferred.append((digest, artifact.size, path))
+
+        # only queues the upload, which is timed when the run is flushed
+        with self.instrumentation.phase("artifact_upload_queue"):
+            strategy.upload_to_neptune(
+                transfer.neptune_run, artifact.info, source_dir, wait=False, scratch_dir=scratch_dir
+            )
+        transfer.queued = True
+        self.instrumentation.increment("artifacts")
+        self.instrumentation.increment("artifact_bytes", artifact.size)
+
+    def _flush(self, transfer: "_RunTransfer") -> None:
+        if transfer.queued:
+            # waits until the queued artifacts are uploaded
+            with self.instrumentation.phase("artifact_upload"):
+                transfer.neptune_run.wait()
+            transfer.queued = False
+
+        for staging_dir in transfer.staged:
+            staging_dir.cleanup()
+        transfer.staged.clear()
+
+        # only artifacts which reached Neptune can be referred to by other runs
+        if self.cache is not None:
+            for digest, size, path in transfer.transferred:
+                self.cache.add(digest, size, transfer.mlflow_run.info.run_id, path)
+        transfer.transferred.clear()
+
+        transfer.checkpoint.commit(transfer.neptune_run)
+
+    def _download(
+        self, strategy: ArtifactUploadStrategy, artifact: FileInfo, mlflow_run: MlflowRun, staging_dir: StagingDirectory
+    ) -> Tuple[bool, Optional[str]]:
+        with self.instrumentation.phase("artifact_download"):
+            downloaded = self.scheduler.call(strategy.download, artifact, mlflow_run, staging_dir.path)
+        staging_dir.measure()
+
+        if self._limiter is not None:
+            self._limiter.consume(staging_dir.size)
+
+        digest = None
+        if downloaded and self.cache is not None:
+            digest = hash_artifact(strategy.staged_path(artifact, staging_dir.path))
+
+        return downloaded, digest
+
+
+@dataclass
+class _Download:
+    artifact: PlannedArtifact
+    strategy: ArtifactUploadStrategy
+    staging_dir: StagingDirectory
+    future: Future
+
+
+@dataclass
+class _RunTransfer:
+    neptune_run: NeptuneRun
+    mlflow_run: MlflowRun
+    checkpoint: RunCheckpoint
+    # directories of the queued uploads, removed once the run is flushed
+    staged: List[StagingDirectory] = field(default_factory=list)
+    # digests, sizes and paths of the queued uploads, added to the cache once the run is flushed
+    transferred: List[Tuple[str, int, str]] = field(default_factory=list)
+    queued: bool = False
@@ -27,3 +27,11 @@ class ExportConfig:
     project_name: Optional[str]
     api_token: Optional[str]
     mlflow_tracking_uri: Optional[str]
+    workers: int = 1
+    incremental: bool = False
+    metric_page_size: int = 10000
+    artifact_workers: int = 4
+    max_artifact_bandwidth: Optional[float] = None
+    staging_dir: Optional[str] = None
+    progress_interval: Optional[float] = 10.0
+    run_retries: int = 2
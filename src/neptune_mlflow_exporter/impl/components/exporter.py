@@ -17,24 +17,77 @@
 __all__ = ["Exporter"]
 
 from datetime import datetime
-from typing import Optional
+from itertools import groupby
+from operator import itemgetter
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 import mlflow
 from mlflow.entities import Experiment
 from mlflow.entities import Run as MlflowRun
 from neptune.utils import stringify_unsupported
 
-from neptune_mlflow_exporter.impl.artifact_strategy import choose_upload_strategy
+from neptune_mlflow_exporter.impl.artifact_planner import ArtifactPlanner
+from neptune_mlflow_exporter.impl.components.artifact_transfer import ArtifactTransfer
+from neptune_mlflow_exporter.impl.components.metric_history import MetricHistoryFetcher
+from neptune_mlflow_exporter.impl.downsampling import DownsamplingPolicy
+from neptune_mlflow_exporter.impl.instrumentation import ExportInstrumentation
+from neptune_mlflow_exporter.impl.journal import (
+    RUN_DATA_STAGE,
+    MetricCursor,
+    RunCheckpoint,
+    metric_stage,
+)
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
 
 try:
     from neptune import Run as NeptuneRun
 except ImportError:
     from neptune.new import Run as NeptuneRun
 
+# number of metric points converted and passed to Neptune at once
+METRIC_UPLOAD_CHUNK_SIZE = 10000
+# number of metric points requested from MLflow at once when streaming a history
+METRIC_PAGE_SIZE = 10000
+# the last exported point of every metric, so that a sync does not have to read the series back
+METRIC_CURSORS_NAMESPACE = "sync/metric_cursors"
+
 
 class Exporter:
-    def __init__(self, client: mlflow.tracking.MlflowClient):
+    def __init__(
+        self,
+        client: mlflow.tracking.MlflowClient,
+        metric_history_fetcher: Optional[MetricHistoryFetcher] = None,
+        downsampling: Optional[DownsamplingPolicy] = None,
+        metric_page_size: int = METRIC_PAGE_SIZE,
+        artifact_transfer: Optional[ArtifactTransfer] = None,
+        artifact_planner: Optional[ArtifactPlanner] = None,
+        instrumentation: Optional[ExportInstrumentation] = None,
+        record_metric_cursors: bool = False,
+    ):
         self.mlflow_client = client
+        self.metric_history_fetcher = metric_history_fetcher or MetricHistoryFetcher(client)
+        self.downsampling = downsampling
+        self.metric_page_size = metric_page_size
+        self.artifact_transfer = artifact_transfer or ArtifactTransfer(workers=1)
+        self.artifact_planner = artifact_planner or ArtifactPlanner(client)
+        self.instrumentation = instrumentation or ExportInstrumentation()
+        # cursors are only read by syncs, so runs which are never synced are exported without them
+        self.record_metric_cursors = record_metric_cursors
+        # components passed in are owned, and closed, by the caller
+        self._owns_metric_history_fetcher = metric_history_fetcher is None
+        self._owns_artifact_transfer = artifact_transfer is None
+
+    def close(self) -> None:
+        if self._owns_metric_history_fetcher:
+            self.metric_history_fetcher.close()
+        if self._owns_artifact_transfer:
+            self.artifact_transfer.close()
 
     @staticmethod
     def export_experiment_metadata(neptune_run: NeptuneRun, experiment: Experiment) -> None:
@@ -62,32 +115,131 @@ class Exporter:
         neptune_run["run_info"] = stringify_unsupported(info)
         neptune_run["sys/name"] = info["run_name"]
 
-    def export_run_data(self, neptune_run: NeptuneRun, mlflow_run: MlflowRun) -> None:
+    def export_run_data(
+        self, neptune_run: NeptuneRun, mlflow_run: MlflowRun, checkpoint: Optional[RunCheckpoint] = None
+    ) -> None:
+        checkpoint = checkpoint or RunCheckpoint(None, mlflow_run.info.run_id)
+
         data_dict = mlflow_run.data.to_dictionary()
-        if "metrics" in data_dict:
-            metric_keys = data_dict["metrics"].keys()
-            del data_dict["metrics"]
-
-            for key in metric_keys:
-                metrics = self.mlflow_client.get_metric_history(
-                    run_id=mlflow_run.info.run_id,
-                    key=key,
-                )
-                metric_values = list(map(lambda metric: metric.value, metrics))
-                metric_timestamps = list(
-                    map(lambda metric: metric.timestamp / 1e3 if metric.timestamp else None, metrics)
+        metric_keys = data_dict.pop("metrics", {}).keys()
+
+        pending_keys = [key for key in metric_keys if not checkpoint.is_completed(metric_stage(key))]
+
+        for key, pages in self._iter_metric_pages(mlflow_run, pending_keys):
+            # pages are fetched lazily, so the phase covers fetching the history too
+            with self.instrumentation.phase("metric"):
+                self._extend_metric(
+                    neptune_run, key, pages, checkpoint, checkpoint.get_metric_cursor(key), self.record_metric_cursors
                 )
-                metric_steps = list(map(lambda metric: metric.step, metrics))
+            checkpoint.complete(metric_stage(key))
+
+        if not checkpoint.is_completed(RUN_DATA_STAGE):
+            neptune_run["run_data"] = data_dict
+            checkpoint.complete(RUN_DATA_STAGE)
 
+    def sync_run_data(
+        self, neptune_run: NeptuneRun, mlflow_run: MlflowRun, checkpoint: Optional[RunCheckpoint] = None
+    ) -> None:
+        """Appends the metric points logged since the previous export and refreshes params and tags.
+
+        The last exported point of each metric is taken from the journal if available,
+        otherwise from the cursor recorded in Neptune next to the metric.
+        """
+        checkpoint = checkpoint or RunCheckpoint(None, mlflow_run.info.run_id)
+
+        data_dict = mlflow_run.data.to_dictionary()
+        metric_keys = data_dict.pop("metrics", {}).keys()
+
+        for key, pages in self._iter_metric_pages(mlflow_run, list(metric_keys)):
+            exported_cursor = checkpoint.get_metric_cursor(key) or self._fetch_exported_cursor(neptune_run, key)
+            with self.instrumentation.phase("metric"):
+                self._extend_metric(neptune_run, key, pages, checkpoint, exported_cursor, record_cursor=True)
+
+        neptune_run["run_data"] = data_dict
+
+    def _iter_metric_pages(
+        self, mlflow_run: MlflowRun, keys: List[str]
+    ) -> Iterator[Tuple[str, Iterator[MetricSeries]]]:
+        """Yields every key with an iterator over the pages of its history, which must be consumed before the next key.
+
+        Histories which are downsampled need all of their points at once, so they are fetched whole.
+        """
+        downsampled_keys = [key for key in keys if self.downsampling is not None and self.downsampling.applies_to(key)]
+        streamed_keys = [key for key in keys if key not in downsampled_keys]
+
+        fetcher = self.metric_history_fetcher
+        for pages in (
+            fetcher.iter_metric_pages(mlflow_run, streamed_keys, self.metric_page_size),
+            fetcher.iter_metric_histories(mlflow_run, downsampled_keys),
+        ):
+            for key, key_pages in groupby(pages, key=itemgetter(0)):
+                yield key, (series for _, series in key_pages)
+
+    def _extend_metric(
+        self,
+        neptune_run: NeptuneRun,
+        key: str,
+        pages: Iterable[MetricSeries],
+        checkpoint: RunCheckpoint,
+        exported_cursor: Optional[MetricCursor] = None,
+        record_cursor: bool = False,
+    ) -> None:
+        cursor = None
+
+        for series in pages:
+            if exported_cursor is not None:
+                series = series.after(exported_cursor)
+            if not series:
+                continue
+
+            # the cursor points at the last logged point, even if it was dropped by downsampling
+            page_cursor = series.last_cursor()
+            cursor = page_cursor if cursor is None else max(cursor, page_cursor)
+
+            if self.downsampling is not None:
+                series = self.downsampling.apply(key, series)
+
+            for metric_values, metric_steps, metric_timestamps in series.iter_chunks(METRIC_UPLOAD_CHUNK_SIZE):
                 neptune_run[f"run_data/metrics/{key}"].extend(
                     metric_values, steps=metric_steps, timestamps=metric_timestamps
                 )
-        neptune_run["run_data"] = data_dict
+                self.instrumentation.increment("metric_points", len(metric_values))
+            # a retry of a run failed in the middle of the history continues after the last page
+            checkpoint.update_metric_cursor(key, cursor)
+
+        if record_cursor and cursor is not None:
+            step, timestamp = cursor
+            neptune_run[f"{METRIC_CURSORS_NAMESPACE}/{key}"] = {"step": step, "timestamp": timestamp}
+
+    @staticmethod
+    def _fetch_exported_cursor(neptune_run: NeptuneRun, key: str) -> Optional[MetricCursor]:
+        cursor_path = f"{METRIC_CURSORS_NAMESPACE}/{key}"
+        if neptune_run.exists(cursor_path):
+            cursor = neptune_run[cursor_path].fetch()
+            return int(cursor["step"]), int(cursor["timestamp"])
+
+        # runs exported before cursors were recorded only have the series, which is read whole once
+        path = f"run_data/metrics/{key}"
+        if not neptune_run.exists(path):
+            return None
+
+        values = neptune_run[path].fetch_values(include_timestamp=True)
+        if values.empty:
+            return None
+
+        last = values.iloc[-1]
+        return int(last["step"]), int(last["timestamp"].timestamp() * 1e3)
 
     def export_artifacts(
-        self, neptune_run: NeptuneRun, mlflow_run: MlflowRun, max_artifact_size: int, tracking_uri: Optional[str]
+        self,
+        neptune_run: NeptuneRun,
+        mlflow_run: MlflowRun,
+        max_artifact_size: int,
+        tracking_uri: Optional[str],
+        checkpoint: Optional[RunCheckpoint] = None,
     ) -> None:
-        for artifact in self.mlflow_client.list_artifacts(run_id=mlflow_run.info.run_id):
-            strategy = choose_upload_strategy(artifact, tracking_uri, max_artifact_size)
+        checkpoint = checkpoint or RunCheckpoint(None, mlflow_run.info.run_id)
 
-            strategy.upload_artifact(neptune_run, artifact, mlflow_run)
+        with self.instrumentation.phase("artifact_listing"):
+            artifacts = self.artifact_planner.plan(mlflow_run.info.run_id, max_artifact_size)
+        self.artifact_transfer.export(neptune_run, mlflow_run, artifacts, max_artifact_size, tracking_uri, checkpoint)
@@ -14,12 +14,20 @@
 # limitations under the License.
 #
 
-__all__ = ["Fetcher"]
+__all__ = [
+    "Fetcher",
+    "FetchedData",
+    "StreamedData",
+]
 
 from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
 from typing import (
+    Iterator,
     List,
     MutableMapping,
+    Optional,
     Set,
 )
 
@@ -29,6 +37,11 @@ from mlflow.entities import Run as MlflowRun
 from mlflow.entities import ViewType
 from neptune import Project
 
+from neptune_mlflow_exporter.impl.components.run_index import NeptuneRunIndex
+from neptune_mlflow_exporter.impl.instrumentation import ExportInstrumentation
+from neptune_mlflow_exporter.impl.readers import MlflowStoreReader
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+
 
 @dataclass
 class FetchedData:
@@ -37,69 +50,201 @@ class FetchedData:
     neptune_run_ids: Set[str]
 
 
+@dataclass
+class StreamedData:
+    mlflow_experiments: MutableMapping[str, Experiment]
+    mlflow_runs: Iterator[MlflowRun]
+    neptune_run_ids: Set[str]
+    # known up front only if the runs can be counted without fetching them
+    total_runs: Optional[int] = None
+
+
 class Fetcher:
-    def __init__(self, project: Project, client: mlflow.tracking.MlflowClient):
+    def __init__(
+        self,
+        project: Project,
+        client: mlflow.tracking.MlflowClient,
+        run_index: Optional[NeptuneRunIndex] = None,
+        reader: Optional[MlflowStoreReader] = None,
+        instrumentation: Optional[ExportInstrumentation] = None,
+        selection: Optional[RunSelection] = None,
+    ):
         self.project = project
         self.mlflow_client = client
+        self.run_index = run_index or NeptuneRunIndex(project)
+        self.reader = reader
+        self.instrumentation = instrumentation or ExportInstrumentation()
+        self.selection = selection or RunSelection()
+
+    def get_all_mlflow_experiments(self, updated_since: Optional[datetime] = None) -> MutableMapping[str, Experiment]:
+        """Gets the selected experiments, if `updated_since` is given, only the ones created or changed since then."""
+        since = int(updated_since.timestamp() * 1000) if updated_since is not None else None
+
+        if self.reader is not None:
+            experiments = self.reader.get_experiments(since)
+            return {
+                experiment_id: experiment
+                for experiment_id, experiment in experiments.items()
+                if self.selection.selects_experiment(experiment)
+            }
+
+        if self.selection.selects_experiments:
+            return {
+                experiment_id: experiment
+                for experiment_id, experiment in self._get_selected_experiments().items()
+                if since is None or (experiment.last_update_time or 0) >= since
+            }
 
-    def get_all_mlflow_experiments(self) -> MutableMapping[str, Experiment]:
         page_limit = 100
         all_experiments = []
         page_token = None
+        filter_string = f"last_update_time >= {since}" if since is not None else None
 
         experiment_mapping = {}
 
-        while not all_experiments or page_token:
+        # unlike all experiments, the updated ones may be none at all
+        while True:
             experiments = self.mlflow_client.search_experiments(
-                max_results=page_limit, page_token=page_token, view_type=ViewType.ACTIVE_ONLY
+                max_results=page_limit,
+                page_token=page_token,
+                view_type=ViewType.ACTIVE_ONLY,
+                filter_string=filter_string,
             )
 
             all_experiments.extend(experiments)
             page_token = experiments.token
+            if not page_token:
+                break
 
         for exp in all_experiments:
             experiment_mapping[exp.experiment_id] = exp
 
         return experiment_mapping
 
-    def get_all_mlflow_runs(self, experiment_ids: List[str]) -> List[MlflowRun]:
+    def _get_selected_experiments(self) -> MutableMapping[str, Experiment]:
+        """Gets the selected experiments one by one instead of searching through all of them."""
+        experiments = {}
+
+        for experiment_id in self.selection.experiment_ids:
+            experiment = self.mlflow_client.get_experiment(experiment_id)
+            experiments[experiment.experiment_id] = experiment
+
+        for name in self.selection.experiment_names:
+            experiment = self.mlflow_client.get_experiment_by_name(name)
+            if experiment is None:
+                raise ValueError(f"MLflow experiment '{name}' does not exist")
+            experiments[experiment.experiment_id] = experiment
+
+        return experiments
+
+    def iter_mlflow_runs(
+        self, experiment_ids: List[str], selection: Optional[RunSelection] = None
+    ) -> Iterator[MlflowRun]:
+        """Yields runs page by page, so only a single page is kept in memory at a time.
+
+        Runs are selected by the fetcher's selection, unless another one is given.
+        """
+        selection = selection or self.selection
+
+        # readers cannot evaluate MLflow filter strings, so such searches go through the client
+        if self.reader is not None and not selection.filter_string:
+            yield from islice(self.reader.iter_runs(experiment_ids, selection), selection.max_runs)
+            return
+
+        filter_strings = selection.search_filters()
+        remaining = selection.max_runs
+        seen: Set[str] = set()
+
+        for filter_string in filter_strings:
+            for run in self._search_runs(experiment_ids, filter_string, selection.view_type, remaining):
+                # runs of changes matching several filters are yielded once
+                if len(filter_strings) > 1:
+                    if run.info.run_id in seen:
+                        continue
+                    seen.add(run.info.run_id)
+
+                yield run
+
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining <= 0:
+                        return
+
+    def _search_runs(
+        self, experiment_ids: List[str], filter_string: str, view_type: int, limit: Optional[int]
+    ) -> Iterator[MlflowRun]:
         page_limit = 100
-        all_runs = []
         page_token = None
+        remaining = limit
 
-        while not all_runs or page_token:
+        while remaining is None or remaining > 0:
+            max_results = page_limit if remaining is None else min(page_limit, remaining)
             runs = self.mlflow_client.search_runs(
-                experiment_ids=experiment_ids, run_view_type=ViewType.ALL, max_results=page_limit, page_token=page_token
+                experiment_ids=experiment_ids,
+                filter_string=filter_string,
+                run_view_type=view_type,
+                max_results=max_results,
+                page_token=page_token,
             )
 
-            all_runs.extend(runs)
+            yield from runs
+
+            if remaining is not None:
+                remaining -= len(runs)
 
             page_token = runs.token
+            if not page_token:
+                break
 
-        return all_runs
+    def count_mlflow_runs(self, experiment_ids: List[str]) -> Optional[int]:
+        """Counts the selected runs with the store reader, MLflow itself can only count them by fetching them."""
+        if self.reader is None or self.selection.filter_string:
+            return None
 
-    def get_existing_neptune_run_ids(self) -> Set[str]:
-        try:
-            existing_neptune_run_ids = {
-                run_id for run_id in self.project.fetch_runs_table().to_pandas()["sys/custom_run_id"].to_list()
-            }
-        except KeyError:
-            # empty project
-            existing_neptune_run_ids = set()
+        count = self.reader.count_runs(experiment_ids, self.selection)
+        return count if self.selection.max_runs is None else min(count, self.selection.max_runs)
 
-        return existing_neptune_run_ids
+    def get_all_mlflow_runs(self, experiment_ids: List[str]) -> List[MlflowRun]:
+        return list(self.iter_mlflow_runs(experiment_ids))
+
+    def get_existing_neptune_run_ids(self) -> Set[str]:
+        return self.run_index.get_run_ids()
 
     def fetch_data(self) -> FetchedData:
-        experiments = self.get_all_mlflow_experiments()
+        with self.instrumentation.phase("fetch_experiments"):
+            experiments = self.get_all_mlflow_experiments()
 
         experiment_ids = list(experiments.keys())
 
-        mlflow_runs = self.get_all_mlflow_runs(experiment_ids)
+        with self.instrumentation.phase("fetch_runs"):
+            mlflow_runs = self.get_all_mlflow_runs(experiment_ids)
 
-        neptune_run_ids = self.get_existing_neptune_run_ids()
+        with self.instrumentation.phase("existing_run_ids"):
+            neptune_run_ids = self.get_existing_neptune_run_ids()
 
         return FetchedData(
             mlflow_experiments=experiments,
             mlflow_runs=mlflow_runs,
             neptune_run_ids=neptune_run_ids,
         )
+
+    def stream_data(self) -> StreamedData:
+        """Fetches experiments eagerly and runs lazily."""
+        with self.instrumentation.phase("fetch_experiments"):
+            experiments = self.get_all_mlflow_experiments()
+
+        with self.instrumentation.phase("existing_run_ids"):
+            neptune_run_ids = self.get_existing_neptune_run_ids()
+
+        with self.instrumentation.phase("count_runs"):
+            total_runs = self.count_mlflow_runs(list(experiments.keys()))
+
+        # the time of getting every run, mostly spent on fetching pages of search results
+        mlflow_runs = self.instrumentation.time_iterator("fetch_run", self.iter_mlflow_runs(list(experiments.keys())))
+
+        return StreamedData(
+            mlflow_experiments=experiments,
+            mlflow_runs=mlflow_runs,
+            neptune_run_ids=neptune_run_ids,
+            total_runs=total_runs,
+        )
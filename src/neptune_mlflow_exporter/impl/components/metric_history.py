@@ -0,0 +1,111 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["MetricHistoryFetcher"]
+
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from typing import (
+    Deque,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import mlflow
+from mlflow.entities import Run as MlflowRun
+
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
+from neptune_mlflow_exporter.impl.readers import MlflowStoreReader
+
+
+class MetricHistoryFetcher:
+    """Fetches the histories of all requested metric keys of a run.
+
+    The MLflow client exposes a single history per request, so the keys are requested concurrently
+    on a pool shared by all runs, with at most as many requests of a run in flight as there are workers.
+    Histories are yielded in the order of the keys as soon as they arrive, so uploading one metric overlaps
+    fetching the next ones. If a store reader is given, the histories are read directly from the tracking store
+    instead, in as few requests as the store allows.
+
+    Long histories can also be streamed page by page with `iter_metric_pages` if a store reader supports it.
+    """
+
+    def __init__(
+        self,
+        client: mlflow.tracking.MlflowClient,
+        workers: int = 1,
+        reader: Optional[MlflowStoreReader] = None,
+    ):
+        self.mlflow_client = client
+        self.reader = reader
+        self._workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def get_metric_history(self, mlflow_run: MlflowRun, key: str) -> MetricSeries:
+        if self.reader is not None:
+            return self.reader.get_metric_series(mlflow_run, key)
+
+        return MetricSeries.from_metrics(self.mlflow_client.get_metric_history(run_id=mlflow_run.info.run_id, key=key))
+
+    def iter_metric_histories(self, mlflow_run: MlflowRun, keys: Sequence[str]) -> Iterator[Tuple[str, MetricSeries]]:
+        if self.reader is not None:
+            yield from self.reader.iter_metric_series(mlflow_run, keys)
+            return
+
+        if self._executor is None or len(keys) < 2:
+            for key in keys:
+                yield key, self.get_metric_history(mlflow_run, key)
+            return
+
+        # only a window of histories is requested ahead, so that a run with many keys does not hold all of them
+        futures: Deque[Tuple[str, Future]] = deque()
+        try:
+            for key in keys:
+                futures.append((key, self._executor.submit(self.get_metric_history, mlflow_run, key)))
+                if len(futures) >= self._workers:
+                    key, future = futures.popleft()
+                    yield key, future.result()
+
+            while futures:
+                key, future = futures.popleft()
+                yield key, future.result()
+        finally:
+            # the consumer stopped early, e.g. after an upload error
+            for _, future in futures:
+                future.cancel()
+
+    def iter_metric_pages(
+        self, mlflow_run: MlflowRun, keys: Sequence[str], page_size: int
+    ) -> Iterator[Tuple[str, MetricSeries]]:
+        """Yields the histories of the keys in pages of at most `page_size` points.
+
+        Pages of a key follow each other, in the order of the keys. The MLflow client and readers which cannot
+        page a history yield every history as a single page.
+        """
+        if self.reader is not None:
+            yield from self.reader.iter_metric_pages(mlflow_run, keys, page_size)
+            return
+
+        yield from self.iter_metric_histories(mlflow_run, keys)
@@ -0,0 +1,132 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["NeptuneRunIndex"]
+
+import os
+import sqlite3
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from typing import (
+    Iterable,
+    Optional,
+    Set,
+)
+
+from neptune import Project
+
+CUSTOM_RUN_ID_ATTRIBUTE = "sys/custom_run_id"
+CREATION_TIME_ATTRIBUTE = "sys/creation_time"
+
+# Runs created shortly before the last seen one are fetched again, which tolerates
+# clock and timezone differences. Duplicates are ignored by the index.
+REFRESH_OVERLAP = timedelta(days=1)
+
+
+class NeptuneRunIndex:
+    """Set of custom run ids of the runs existing in a Neptune project.
+
+    Only `sys/custom_run_id` and `sys/creation_time` are requested from Neptune. If a state directory is given,
+    the index is persisted there, and later lookups only fetch the runs created since the previous one.
+    """
+
+    FILE_NAME = "neptune_runs.db"
+
+    def __init__(self, project: Project, state_dir: Optional[str] = None):
+        self.project = project
+        self._connection = None
+
+        if state_dir is not None:
+            os.makedirs(state_dir, exist_ok=True)
+            self._connection = sqlite3.connect(os.path.join(state_dir, self.FILE_NAME))
+            self._connection.execute("CREATE TABLE IF NOT EXISTS runs (custom_run_id TEXT PRIMARY KEY)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+
+    def get_run_ids(self) -> Set[str]:
+        if self._connection is None:
+            return set(self._fetch_run_ids(created_after=None))
+
+        created_after = self._load_last_creation_time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO runs (custom_run_id) VALUES (?)",
+                ((run_id,) for run_id in self._fetch_run_ids(created_after)),
+            )
+
+        return {run_id for (run_id,) in self._connection.execute("SELECT custom_run_id FROM runs")}
+
+    def _fetch_run_ids(self, created_after: Optional[datetime]) -> Iterable[str]:
+        columns = [CUSTOM_RUN_ID_ATTRIBUTE, CREATION_TIME_ATTRIBUTE]
+
+        if created_after is None:
+            table = self.project.fetch_runs_table(columns=columns)
+        else:
+            since = (created_after - REFRESH_OVERLAP).strftime("%Y-%m-%dT%H:%M:%SZ")
+            query = f'(`{CREATION_TIME_ATTRIBUTE}`:datetime >= "{since}")'
+            try:
+                table = self.project.fetch_runs_table(columns=columns, query=query)
+            except TypeError:
+                # older clients cannot filter runs by a query
+                table = self.project.fetch_runs_table(columns=columns)
+
+        last_creation_time = created_after
+
+        for entry in _iter_entries(table):
+            creation_time = entry.get_attribute_value(CREATION_TIME_ATTRIBUTE)
+            if isinstance(creation_time, datetime) and (
+                last_creation_time is None or _as_utc(creation_time) > last_creation_time
+            ):
+                last_creation_time = _as_utc(creation_time)
+
+            run_id = entry.get_attribute_value(CUSTOM_RUN_ID_ATTRIBUTE)
+            if isinstance(run_id, str) and run_id:
+                yield run_id
+
+        if last_creation_time is not None:
+            self._store_last_creation_time(last_creation_time)
+
+    def _load_last_creation_time(self) -> Optional[datetime]:
+        row = self._connection.execute("SELECT value FROM meta WHERE key = 'last_creation_time'").fetchone()
+        return datetime.fromisoformat(row[0]) if row is not None else None
+
+    def _store_last_creation_time(self, creation_time: datetime) -> None:
+        if self._connection is None:
+            return
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_creation_time', ?)", (creation_time.isoformat(),)
+        )
+
+
+def _iter_entries(table) -> Iterable:
+    # newer clients page through the table lazily while it is iterated
+    try:
+        return iter(table)
+    except TypeError:
+        return table.to_rows()
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
@@ -0,0 +1,155 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = [
+    "DownsamplingPolicy",
+    "ALGORITHMS",
+    "lttb",
+    "stride",
+    "min_max",
+]
+
+import math
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Sequence,
+)
+
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
+
+
+def lttb(series: MetricSeries, target_points: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets, keeps the points that preserve the visual shape of the series best.
+
+    Steps are used as the x-axis. Returns the indices of the selected points.
+    """
+    length = len(series)
+    if target_points >= length or target_points < 3:
+        return list(range(length))
+
+    xs, ys = series.steps, series.values
+    bucket_size = (length - 2) / (target_points - 2)
+
+    indices = [0]
+    selected = 0
+
+    for bucket in range(target_points - 2):
+        start = int(math.floor(bucket * bucket_size)) + 1
+        end = int(math.floor((bucket + 1) * bucket_size)) + 1
+
+        # the average of the next bucket is the third vertex of the triangle
+        next_start = end
+        next_end = min(int(math.floor((bucket + 2) * bucket_size)) + 1, length)
+        next_count = next_end - next_start
+        average_x = sum(xs[next_start:next_end]) / next_count
+        average_y = sum(ys[next_start:next_end]) / next_count
+
+        ax, ay = xs[selected], ys[selected]
+        max_area, max_index = -1.0, start
+
+        for index in range(start, end):
+            area = abs((ax - average_x) * (ys[index] - ay) - (ax - xs[index]) * (average_y - ay))
+            if area > max_area:
+                max_area, max_index = area, index
+
+        indices.append(max_index)
+        selected = max_index
+
+    indices.append(length - 1)
+    return indices
+
+
+def stride(series: MetricSeries, target_points: int) -> List[int]:
+    """Keeps every n-th point and the last one."""
+    length = len(series)
+    if target_points >= length or target_points < 2:
+        return list(range(length))
+
+    step = math.ceil(length / (target_points - 1))
+    indices = list(range(0, length, step))
+    if indices[-1] != length - 1:
+        indices.append(length - 1)
+    return indices
+
+
+def min_max(series: MetricSeries, target_points: int) -> List[int]:
+    """Keeps the minimum and the maximum of every bucket, so spikes are never dropped."""
+    length = len(series)
+    if target_points >= length or target_points < 4:
+        return list(range(length))
+
+    values = series.values
+    bucket_count = (target_points - 2) // 2
+    bucket_size = (length - 2) / bucket_count
+
+    indices = [0]
+    for bucket in range(bucket_count):
+        start = int(math.floor(bucket * bucket_size)) + 1
+        end = int(math.floor((bucket + 1) * bucket_size)) + 1
+        if start >= end:
+            continue
+
+        bucket_indices = range(start, end)
+        low = min(bucket_indices, key=values.__getitem__)
+        high = max(bucket_indices, key=values.__getitem__)
+        indices.extend(sorted({low, high}))
+
+    indices.append(length - 1)
+    return indices
+
+
+ALGORITHMS: Dict[str, Callable[[MetricSeries, int], List[int]]] = {
+    "lttb": lttb,
+    "stride": stride,
+    "minmax": min_max,
+}
+
+
+@dataclass
+class DownsamplingPolicy:
+    """Reduces metric histories longer than `target_points` before they are uploaded.
+
+    Only keys matching one of `include` patterns (all keys if empty) and none of `exclude` patterns are downsampled,
+    so that e.g. validation metrics can be kept lossless.
+    """
+
+    algorithm: str
+    target_points: int
+    include: Sequence[str] = ()
+    exclude: Sequence[str] = ()
+
+    def __post_init__(self) -> None:
+        if self.algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown downsampling algorithm '{self.algorithm}', use one of: {', '.join(ALGORITHMS)}")
+
+        if not isinstance(self.target_points, int) or self.target_points < 4:
+            raise ValueError("Downsampling target must be an integer of at least 4 points")
+
+    def applies_to(self, key: str) -> bool:
+        if self.include and not any(fnmatchcase(key, pattern) for pattern in self.include):
+            return False
+
+        return not any(fnmatchcase(key, pattern) for pattern in self.exclude)
+
+    def apply(self, key: str, series: MetricSeries) -> MetricSeries:
+        if len(series) <= self.target_points or not self.applies_to(key):
+            return series
+
+        return series.take(ALGORITHMS[self.algorithm](series, self.target_points))
@@ -0,0 +1,184 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["DryRun", "ExportEstimate"]
+
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import (
+    List,
+    Optional,
+    Sequence,
+)
+
+from mlflow.entities import Run as MlflowRun
+
+from neptune_mlflow_exporter.impl.artifact_planner import (
+    ArtifactPlanner,
+    PlannedArtifact,
+)
+from neptune_mlflow_exporter.impl.artifact_strategy import choose_upload_strategy
+from neptune_mlflow_exporter.impl.components import (
+    ExportConfig,
+    Fetcher,
+    MetricHistoryFetcher,
+)
+from neptune_mlflow_exporter.impl.instrumentation import format_duration
+from neptune_mlflow_exporter.impl.scheduler import RequestScheduler
+
+# number of artifact bytes downloaded at most to measure the download throughput
+CALIBRATION_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class ExportEstimate:
+    experiments: int
+    runs: int
+    skipped_runs: int
+    sampled_runs: int
+    metric_points: int
+    artifacts: int
+    artifact_bytes: int
+    # seconds of reading a run from MLflow, apart from its artifacts
+    seconds_per_run: float
+    # bytes per second of a single artifact download, None if nothing was downloaded
+    download_rate: Optional[float]
+    estimated_seconds: float
+
+    def format(self) -> List[str]:
+        extrapolated = " (extrapolated)" if self.sampled_runs < self.runs else ""
+        download_rate = (
+            f"{self.download_rate / (1024 * 1024):.1f} MB/s per download" if self.download_rate else "not measured"
+        )
+        return [
+            f"Experiments: {self.experiments}",
+            f"Runs to export: {self.runs}",
+            f"Runs skipped as existing: {self.skipped_runs}",
+            f"Runs sampled: {self.sampled_runs}",
+            f"Metric points{extrapolated}: {self.metric_points}",
+            f"Artifacts{extrapolated}: {self.artifacts}, {self.artifact_bytes / (1024 * 1024):.1f} MB",
+            f"Measured throughput: {self.seconds_per_run:.2f} s per run, {download_rate}",
+            f"Estimated time: {format_duration(self.estimated_seconds)}",
+        ]
+
+
+class DryRun:
+    """Estimates the size and the duration of an export without writing anything to Neptune.
+
+    All experiments and runs are fetched as in an export, but metric histories and artifacts are only
+    measured for a sample of the runs and extrapolated to the rest. The duration is estimated from
+    the time it took to read the sampled runs and to download a few of their artifacts.
+    Uploads to Neptune are not measured, so the estimate is a lower bound when Neptune is the bottleneck.
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher,
+        metric_history_fetcher: MetricHistoryFetcher,
+        artifact_planner: ArtifactPlanner,
+        config: ExportConfig,
+        sample_size: int = 20,
+        scheduler: Optional[RequestScheduler] = None,
+    ):
+        self.fetcher = fetcher
+        self.metric_history_fetcher = metric_history_fetcher
+        self.artifact_planner = artifact_planner
+        self.config = config
+        self.sample_size = sample_size
+        self.scheduler = scheduler or RequestScheduler("mlflow", max_concurrency=1)
+
+    def run(self) -> ExportEstimate:
+        data = self.fetcher.fetch_data()
+
+        if self.config.incremental:
+            runs = data.mlflow_runs
+        else:
+            runs = [run for run in data.mlflow_runs if run.info.run_id not in data.neptune_run_ids]
+        sample = _sample(runs, self.sample_size)
+
+        metric_points, artifacts = 0, []
+        start = time.monotonic()
+        for mlflow_run in sample:
+            keys = list(mlflow_run.data.metrics.keys())
+            for _, series in self.metric_history_fetcher.iter_metric_histories(mlflow_run, keys):
+                metric_points += len(series)
+
+            if not self.config.exclude_artifacts:
+                for artifact in self.artifact_planner.plan(mlflow_run.info.run_id, self.config.max_artifact_size):
+                    artifacts.append((mlflow_run, artifact))
+        seconds_per_run = (time.monotonic() - start) / len(sample) if sample else 0.0
+
+        scale = len(runs) / len(sample) if sample else 0.0
+        artifact_bytes = int(sum(artifact.size for _, artifact in artifacts) * scale)
+        download_rate = self._calibrate_downloads(artifacts)
+
+        estimated_seconds = len(runs) * seconds_per_run / self.config.workers
+        if download_rate:
+            total_rate = download_rate * self.config.artifact_workers
+            if self.config.max_artifact_bandwidth is not None:
+                total_rate = min(total_rate, self.config.max_artifact_bandwidth)
+            estimated_seconds += artifact_bytes / total_rate
+
+        return ExportEstimate(
+            experiments=len(data.mlflow_experiments),
+            runs=len(runs),
+            skipped_runs=len(data.mlflow_runs) - len(runs),
+            sampled_runs=len(sample),
+            metric_points=int(metric_points * scale),
+            artifacts=int(len(artifacts) * scale),
+            artifact_bytes=artifact_bytes,
+            seconds_per_run=seconds_per_run,
+            download_rate=download_rate,
+            estimated_seconds=estimated_seconds,
+        )
+
+    def _calibrate_downloads(self, artifacts: Sequence[tuple]) -> Optional[float]:
+        """Downloads the smallest sampled artifacts, up to `CALIBRATION_BYTES`, and returns the measured rate.
+
+        Returns None if every sampled artifact is larger than `CALIBRATION_BYTES`, so that none is downloaded.
+        """
+        downloaded_bytes, elapsed = 0, 0.0
+
+        for mlflow_run, artifact in sorted(artifacts, key=lambda item: item[1].size):
+            if artifact.size == 0:
+                continue
+            # sorted by size, so no later artifact fits either, even if nothing was downloaded yet
+            if downloaded_bytes + artifact.size > CALIBRATION_BYTES:
+                break
+
+            downloaded_bytes += artifact.size
+            elapsed += self._download(mlflow_run, artifact)
+
+        return downloaded_bytes / elapsed if elapsed > 0 else None
+
+    def _download(self, mlflow_run: MlflowRun, artifact: PlannedArtifact) -> float:
+        strategy = choose_upload_strategy(artifact.info, self.config.mlflow_tracking_uri, self.config.max_artifact_size)
+
+        with tempfile.TemporaryDirectory(dir=self.config.staging_dir) as staging_dir:
+            start = time.monotonic()
+            self.scheduler.call(strategy.download, artifact.info, mlflow_run, staging_dir)
+            return time.monotonic() - start
+
+
+def _sample(runs: List[MlflowRun], size: int) -> List[MlflowRun]:
+    """Picks runs evenly spread over the list, so the sample is not biased towards the newest ones."""
+    if len(runs) <= size:
+        return runs
+
+    step = len(runs) / size
+    return [runs[int(index * step)] for index in range(size)]
+
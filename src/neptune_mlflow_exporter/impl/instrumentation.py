@@ -0,0 +1,252 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = [
+    "ExportInstrumentation",
+    "Histogram",
+    "ProgressLine",
+    "format_duration",
+]
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+import click
+
+T = TypeVar("T")
+
+# upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+PROMETHEUS_PREFIX = "neptune_mlflow_export"
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, as exposed by Prometheus."""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # the last bucket counts the observations above all bounds
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Returns the upper bound of the bucket holding the quantile, or the max for the overflow bucket."""
+        if not self.count:
+            return None
+
+        rank, cumulative = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "mean_seconds": round(self.sum / self.count, 6) if self.count else None,
+            "max_seconds": round(self.max, 6),
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "p99_seconds": self.quantile(0.99),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+        }
+
+
+class ExportInstrumentation:
+    """Latencies of the export phases and counters of the exported runs, points and bytes.
+
+    Shared by all workers, so every update is made under a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Records the duration of the block in the histogram of the phase, even if it fails."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start)
+
+    def time_iterator(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yields the items, recording how long it took to get each of them."""
+        iterator = iter(iterable)
+        while True:
+            start = time.monotonic()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(name, time.monotonic() - start)
+            yield item
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    def throughput(self) -> Dict[str, float]:
+        elapsed = max(self.elapsed, 1e-9)
+        with self._lock:
+            runs = sum(self._counters.get(name, 0) for name in ("runs_exported", "runs_updated"))
+            points = self._counters.get("metric_points", 0)
+            artifact_bytes = self._counters.get("artifact_bytes", 0)
+
+        return {
+            "runs_per_second": runs / elapsed,
+            "points_per_second": points / elapsed,
+            "mb_per_second": artifact_bytes / (1024 * 1024) / elapsed,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        throughput = {name: round(value, 3) for name, value in self.throughput().items()}
+        with self._lock:
+            return {
+                "duration_seconds": round(self.elapsed, 3),
+                "counters": dict(sorted(self._counters.items())),
+                "throughput": throughput,
+                "phases": {name: histogram.to_dict() for name, histogram in sorted(self._histograms.items())},
+            }
+
+    def to_prometheus(self) -> str:
+        """Formats the report in the Prometheus text format, e.g. for the textfile collector of node_exporter."""
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}_duration_seconds Duration of the export.",
+            f"# TYPE {PROMETHEUS_PREFIX}_duration_seconds gauge",
+            f"{PROMETHEUS_PREFIX}_duration_seconds {self.elapsed:.3f}",
+        ]
+
+        with self._lock:
+            for name, value in sorted(self._counters.items()):
+                metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+            metric = f"{PROMETHEUS_PREFIX}_phase_seconds"
+            lines += [f"# HELP {metric} Duration of the export phases.", f"# TYPE {metric} histogram"]
+            for name, histogram in sorted(self._histograms.items()):
+                lines += _format_prometheus_histogram(metric, name, histogram)
+
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path: str) -> None:
+        """Writes the report in the Prometheus text format if the file ends with `.prom`, otherwise as JSON."""
+        if path.endswith(".prom"):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent=2) + "\n"
+
+        with open(path, "w") as report_file:
+            report_file.write(content)
+
+
+class ProgressLine:
+    """Periodically prints the number of processed runs with the throughput and, once their total is known, the ETA.
+
+    The line goes to stderr, so it does not mix with the messages about the runs.
+    """
+
+    def __init__(self, instrumentation: ExportInstrumentation, interval: Optional[float] = 10.0):
+        self.instrumentation = instrumentation
+        self.interval = interval
+        self._last = time.monotonic()
+
+    def update(self, completed: int, total: Optional[int] = None) -> None:
+        if not self.interval:
+            return
+
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return
+
+        self._last = now
+        click.echo(self.format(completed, total), err=True)
+
+    def format(self, completed: int, total: Optional[int] = None) -> str:
+        throughput = self.instrumentation.throughput()
+        parts = [
+            f"Progress: {completed}/{total} runs" if total is not None else f"Progress: {completed} runs",
+            f"{throughput['runs_per_second']:.2f} runs/s",
+            f"{throughput['points_per_second']:.0f} points/s",
+            f"{throughput['mb_per_second']:.1f} MB/s",
+        ]
+
+        if total is not None and completed:
+            remaining = (total - completed) * self.instrumentation.elapsed / completed
+            parts.append(f"ETA {format_duration(remaining)}")
+
+        return ", ".join(parts)
+
+
+def _format_prometheus_histogram(metric: str, phase: str, histogram: Histogram) -> List[str]:
+    lines, cumulative = [], 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+
+    lines += [
+        f'{metric}_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}',
+        f'{metric}_sum{{phase="{phase}"}} {histogram.sum:.6f}',
+        f'{metric}_count{{phase="{phase}"}} {histogram.count}',
+    ]
+    return lines
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m {seconds:02d}s"
@@ -0,0 +1,210 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = [
+    "ExportJournal",
+    "MetricCursor",
+    "RunCheckpoint",
+    "EXPERIMENT_STAGE",
+    "RUN_INFO_STAGE",
+    "RUN_DATA_STAGE",
+    "metric_stage",
+    "artifact_stage",
+]
+
+import os
+import sqlite3
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    try:
+        from neptune import Run
+    except ImportError:
+        from neptune.new import Run
+
+EXPERIMENT_STAGE = "experiment"
+RUN_INFO_STAGE = "run_info"
+RUN_DATA_STAGE = "run_data"
+
+# (step, timestamp in milliseconds) of the last metric point exported to Neptune
+MetricCursor = Tuple[int, int]
+
+
+def metric_stage(key: str) -> str:
+    return f"metrics/{key}"
+
+
+def artifact_stage(path: str) -> str:
+    return f"artifacts/{path}"
+
+
+class ExportJournal:
+    """Records on disk which parts of which MLflow runs were already exported to Neptune.
+
+    The journal is an SQLite database kept in the state directory. A run is `started` once its export begins
+    and `completed` when every stage was written, so an interrupted export can be resumed stage by stage.
+    """
+
+    FILE_NAME = "journal.db"
+
+    def __init__(self, state_dir: str):
+        os.makedirs(state_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(state_dir, self.FILE_NAME), check_same_thread=False, isolation_level=None
+        )
+
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, completed INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS stages (run_id TEXT NOT NULL, stage TEXT NOT NULL, "
+                "PRIMARY KEY (run_id, stage))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS metric_cursors (run_id TEXT NOT NULL, key TEXT NOT NULL, "
+                "step INTEGER NOT NULL, timestamp INTEGER NOT NULL, PRIMARY KEY (run_id, key))"
+            )
+
+    def __enter__(self) -> "ExportJournal":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _fetch_one(self, query: str, *params) -> Optional[tuple]:
+        with self._lock:
+            return self._connection.execute(query, params).fetchone()
+
+    def is_run_started(self, run_id: str) -> bool:
+        return self._fetch_one("SELECT 1 FROM runs WHERE run_id = ?", run_id) is not None
+
+    def is_run_completed(self, run_id: str) -> bool:
+        return self._fetch_one("SELECT 1 FROM runs WHERE run_id = ? AND completed = 1", run_id) is not None
+
+    def start_run(self, run_id: str) -> None:
+        with self._lock:
+            self._connection.execute("INSERT OR IGNORE INTO runs (run_id) VALUES (?)", (run_id,))
+
+    def complete_run(self, run_id: str) -> None:
+        with self._lock:
+            self._connection.execute("UPDATE runs SET completed = 1 WHERE run_id = ?", (run_id,))
+
+    def get_completed_stages(self, run_id: str) -> Set[str]:
+        with self._lock:
+            rows = self._connection.execute("SELECT stage FROM stages WHERE run_id = ?", (run_id,)).fetchall()
+        return {stage for (stage,) in rows}
+
+    def mark_stages_completed(self, run_id: str, stages: Iterable[str]) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO stages (run_id, stage) VALUES (?, ?)", [(run_id, stage) for stage in stages]
+            )
+
+    def get_metric_cursors(self, run_id: str) -> Dict[str, MetricCursor]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, step, timestamp FROM metric_cursors WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return {key: (step, timestamp) for (key, step, timestamp) in rows}
+
+    def set_metric_cursors(self, run_id: str, cursors: Mapping[str, MetricCursor]) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO metric_cursors (run_id, key, step, timestamp) VALUES (?, ?, ?, ?)",
+                [(run_id, key, step, timestamp) for key, (step, timestamp) in cursors.items()],
+            )
+
+
+class RunCheckpoint:
+    """Tracks the stages of a single run export.
+
+    Stages and metric cursors are only written to the journal in `commit`, after the Neptune run was synchronized,
+    so nothing is recorded as exported while its data may still be waiting in the local queue.
+    Without a journal the progress is only kept in memory, where a retry of the run in the same export resumes it.
+    """
+
+    def __init__(self, journal: Optional[ExportJournal], run_id: str):
+        self._journal = journal
+        self._run_id = run_id
+        self._started = False
+        self._completed: Set[str] = set()
+        self._pending: List[str] = []
+        self._cursors: Dict[str, MetricCursor] = {}
+        self._pending_cursors: Dict[str, MetricCursor] = {}
+
+        if journal is not None:
+            self._completed = journal.get_completed_stages(run_id)
+            self._cursors = journal.get_metric_cursors(run_id)
+
+    def is_run_started(self) -> bool:
+        return self._started or (self._journal is not None and self._journal.is_run_started(self._run_id))
+
+    def is_run_completed(self) -> bool:
+        return self._journal is not None and self._journal.is_run_completed(self._run_id)
+
+    def start_run(self) -> None:
+        self._started = True
+        if self._journal is not None:
+            self._journal.start_run(self._run_id)
+
+    def is_completed(self, stage: str) -> bool:
+        return stage in self._completed
+
+    def complete(self, stage: str) -> None:
+        self._completed.add(stage)
+        self._pending.append(stage)
+
+    def get_metric_cursor(self, key: str) -> Optional[MetricCursor]:
+        return self._cursors.get(key)
+
+    def update_metric_cursor(self, key: str, cursor: MetricCursor) -> None:
+        self._cursors[key] = cursor
+        self._pending_cursors[key] = cursor
+
+    def commit(self, neptune_run: "Run") -> None:
+        if self._journal is None or not (self._pending or self._pending_cursors):
+            return
+
+        neptune_run.wait()
+        self._journal.set_metric_cursors(self._run_id, self._pending_cursors)
+        self._journal.mark_stages_completed(self._run_id, self._pending)
+        self._pending = []
+        self._pending_cursors = {}
+
+    def complete_run(self, neptune_run: "Run") -> None:
+        if self._journal is None:
+            return
+
+        self.commit(neptune_run)
+        self._journal.complete_run(self._run_id)
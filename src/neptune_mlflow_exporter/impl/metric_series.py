@@ -0,0 +1,146 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["MetricSeries"]
+
+from array import array
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from mlflow.entities import Metric
+
+from neptune_mlflow_exporter.impl.journal import MetricCursor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class MetricSeries:
+    """History of a single MLflow metric stored column by column in contiguous arrays.
+
+    Points are appended to `array.array` buffers, which NumPy, if installed, wraps without copying
+    to filter and convert whole columns at once. Timestamps are kept in milliseconds, as in MLflow,
+    with 0 standing for a missing timestamp.
+    """
+
+    def __init__(
+        self,
+        values: Optional[Iterable[float]] = None,
+        timestamps: Optional[Iterable[int]] = None,
+        steps: Optional[Iterable[int]] = None,
+    ):
+        self.values = array("d", values if values is not None else [])
+        self.timestamps = array("q", timestamps if timestamps is not None else [])
+        self.steps = array("q", steps if steps is not None else [])
+
+    @classmethod
+    def from_metrics(cls, metrics: Iterable[Metric]) -> "MetricSeries":
+        series = cls()
+        append_value = series.values.append
+        append_timestamp = series.timestamps.append
+        append_step = series.steps.append
+
+        # a single pass which creates no intermediate objects
+        for metric in metrics:
+            append_value(metric.value)
+            append_timestamp(metric.timestamp or 0)
+            append_step(metric.step or 0)
+
+        return series
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, value: float, timestamp: Optional[int], step: Optional[int]) -> None:
+        self.values.append(value)
+        self.timestamps.append(timestamp or 0)
+        self.steps.append(step or 0)
+
+    def _as_numpy(self) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        # views sharing memory with the arrays, which cannot be appended to while the views are alive
+        return (
+            np.frombuffer(self.values, dtype=np.float64),
+            np.frombuffer(self.timestamps, dtype=np.int64),
+            np.frombuffer(self.steps, dtype=np.int64),
+        )
+
+    def last_cursor(self) -> Optional[MetricCursor]:
+        if not self.values:
+            return None
+
+        if np is None:
+            return max(zip(self.steps, self.timestamps))
+
+        _, timestamps, steps = self._as_numpy()
+        last_step = steps.max()
+        return int(last_step), int(timestamps[steps == last_step].max())
+
+    def take(self, indices: Iterable[int]) -> "MetricSeries":
+        if np is None:
+            series = MetricSeries()
+            for index in indices:
+                series.append(self.values[index], self.timestamps[index], self.steps[index])
+            return series
+
+        if not isinstance(indices, np.ndarray):
+            indices = np.fromiter(indices, dtype=np.int64)
+        values, timestamps, steps = self._as_numpy()
+
+        series = MetricSeries()
+        series.values.frombytes(values[indices].tobytes())
+        series.timestamps.frombytes(timestamps[indices].tobytes())
+        series.steps.frombytes(steps[indices].tobytes())
+        return series
+
+    def after(self, cursor: MetricCursor) -> "MetricSeries":
+        """Returns the points logged after the given (step, timestamp)."""
+        step, timestamp = cursor
+
+        if not self.values:
+            return MetricSeries()
+
+        if np is None:
+            return self.take(
+                index for index, point in enumerate(zip(self.steps, self.timestamps)) if point > (step, timestamp)
+            )
+
+        _, timestamps, steps = self._as_numpy()
+        return self.take(np.flatnonzero((steps > step) | ((steps == step) & (timestamps > timestamp))))
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[Tuple[List[float], List[int], List[Optional[float]]]]:
+        """Yields values, steps and timestamps in seconds, in chunks accepted by `extend` in Neptune.
+
+        Only a single chunk is converted to Python objects at a time.
+        """
+        for start in range(0, len(self), chunk_size):
+            end = start + chunk_size
+
+            if np is None:
+                timestamps = [timestamp / 1e3 if timestamp else None for timestamp in self.timestamps[start:end]]
+            else:
+                chunk = np.frombuffer(self.timestamps, dtype=np.int64)[start:end]
+                timestamps = (chunk / 1e3).tolist()
+                for index in np.flatnonzero(chunk == 0).tolist():
+                    timestamps[index] = None
+
+            yield self.values[start:end].tolist(), self.steps[start:end].tolist(), timestamps
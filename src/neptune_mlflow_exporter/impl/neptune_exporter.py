@@ -13,8 +13,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from typing import Optional
+from typing import (
+    Mapping,
+    Optional,
+    Sequence,
+)
 
+import click
 import mlflow
 
 try:
@@ -22,12 +27,33 @@ try:
 except ImportError:
     from neptune.new.metadata_containers import Project
 
+from neptune_mlflow_exporter.impl.artifact_cache import ArtifactCache
+from neptune_mlflow_exporter.impl.artifact_planner import ArtifactPlanner
 from neptune_mlflow_exporter.impl.components import (
+    ArtifactTransfer,
     ExportConfig,
     Exporter,
     Fetcher,
+    MetricHistoryFetcher,
+    NeptuneRunIndex,
 )
+from neptune_mlflow_exporter.impl.downsampling import DownsamplingPolicy
+from neptune_mlflow_exporter.impl.dry_run import DryRun
+from neptune_mlflow_exporter.impl.instrumentation import ExportInstrumentation
+from neptune_mlflow_exporter.impl.journal import ExportJournal
 from neptune_mlflow_exporter.impl.orchestrator import ExportOrchestrator
+from neptune_mlflow_exporter.impl.readers import (
+    SnapshotReader,
+    get_store_reader,
+)
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+from neptune_mlflow_exporter.impl.scheduler import (
+    RequestScheduler,
+    ScheduledClient,
+)
+from neptune_mlflow_exporter.impl.snapshot import SnapshotWriter
+from neptune_mlflow_exporter.impl.staging import StagingArea
+from neptune_mlflow_exporter.impl.watch import ExportWatcher
 
 
 class NeptuneExporter:
@@ -40,24 +66,184 @@ class NeptuneExporter:
         mlflow_tracking_uri: Optional[str] = None,
         exclude_artifacts: bool = False,
         max_artifact_size: int = 50,
+        workers: int = 1,
+        state_dir: Optional[str] = None,
+        incremental: bool = False,
+        metric_workers: int = 4,
+        metric_page_size: int = 10000,
+        downsampling: Optional[DownsamplingPolicy] = None,
+        artifact_workers: int = 4,
+        max_artifact_bandwidth: Optional[float] = None,
+        staging_dir: Optional[str] = None,
+        max_staging_size: Optional[int] = None,
+        artifact_mounts: Optional[Mapping[str, str]] = None,
+        artifact_dedup: Optional[str] = None,
+        pack_threshold: Optional[int] = None,
+        artifact_include: Sequence[str] = (),
+        artifact_exclude: Sequence[str] = (),
+        dry_run: bool = False,
+        dry_run_sample: int = 20,
+        progress_interval: Optional[float] = 10.0,
+        report_file: Optional[str] = None,
+        selection: Optional[RunSelection] = None,
+        snapshot_dir: Optional[str] = None,
+        from_snapshot: Optional[str] = None,
+        watch: bool = False,
+        poll_interval: float = 60.0,
+        mlflow_rate: Optional[float] = None,
+        neptune_rate: Optional[float] = None,
+        run_retries: int = 2,
     ):
+        if artifact_dedup is not None and state_dir is None:
+            # the cache of exported artifacts lives in the state directory
+            raise ValueError("Artifact deduplication requires a state directory")
+
         self.project = project
         self.project_name = project_name
         self.api_token = api_token
         self.mlflow_tracking_uri = mlflow_tracking_uri
         self.exclude_artifacts = exclude_artifacts
         self.max_artifact_size = int(max_artifact_size * (1024 * 1024))  # to bytes
+        self.workers = workers
+        self.state_dir = state_dir
+        # runs exported by earlier polls are updated by the later ones
+        self.incremental = incremental or watch
+        self.metric_workers = metric_workers
+        self.metric_page_size = metric_page_size
+        self.downsampling = downsampling
+        self.artifact_workers = artifact_workers
+        self.max_artifact_bandwidth = (
+            max_artifact_bandwidth * (1024 * 1024) if max_artifact_bandwidth is not None else None
+        )  # to bytes per second
+        self.staging_dir = staging_dir
+        self.max_staging_size = (
+            int(max_staging_size * (1024 * 1024)) if max_staging_size is not None else None
+        )  # to bytes
+        self.artifact_mounts = dict(artifact_mounts or {})
+        self.artifact_dedup = artifact_dedup
+        self.pack_threshold = pack_threshold * 1024 if pack_threshold is not None else None  # to bytes
+        self.artifact_include = tuple(artifact_include)
+        self.artifact_exclude = tuple(artifact_exclude)
+        self.dry_run = dry_run
+        self.dry_run_sample = dry_run_sample
+        self.progress_interval = progress_interval
+        self.report_file = report_file
+        self.selection = selection
+        self.snapshot_dir = snapshot_dir
+        self.from_snapshot = from_snapshot
+        self.watch = watch
+        self.poll_interval = poll_interval
+        self.mlflow_rate = mlflow_rate
+        self.neptune_rate = neptune_rate
+        self.run_retries = run_retries
         self.mlflow_client = mlflow.tracking.MlflowClient(tracking_uri=self.mlflow_tracking_uri)
 
     def run(self) -> None:
-        ExportOrchestrator(
-            fetcher=Fetcher(self.project, self.mlflow_client),
-            exporter=Exporter(self.mlflow_client),
-            config=ExportConfig(
-                exclude_artifacts=self.exclude_artifacts,
-                max_artifact_size=self.max_artifact_size,
-                project_name=self.project_name,
-                api_token=self.api_token,
-                mlflow_tracking_uri=self.mlflow_tracking_uri,
-            ),
-        ).run()
+        instrumentation = ExportInstrumentation()
+        # all MLflow requests of an export go through one scheduler, so they back off together when throttled
+        mlflow_scheduler = RequestScheduler(
+            "mlflow",
+            rate=self.mlflow_rate,
+            max_concurrency=self.workers * (self.metric_workers + self.artifact_workers) + 1,
+            instrumentation=instrumentation,
+        )
+        neptune_scheduler = RequestScheduler(
+            "neptune", rate=self.neptune_rate, max_concurrency=self.workers, instrumentation=instrumentation
+        )
+        mlflow_client = ScheduledClient(self.mlflow_client, mlflow_scheduler)
+        run_index = NeptuneRunIndex(self.project, self.state_dir)
+        journal = ExportJournal(self.state_dir) if self.state_dir is not None else None
+        if self.from_snapshot is not None:
+            reader = SnapshotReader(self.from_snapshot)
+        else:
+            # local file stores are read directly, other ones through the MLflow client
+            reader = get_store_reader(self.mlflow_tracking_uri)
+        metric_history_fetcher = MetricHistoryFetcher(mlflow_client, workers=self.metric_workers, reader=reader)
+        artifact_cache = None
+        if self.artifact_dedup is not None:
+            artifact_cache = ArtifactCache(self.state_dir, self.artifact_dedup)
+        artifact_transfer = ArtifactTransfer(
+            workers=self.artifact_workers,
+            max_bandwidth=self.max_artifact_bandwidth,
+            staging_area=StagingArea(self.staging_dir, self.max_staging_size),
+            artifact_mounts=self.artifact_mounts,
+            cache=artifact_cache,
+            pack_threshold=self.pack_threshold,
+            instrumentation=instrumentation,
+            scheduler=mlflow_scheduler,
+        )
+
+        config = ExportConfig(
+            exclude_artifacts=self.exclude_artifacts,
+            max_artifact_size=self.max_artifact_size,
+            project_name=self.project_name,
+            api_token=self.api_token,
+            mlflow_tracking_uri=self.mlflow_tracking_uri,
+            workers=self.workers,
+            incremental=self.incremental,
+            metric_page_size=self.metric_page_size,
+            artifact_workers=self.artifact_workers,
+            max_artifact_bandwidth=self.max_artifact_bandwidth,
+            staging_dir=self.staging_dir,
+            progress_interval=self.progress_interval,
+            run_retries=self.run_retries,
+        )
+        fetcher = Fetcher(self.project, mlflow_client, run_index, reader, instrumentation, self.selection)
+        # artifacts of a snapshot are listed from its manifest
+        artifact_lister = reader if self.from_snapshot is not None else mlflow_client
+        artifact_planner = ArtifactPlanner(artifact_lister, self.artifact_include, self.artifact_exclude)
+
+        try:
+            if self.snapshot_dir is not None:
+                SnapshotWriter(fetcher, metric_history_fetcher, mlflow_client, config).write(self.snapshot_dir)
+                return
+
+            if self.dry_run:
+                estimate = DryRun(
+                    fetcher, metric_history_fetcher, artifact_planner, config, self.dry_run_sample, mlflow_scheduler
+                ).run()
+                for line in estimate.format():
+                    click.echo(line)
+                return
+
+            orchestrator = ExportOrchestrator(
+                fetcher=fetcher,
+                exporter=Exporter(
+                    mlflow_client,
+                    metric_history_fetcher,
+                    self.downsampling,
+                    self.metric_page_size,
+                    artifact_transfer,
+                    artifact_planner,
+                    instrumentation,
+                    record_metric_cursors=self.incremental,
+                ),
+                config=config,
+                journal=journal,
+                instrumentation=instrumentation,
+                neptune_scheduler=neptune_scheduler,
+            )
+
+            if self.watch:
+                ExportWatcher(fetcher, orchestrator, self.poll_interval, self.state_dir).run()
+            else:
+                orchestrator.run()
+
+            if artifact_cache is not None and artifact_cache.saved_artifacts:
+                click.echo(
+                    f"Deduplication saved {artifact_cache.saved_bytes / (1024 * 1024):.1f} MB "
+                    f"in {artifact_cache.saved_artifacts} artifacts"
+                )
+        finally:
+            metric_history_fetcher.close()
+            artifact_transfer.close()
+            if artifact_cache is not None:
+                artifact_cache.close()
+            if reader is not None:
+                reader.close()
+            run_index.close()
+            if journal is not None:
+                journal.close()
+            # written also when the export fails, to show where it got stuck
+            if self.report_file is not None:
+                instrumentation.write_report(self.report_file)
@@ -16,7 +16,25 @@
 
 __all__ = ["ExportOrchestrator"]
 
+import time
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from typing import (
+    Deque,
+    Iterable,
+    List,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
 import click
+from mlflow.entities import Experiment
+from mlflow.entities import Run as MlflowRun
 
 try:
     from neptune import Run as NeptuneRun
@@ -27,44 +45,240 @@ from neptune_mlflow_exporter.impl.components import (
     ExportConfig,
     Exporter,
     Fetcher,
+    StreamedData,
+)
+from neptune_mlflow_exporter.impl.instrumentation import (
+    ExportInstrumentation,
+    ProgressLine,
+)
+from neptune_mlflow_exporter.impl.journal import (
+    EXPERIMENT_STAGE,
+    RUN_INFO_STAGE,
+    ExportJournal,
+    RunCheckpoint,
 )
+from neptune_mlflow_exporter.impl.scheduler import (
+    RequestScheduler,
+    is_throttling_error,
+)
+
+# seconds to wait before the first retry of runs failed by throttling, doubled for every next one
+RUN_RETRY_BACKOFF = 5.0
 
 
 class ExportOrchestrator:
-    def __init__(self, fetcher: Fetcher, exporter: Exporter, config: ExportConfig):
+    def __init__(
+        self,
+        fetcher: Fetcher,
+        exporter: Exporter,
+        config: ExportConfig,
+        journal: Optional[ExportJournal] = None,
+        instrumentation: Optional[ExportInstrumentation] = None,
+        neptune_scheduler: Optional[RequestScheduler] = None,
+    ):
 
         self.fetcher = fetcher
         self.exporter = exporter
         self.config = config
+        self.journal = journal
+        self.instrumentation = instrumentation or ExportInstrumentation()
+        self.progress = ProgressLine(self.instrumentation, config.progress_interval)
+        self.neptune_scheduler = neptune_scheduler or RequestScheduler(
+            "neptune", max_concurrency=config.workers, instrumentation=self.instrumentation
+        )
+        self._completed = 0
+        # failed runs keep their checkpoints, so their retries continue where they stopped
+        self._failed_runs: Deque[Tuple[MlflowRun, Exception, RunCheckpoint]] = deque()
+
+    @property
+    def failed_runs(self) -> List[MlflowRun]:
+        """Runs of the last export which could not be exported even after the retries."""
+        return [mlflow_run for mlflow_run, _, _ in self._failed_runs]
 
     def run(self) -> None:
-        fetched_data = self.fetcher.fetch_data()
-
-        for mlflow_run in fetched_data.mlflow_runs:
-            if mlflow_run.info.run_id in fetched_data.neptune_run_ids:
-                click.echo(f"Ignoring mlflow_run '{mlflow_run.info.run_name}' since it already exists")
-                continue
-
-            click.echo(f"Loading mlflow_run '{mlflow_run.info.run_name}'")
-
-            with NeptuneRun(
-                project=self.config.project_name,
-                api_token=self.config.api_token,
-                custom_run_id=mlflow_run.info.run_id,
-                capture_hardware_metrics=False,
-            ) as neptune_run:
-                try:
-                    experiment = fetched_data.mlflow_experiments[mlflow_run.info.experiment_id]
+        # Runs are exported while they are still being fetched, page by page.
+        self.export(self.fetcher.stream_data())
+
+    def export(self, streamed_data: StreamedData) -> None:
+        self._failed_runs.clear()
+
+        # runs of the previous exports of a watch are counted as well
+        total = None if streamed_data.total_runs is None else self._completed + streamed_data.total_runs
+
+        with ThreadPoolExecutor(max_workers=self.config.workers) as executor:
+            runs = ((mlflow_run, None) for mlflow_run in streamed_data.mlflow_runs)
+            self._export_runs(executor, runs, streamed_data, total=total)
+
+            # failed runs are retried after all other ones, which gives an overloaded backend time to recover
+            for attempt in range(1, self.config.run_retries + 1):
+                if not self._failed_runs:
+                    break
+
+                failed_runs = list(self._failed_runs)
+                self._failed_runs.clear()
+
+                if any(is_throttling_error(error) for _, error, _ in failed_runs):
+                    time.sleep(RUN_RETRY_BACKOFF * 2 ** (attempt - 1))
+
+                click.echo(f"Retrying {len(failed_runs)} failed runs, attempt {attempt} of {self.config.run_retries}")
+                runs = ((mlflow_run, checkpoint) for mlflow_run, _, checkpoint in failed_runs)
+                self._export_runs(executor, runs, streamed_data, retry=True)
+
+        if self._failed_runs:
+            self.instrumentation.increment("runs_failed", len(self._failed_runs))
+            click.echo(f"{len(self._failed_runs)} runs could not be exported")
+
+    def _export_runs(
+        self,
+        executor: ThreadPoolExecutor,
+        runs: Iterable[Tuple[MlflowRun, Optional[RunCheckpoint]]],
+        streamed_data: StreamedData,
+        total: Optional[int] = None,
+        retry: bool = False,
+    ) -> None:
+        # Keep a bounded window of in-flight runs and report them in submission order,
+        # so the output does not depend on which worker finishes first.
+        max_pending = 2 * self.config.workers
+        pending: Deque[Future] = deque()
+
+        for mlflow_run, checkpoint in runs:
+            checkpoint = checkpoint or RunCheckpoint(self.journal, mlflow_run.info.run_id)
+            pending.append(
+                executor.submit(
+                    self._try_export_run,
+                    mlflow_run,
+                    checkpoint,
+                    streamed_data.mlflow_experiments,
+                    streamed_data.neptune_run_ids,
+                )
+            )
+
+            if len(pending) >= max_pending:
+                self._report(pending.popleft(), total, retry=retry)
+
+        # runs which could not be counted up front are all known once they were fetched
+        if total is None:
+            total = self._completed + len(pending)
+        while pending:
+            self._report(pending.popleft(), total, retry=retry)
+
+    def _report(self, future: Future, total: Optional[int] = None, retry: bool = False) -> None:
+        for message in future.result():
+            click.echo(message)
+
+        # retried runs were already counted by their first attempt
+        if not retry:
+            self._completed += 1
+            self.progress.update(self._completed, total)
+
+    def _try_export_run(
+        self,
+        mlflow_run: MlflowRun,
+        checkpoint: RunCheckpoint,
+        mlflow_experiments: MutableMapping[str, Experiment],
+        neptune_run_ids: Set[str],
+    ) -> List[str]:
+        try:
+            return self._export_run(mlflow_run, checkpoint, mlflow_experiments, neptune_run_ids)
+        except Exception as e:
+            # e.g. the Neptune run could not be opened
+            self._failed_runs.append((mlflow_run, e, checkpoint))
+            return [f"Error exporting run '{mlflow_run.info.run_name}': {e}"]
+
+    def _open_neptune_run(self, mlflow_run: MlflowRun) -> NeptuneRun:
+        # opening a run creates or fetches it in Neptune, which is throttled when many runs are opened at once
+        return self.neptune_scheduler.call(
+            NeptuneRun,
+            project=self.config.project_name,
+            api_token=self.config.api_token,
+            custom_run_id=mlflow_run.info.run_id,
+            capture_hardware_metrics=False,
+        )
+
+    def _export_run(
+        self,
+        mlflow_run: MlflowRun,
+        checkpoint: RunCheckpoint,
+        mlflow_experiments: MutableMapping[str, Experiment],
+        neptune_run_ids: Set[str],
+    ) -> List[str]:
+        if checkpoint.is_run_completed():
+            if self.config.incremental:
+                return self._update_run(mlflow_run, checkpoint)
+            self.instrumentation.increment("runs_skipped")
+            return [f"Ignoring mlflow_run '{mlflow_run.info.run_name}' since it was already exported"]
+
+        resuming = checkpoint.is_run_started()
+
+        if not resuming and mlflow_run.info.run_id in neptune_run_ids:
+            if self.config.incremental:
+                return self._update_run(mlflow_run, checkpoint)
+            self.instrumentation.increment("runs_skipped")
+            return [f"Ignoring mlflow_run '{mlflow_run.info.run_name}' since it already exists"]
+
+        if resuming:
+            messages = [f"Resuming mlflow_run '{mlflow_run.info.run_name}'"]
+        else:
+            messages = [f"Loading mlflow_run '{mlflow_run.info.run_name}'"]
+
+        checkpoint.start_run()
+
+        # the phase also covers the final synchronization with Neptune when the run is closed
+        with self.instrumentation.phase("run"), self._open_neptune_run(mlflow_run) as neptune_run:
+            try:
+                if not checkpoint.is_completed(EXPERIMENT_STAGE):
+                    experiment = mlflow_experiments[mlflow_run.info.experiment_id]
                     self.exporter.export_experiment_metadata(neptune_run, experiment)
+                    checkpoint.complete(EXPERIMENT_STAGE)
 
-                    self.exporter.export_run_info(neptune_run, mlflow_run)
-                    self.exporter.export_run_data(neptune_run, mlflow_run)
+                if not checkpoint.is_completed(RUN_INFO_STAGE):
+                    with self.instrumentation.phase("run_info"):
+                        self.exporter.export_run_info(neptune_run, mlflow_run)
+                    checkpoint.complete(RUN_INFO_STAGE)
+
+                with self.instrumentation.phase("run_data"):
+                    self.exporter.export_run_data(neptune_run, mlflow_run, checkpoint)
+                with self.instrumentation.phase("neptune_sync"):
+                    checkpoint.commit(neptune_run)
 
-                    if not self.config.exclude_artifacts:
+                if not self.config.exclude_artifacts:
+                    with self.instrumentation.phase("artifacts"):
                         self.exporter.export_artifacts(
-                            neptune_run, mlflow_run, self.config.max_artifact_size, self.config.mlflow_tracking_uri
+                            neptune_run,
+                            mlflow_run,
+                            self.config.max_artifact_size,
+                            self.config.mlflow_tracking_uri,
+                            checkpoint,
                         )
 
-                    click.echo(f"Run '{mlflow_run.info.run_name}' was saved")
-                except Exception as e:
-                    click.echo(f"Error exporting run '{mlflow_run.info.run_name}': {e}")
+                with self.instrumentation.phase("neptune_sync"):
+                    checkpoint.complete_run(neptune_run)
+
+                self.instrumentation.increment("runs_exported")
+                messages.append(f"Run '{mlflow_run.info.run_name}' was saved")
+            except Exception as e:
+                self._failed_runs.append((mlflow_run, e, checkpoint))
+                messages.append(f"Error exporting run '{mlflow_run.info.run_name}': {e}")
+
+        return messages
+
+    def _update_run(self, mlflow_run: MlflowRun, checkpoint: RunCheckpoint) -> List[str]:
+        messages = [f"Updating mlflow_run '{mlflow_run.info.run_name}'"]
+
+        with self.instrumentation.phase("run"), self._open_neptune_run(mlflow_run) as neptune_run:
+            try:
+                # refreshes the status and the end time of runs that were still running
+                with self.instrumentation.phase("run_info"):
+                    self.exporter.export_run_info(neptune_run, mlflow_run)
+                with self.instrumentation.phase("run_data"):
+                    self.exporter.sync_run_data(neptune_run, mlflow_run, checkpoint)
+                with self.instrumentation.phase("neptune_sync"):
+                    checkpoint.commit(neptune_run)
+
+                self.instrumentation.increment("runs_updated")
+                messages.append(f"Run '{mlflow_run.info.run_name}' was updated")
+            except Exception as e:
+                self._failed_runs.append((mlflow_run, e, checkpoint))
+                messages.append(f"Error updating run '{mlflow_run.info.run_name}': {e}")
+
+        return messages
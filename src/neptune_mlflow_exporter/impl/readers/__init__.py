@@ -0,0 +1,58 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = [
+    "MlflowStoreReader",
+    "FileStoreReader",
+    "SnapshotReader",
+    "get_store_reader",
+]
+
+import os
+from importlib.util import find_spec
+from typing import Optional
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import mlflow
+
+from neptune_mlflow_exporter.impl.readers.base import MlflowStoreReader
+from neptune_mlflow_exporter.impl.readers.file_store import FileStoreReader
+from neptune_mlflow_exporter.impl.readers.snapshot import SnapshotReader
+
+DATABASE_SCHEMES = ("sqlite", "postgresql", "mysql", "mssql")
+
+
+def get_store_reader(tracking_uri: Optional[str]) -> Optional[MlflowStoreReader]:
+    """Returns a reader accessing the tracking store directly, if one is available for the given URI."""
+    if tracking_uri is None:
+        tracking_uri = mlflow.get_tracking_uri()
+
+    parsed = urlparse(tracking_uri)
+
+    # a single letter scheme is a Windows drive
+    if parsed.scheme == "file" or len(parsed.scheme) <= 1:
+        path = url2pathname(parsed.path) if parsed.scheme == "file" else tracking_uri
+        if os.path.isdir(path):
+            return FileStoreReader(path)
+
+    # e.g. postgresql+psycopg2://
+    if parsed.scheme.split("+")[0] in DATABASE_SCHEMES and find_spec("sqlalchemy"):
+        from neptune_mlflow_exporter.impl.readers.sql_store import SqlStoreReader
+
+        return SqlStoreReader(tracking_uri)
+
+    return None
@@ -0,0 +1,110 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = [
+    "EXPERIMENT_FIELDS",
+    "MlflowStoreReader",
+    "build_experiment",
+]
+
+import inspect
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from mlflow.entities import (
+    Experiment,
+    ExperimentTag,
+)
+from mlflow.entities import Run as MlflowRun
+
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+
+# fields taken by the constructor of experiments, which differ between MLflow versions
+EXPERIMENT_FIELDS = tuple(name for name in inspect.signature(Experiment).parameters if name != "tags")
+
+
+def build_experiment(fields: Mapping[str, Any], tags: Iterable[ExperimentTag]) -> Experiment:
+    """Builds an experiment from the fields of a stored one, ignoring the ones this MLflow version does not know."""
+    arguments = {name: fields[name] for name in EXPERIMENT_FIELDS if name in fields}
+    arguments["experiment_id"] = str(arguments["experiment_id"])
+    return Experiment(tags=list(tags), **arguments)
+
+
+class MlflowStoreReader(ABC):
+    """Reads experiments, runs and metric histories straight from an MLflow tracking store, bypassing `MlflowClient`.
+
+    Readers replace the paginated client calls used by `Fetcher` and `MetricHistoryFetcher` with bulk reads.
+    Runs returned by a reader carry the keys of their metrics, but the latest values are not guaranteed to match
+    the ones reported by MLflow, as the exporter only needs the keys.
+    """
+
+    @abstractmethod
+    def get_experiments(self, updated_since: Optional[int] = None) -> MutableMapping[str, Experiment]:
+        """Returns the active experiments by their ids, only the ones updated since `updated_since` if given.
+
+        The time is in milliseconds, like the `last_update_time` of experiments.
+        """
+        ...
+
+    @abstractmethod
+    def iter_runs(self, experiment_ids: List[str], selection: Optional[RunSelection] = None) -> Iterator[MlflowRun]:
+        """Yields the runs of the given experiments, of all lifecycle stages unless a selection is given.
+
+        Readers apply the lifecycle stage and the start time window of the selection, but not its filter string,
+        which only MLflow can evaluate.
+        """
+        ...
+
+    def count_runs(self, experiment_ids: List[str], selection: Optional[RunSelection] = None) -> int:
+        """Counts the runs `iter_runs` yields, without the limit of the selection.
+
+        Readers which can count runs without reading them override it.
+        """
+        return sum(1 for _ in self.iter_runs(experiment_ids, selection))
+
+    @abstractmethod
+    def get_metric_series(self, mlflow_run: MlflowRun, key: str) -> MetricSeries:
+        ...
+
+    def iter_metric_series(self, mlflow_run: MlflowRun, keys: Sequence[str]) -> Iterator[Tuple[str, MetricSeries]]:
+        for key in keys:
+            yield key, self.get_metric_series(mlflow_run, key)
+
+    def iter_metric_pages(
+        self, mlflow_run: MlflowRun, keys: Sequence[str], page_size: int
+    ) -> Iterator[Tuple[str, MetricSeries]]:
+        """Yields the histories of the keys in pages of at most `page_size` points, in the order of the keys.
+
+        Readers which cannot page a history yield it as a single page.
+        """
+        yield from self.iter_metric_series(mlflow_run, keys)
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,233 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["FileStoreReader"]
+
+import os
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import yaml
+from mlflow.entities import (
+    Experiment,
+    ExperimentTag,
+    LifecycleStage,
+    Metric,
+    Param,
+)
+from mlflow.entities import Run as MlflowRun
+from mlflow.entities import (
+    RunData,
+    RunInfo,
+    RunStatus,
+    RunTag,
+)
+
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
+from neptune_mlflow_exporter.impl.readers.base import (
+    MlflowStoreReader,
+    build_experiment,
+)
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+
+META_DATA_FILE_NAME = "meta.yaml"
+METRICS_FOLDER_NAME = "metrics"
+PARAMS_FOLDER_NAME = "params"
+TAGS_FOLDER_NAME = "tags"
+RUN_NAME_TAG = "mlflow.runName"
+
+READ_BUFFER_SIZE = 1024 * 1024
+TAIL_SIZE = 4096
+
+
+class FileStoreReader(MlflowStoreReader):
+    """Reads the `mlruns` directory layout of MLflow's FileStore directly from disk.
+
+    Metric files are parsed line by line through a large read buffer into the compact arrays of `MetricSeries`,
+    without creating an `mlflow.entities.Metric` per point. Params and tags of a run are read in one pass
+    over its directories.
+    """
+
+    def __init__(self, root_directory: str):
+        self.root_directory = os.path.abspath(root_directory)
+
+    def get_experiments(self, updated_since: Optional[int] = None) -> MutableMapping[str, Experiment]:
+        experiments = {}
+
+        for name in sorted(os.listdir(self.root_directory)):
+            meta = _read_yaml(os.path.join(self.root_directory, name, META_DATA_FILE_NAME))
+            if meta is None or meta.get("lifecycle_stage") != LifecycleStage.ACTIVE:
+                continue
+            if updated_since is not None and (meta.get("last_update_time") or 0) < updated_since:
+                continue
+
+            tags = _read_values(os.path.join(self.root_directory, name, TAGS_FOLDER_NAME))
+            experiment = build_experiment(meta, [ExperimentTag(key, value) for key, value in tags.items()])
+            experiments[experiment.experiment_id] = experiment
+
+        return experiments
+
+    def iter_runs(self, experiment_ids: List[str], selection: Optional[RunSelection] = None) -> Iterator[MlflowRun]:
+        for experiment_id in experiment_ids:
+            run_metas = self._read_run_metas(experiment_id, selection)
+
+            # the same order as returned by `search_runs`
+            run_metas.sort(key=lambda item: (-(item[1].get("start_time") or 0), item[1].get("run_id") or ""))
+
+            for run_directory, meta in run_metas:
+                yield self._build_run(run_directory, meta)
+
+    def count_runs(self, experiment_ids: List[str], selection: Optional[RunSelection] = None) -> int:
+        return sum(len(self._read_run_metas(experiment_id, selection)) for experiment_id in experiment_ids)
+
+    def _read_run_metas(self, experiment_id: str, selection: Optional[RunSelection]) -> List[Tuple[str, dict]]:
+        experiment_directory = os.path.join(self.root_directory, experiment_id)
+        if not os.path.isdir(experiment_directory):
+            return []
+
+        run_metas = []
+        for name in os.listdir(experiment_directory):
+            meta = _read_yaml(os.path.join(experiment_directory, name, META_DATA_FILE_NAME))
+            # runs which are not selected are skipped before their params, tags and metrics are read
+            if meta is not None and (selection is None or _selects_run(selection, meta)):
+                run_metas.append((os.path.join(experiment_directory, name), meta))
+
+        return run_metas
+
+    def get_metric_series(self, mlflow_run: MlflowRun, key: str) -> MetricSeries:
+        for series in self._iter_metric_file(mlflow_run, key, page_size=None):
+            return series
+
+    def iter_metric_pages(
+        self, mlflow_run: MlflowRun, keys: Sequence[str], page_size: int
+    ) -> Iterator[Tuple[str, MetricSeries]]:
+        for key in keys:
+            for series in self._iter_metric_file(mlflow_run, key, page_size):
+                yield key, series
+
+    def _iter_metric_file(self, mlflow_run: MlflowRun, key: str, page_size: Optional[int]) -> Iterator[MetricSeries]:
+        """Yields the points of a metric file in pages, or as a single series if `page_size` is None.
+
+        At least one, possibly empty, series is yielded.
+        """
+        series = MetricSeries()
+        run_directory = os.path.join(self.root_directory, mlflow_run.info.experiment_id, mlflow_run.info.run_id)
+        path = os.path.join(run_directory, METRICS_FOLDER_NAME, *key.split("/"))
+        pages = 0
+
+        with open(path, "rb", buffering=READ_BUFFER_SIZE) as file:
+            for line in file:
+                parts = line.split()
+                if not parts:
+                    continue
+                # files written by old MLflow versions have no step column
+                step = int(parts[2]) if len(parts) > 2 else 0
+                series.append(float(parts[1]), int(parts[0]), step)
+
+                if page_size is not None and len(series) >= page_size:
+                    yield series
+                    series, pages = MetricSeries(), pages + 1
+
+        if series or not pages:
+            yield series
+
+    def _build_run(self, run_directory: str, meta: dict) -> MlflowRun:
+        tags = _read_values(os.path.join(run_directory, TAGS_FOLDER_NAME))
+        params = _read_values(os.path.join(run_directory, PARAMS_FOLDER_NAME))
+        latest_metrics = _read_latest_metrics(os.path.join(run_directory, METRICS_FOLDER_NAME))
+
+        info = dict(meta)
+        info["experiment_id"] = str(info["experiment_id"])
+        if isinstance(info.get("status"), int):
+            info["status"] = RunStatus.to_string(info["status"])
+        info.setdefault("run_id", info.get("run_uuid"))
+        info.setdefault("run_uuid", info.get("run_id"))
+        if not info.get("run_name"):
+            info["run_name"] = tags.get(RUN_NAME_TAG)
+
+        return MlflowRun(
+            run_info=RunInfo.from_dictionary(info),
+            run_data=RunData(
+                metrics=latest_metrics,
+                params=[Param(key, value) for key, value in params.items()],
+                tags=[RunTag(key, value) for key, value in tags.items()],
+            ),
+        )
+
+
+def _read_yaml(path: str) -> Optional[dict]:
+    if not os.path.isfile(path):
+        return None
+
+    with open(path) as file:
+        return yaml.safe_load(file)
+
+
+def _walk_files(directory: str) -> Iterator[str]:
+    """Yields paths of the files relative to the directory. Keys containing '/' are stored in subdirectories."""
+    if not os.path.isdir(directory):
+        return
+
+    for current, _, files in os.walk(directory):
+        for name in files:
+            yield os.path.relpath(os.path.join(current, name), directory).replace(os.sep, "/")
+
+
+def _read_values(directory: str) -> Dict[str, str]:
+    values = {}
+    for key in _walk_files(directory):
+        with open(os.path.join(directory, key)) as file:
+            values[key] = file.read()
+    return values
+
+
+def _read_latest_metrics(directory: str) -> List[Metric]:
+    # only the last line of every file is read, which is enough to know which metrics were logged
+    metrics = []
+    for key in _walk_files(directory):
+        line = _read_last_line(os.path.join(directory, key))
+        if line is None:
+            continue
+
+        parts = line.split()
+        step = int(parts[2]) if len(parts) > 2 else 0
+        metrics.append(Metric(key, float(parts[1]), int(parts[0]), step))
+    return metrics
+
+
+def _read_last_line(path: str) -> Optional[bytes]:
+    with open(path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(max(0, size - TAIL_SIZE))
+        lines = [line for line in file.read().splitlines() if line.strip()]
+
+    return lines[-1] if lines else None
+
+
+def _selects_run(selection: RunSelection, meta: dict) -> bool:
+    status = meta.get("status")
+    if isinstance(status, int):
+        status = RunStatus.to_string(status)
+
+    return selection.selects_run(meta.get("lifecycle_stage"), meta.get("start_time"), meta.get("end_time"), status)
@@ -0,0 +1,239 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["SnapshotReader"]
+
+import json
+import mmap
+import os
+import sys
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from mlflow.entities import (
+    Experiment,
+    ExperimentTag,
+    FileInfo,
+    Metric,
+    Param,
+)
+from mlflow.entities import Run as MlflowRun
+from mlflow.entities import (
+    RunData,
+    RunInfo,
+    RunTag,
+)
+
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
+from neptune_mlflow_exporter.impl.readers.base import (
+    MlflowStoreReader,
+    build_experiment,
+)
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_FILE_NAME = "snapshot.json"
+EXPERIMENTS_FOLDER_NAME = "experiments"
+RUN_FILE_NAME = "run.json"
+# columns of all metric histories of a run, one key after another
+VALUES_FILE_NAME = "values.f64"
+TIMESTAMPS_FILE_NAME = "timestamps.i64"
+STEPS_FILE_NAME = "steps.i64"
+
+_ITEM_SIZE = 8
+
+
+class SnapshotReader(MlflowStoreReader):
+    """Reads a snapshot of MLflow experiments and runs taken with `SnapshotWriter`.
+
+    A snapshot is partitioned by experiment, with a directory per run. Metric histories of a run are stored
+    as three binary columns of native 8-byte values, which are memory-mapped and sliced page by page.
+    Artifacts are not copied, the snapshot only holds a manifest of them, served by `list_artifacts`
+    in place of `MlflowClient.list_artifacts`, and they are downloaded from the artifact store on export.
+    """
+
+    def __init__(self, root_directory: str):
+        self.root_directory = os.path.abspath(root_directory)
+
+        with open(os.path.join(self.root_directory, SNAPSHOT_FILE_NAME)) as snapshot_file:
+            self._snapshot = json.load(snapshot_file)
+
+        if self._snapshot.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format '{self._snapshot.get('format')}' in {self.root_directory}")
+
+        if self._snapshot.get("byteorder") != sys.byteorder:
+            raise ValueError(f"Snapshot in {self.root_directory} was taken on a machine with a different byte order")
+
+        # artifacts are listed by run id only, so the runs are indexed up front
+        self._run_directories = _index_run_directories(os.path.join(self.root_directory, EXPERIMENTS_FOLDER_NAME))
+
+    def get_experiments(self, updated_since: Optional[int] = None) -> MutableMapping[str, Experiment]:
+        experiments = {}
+
+        for fields in self._snapshot["experiments"]:
+            if updated_since is not None and (fields.get("last_update_time") or 0) < updated_since:
+                continue
+            tags = fields.get("tags", {})
+            experiment = build_experiment(fields, [ExperimentTag(key, value) for key, value in tags.items()])
+            experiments[experiment.experiment_id] = experiment
+
+        return experiments
+
+    def iter_runs(self, experiment_ids: List[str], selection: Optional[RunSelection] = None) -> Iterator[MlflowRun]:
+        for experiment_id in experiment_ids:
+            experiment_directory = os.path.join(self.root_directory, EXPERIMENTS_FOLDER_NAME, experiment_id)
+            if not os.path.isdir(experiment_directory):
+                continue
+
+            runs = []
+            for name in os.listdir(experiment_directory):
+                run = _read_json(os.path.join(experiment_directory, name, RUN_FILE_NAME))
+                # runs without the file were not completely written
+                if run is None:
+                    continue
+
+                info = run["info"]
+                if selection is None or selection.selects_run(
+                    info.get("lifecycle_stage"), info.get("start_time"), info.get("end_time"), info.get("status")
+                ):
+                    runs.append((os.path.join(experiment_directory, name), run))
+
+            # the same order as returned by `search_runs`
+            runs.sort(key=lambda item: (-(item[1]["info"].get("start_time") or 0), item[1]["info"]["run_id"]))
+
+            for _, run in runs:
+                yield _build_run(run)
+
+    def get_metric_series(self, mlflow_run: MlflowRun, key: str) -> MetricSeries:
+        for _, series in self.iter_metric_pages(mlflow_run, [key], page_size=None):
+            return series
+
+    def iter_metric_series(self, mlflow_run: MlflowRun, keys: Sequence[str]) -> Iterator[Tuple[str, MetricSeries]]:
+        yield from self.iter_metric_pages(mlflow_run, keys, page_size=None)
+
+    def iter_metric_pages(
+        self, mlflow_run: MlflowRun, keys: Sequence[str], page_size: Optional[int]
+    ) -> Iterator[Tuple[str, MetricSeries]]:
+        """Yields pages of the histories sliced from the memory-mapped columns, at least one per key."""
+        run_directory = self._get_run_directory(mlflow_run)
+        index = _read_json(os.path.join(run_directory, RUN_FILE_NAME))["metrics"]
+
+        with _MappedColumns(run_directory) as columns:
+            for key in keys:
+                start, length = index.get(key, (0, 0))
+                end = start + length
+                step = page_size or max(length, 1)
+
+                for page_start in range(start, max(end, start + 1), step):
+                    yield key, columns.read(page_start, min(page_start + step, end))
+
+    def list_artifacts(self, run_id: str, path: Optional[str] = None) -> List[FileInfo]:
+        """Lists the artifacts directly in `path` from the manifest, like `MlflowClient.list_artifacts`."""
+        run_directory = self._run_directories.get(run_id)
+        run = _read_json(os.path.join(run_directory, RUN_FILE_NAME)) if run_directory is not None else None
+        if run is None:
+            raise ValueError(f"Run '{run_id}' is not in the snapshot {self.root_directory}")
+
+        parent = path or ""
+
+        return [
+            FileInfo(artifact["path"], artifact["is_dir"], artifact["file_size"])
+            for artifact in run["artifacts"]
+            if os.path.dirname(artifact["path"]) == parent
+        ]
+
+    def _get_run_directory(self, mlflow_run: MlflowRun) -> str:
+        run_directory = self._run_directories.get(mlflow_run.info.run_id)
+        if run_directory is None:
+            experiment_id, run_id = mlflow_run.info.experiment_id, mlflow_run.info.run_id
+            run_directory = os.path.join(self.root_directory, EXPERIMENTS_FOLDER_NAME, experiment_id, run_id)
+        return run_directory
+
+
+class _MappedColumns:
+    """Memory maps of the metric columns of a run, which are only read into memory page by page."""
+
+    def __init__(self, run_directory: str):
+        self._files = []
+        self._maps = []
+
+        for name in (VALUES_FILE_NAME, TIMESTAMPS_FILE_NAME, STEPS_FILE_NAME):
+            file = open(os.path.join(run_directory, name), "rb")
+            self._files.append(file)
+            # empty files cannot be mapped
+            size = os.fstat(file.fileno()).st_size
+            self._maps.append(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b"")
+
+    def __enter__(self) -> "_MappedColumns":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        for column in self._maps:
+            if isinstance(column, mmap.mmap):
+                column.close()
+        for file in self._files:
+            file.close()
+
+    def read(self, start: int, end: int) -> MetricSeries:
+        series = MetricSeries()
+        values, timestamps, steps = self._maps
+        series.values.frombytes(values[start * _ITEM_SIZE : end * _ITEM_SIZE])
+        series.timestamps.frombytes(timestamps[start * _ITEM_SIZE : end * _ITEM_SIZE])
+        series.steps.frombytes(steps[start * _ITEM_SIZE : end * _ITEM_SIZE])
+        return series
+
+
+def _index_run_directories(experiments_directory: str) -> Dict[str, str]:
+    """Maps the ids of the runs in the snapshot to their directories, which are named after them."""
+    run_directories = {}
+    if not os.path.isdir(experiments_directory):
+        return run_directories
+
+    for experiment_entry in os.scandir(experiments_directory):
+        if experiment_entry.is_dir():
+            for run_entry in os.scandir(experiment_entry.path):
+                if run_entry.is_dir():
+                    run_directories[run_entry.name] = run_entry.path
+
+    return run_directories
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _build_run(run: Dict[str, Any]) -> MlflowRun:
+    # the latest values are kept for completeness, only the keys matter for the export
+    return MlflowRun(
+        run_info=RunInfo.from_dictionary(run["info"]),
+        run_data=RunData(
+            metrics=[Metric(key, value, 0, 0) for key, value in run["latest_metrics"].items()],
+            params=[Param(key, value) for key, value in run["params"].items()],
+            tags=[RunTag(key, value) for key, value in run["tags"].items()],
+        ),
+    )
@@ -0,0 +1,317 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["SqlStoreReader"]
+
+import math
+from collections import defaultdict
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import sqlalchemy
+from mlflow.entities import (
+    Experiment,
+    ExperimentTag,
+    LifecycleStage,
+    Metric,
+    Param,
+)
+from mlflow.entities import Run as MlflowRun
+from mlflow.entities import (
+    RunData,
+    RunInfo,
+    RunStatus,
+    RunTag,
+)
+from sqlalchemy import (
+    column,
+    select,
+    table,
+)
+
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
+from neptune_mlflow_exporter.impl.readers.base import (
+    MlflowStoreReader,
+    build_experiment,
+)
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+
+RUNS_PAGE_SIZE = 500
+METRICS_PAGE_SIZE = 10000
+
+# Lightweight descriptions of the MLflow schema, so that identifiers like `key` are quoted for every dialect.
+_EXPERIMENTS = table("experiments")
+_EXPERIMENT_TAGS = table("experiment_tags", column("key"), column("value"), column("experiment_id"))
+_RUNS = table(
+    "runs",
+    column("run_uuid"),
+    column("name"),
+    column("experiment_id"),
+    column("user_id"),
+    column("status"),
+    column("start_time"),
+    column("end_time"),
+    column("lifecycle_stage"),
+    column("artifact_uri"),
+)
+_PARAMS = table("params", column("run_uuid"), column("key"), column("value"))
+_TAGS = table("tags", column("run_uuid"), column("key"), column("value"))
+# runs without a start time are sorted last, and compared by a value, so that the runs can be paged by it
+_START_TIME = sqlalchemy.func.coalesce(_RUNS.c.start_time, -1)
+
+
+def _metric_table(name: str) -> sqlalchemy.sql.expression.TableClause:
+    return table(
+        name, column("run_uuid"), column("key"), column("value"), column("timestamp"), column("step"), column("is_nan")
+    )
+
+
+def _after_run(row: tuple) -> sqlalchemy.sql.expression.ColumnElement:
+    """Selects the runs sorted after the given one, so that each page of runs is read with a separate query."""
+    run_id, experiment_id, start_time = row[0], row[2], -1 if row[5] is None else row[5]
+    return sqlalchemy.or_(
+        _RUNS.c.experiment_id > experiment_id,
+        sqlalchemy.and_(_RUNS.c.experiment_id == experiment_id, _START_TIME < start_time),
+        sqlalchemy.and_(_RUNS.c.experiment_id == experiment_id, _START_TIME == start_time, _RUNS.c.run_uuid > run_id),
+    )
+
+
+def _select_runs(
+    query: sqlalchemy.sql.expression.Select, experiment_ids: List[str], selection: Optional[RunSelection]
+) -> sqlalchemy.sql.expression.Select:
+    """Adds the criteria of the selection to a query of runs, all but the filter string and the limit."""
+    query = query.where(_RUNS.c.experiment_id.in_([int(experiment_id) for experiment_id in experiment_ids]))
+    if selection is None:
+        return query
+
+    if selection.lifecycle_stage != "all":
+        query = query.where(_RUNS.c.lifecycle_stage == selection.lifecycle_stage)
+
+    start, end = selection.start_time_range
+    if start is not None:
+        query = query.where(_RUNS.c.start_time >= start)
+    if end is not None:
+        query = query.where(_RUNS.c.start_time < end)
+
+    since = selection.changed_since_millis
+    if since is not None:
+        query = query.where(
+            sqlalchemy.or_(
+                _RUNS.c.start_time >= since,
+                _RUNS.c.end_time >= since,
+                _RUNS.c.status == RunStatus.to_string(RunStatus.RUNNING),
+            )
+        )
+
+    return query
+
+
+_METRICS = _metric_table("metrics")
+_LATEST_METRICS = _metric_table("latest_metrics")
+
+
+class SqlStoreReader(MlflowStoreReader):
+    """Reads MLflow's SQLAlchemy store schema directly with set-based queries.
+
+    Runs are read in pages with keyset queries, each on a short-lived connection, and the params, tags and metric
+    keys are loaded for a whole page of runs at once, so no connection is held while the runs are exported.
+    All metric histories of a run are read with a single streamed query.
+    """
+
+    def __init__(self, db_uri: str):
+        self._engine = sqlalchemy.create_engine(db_uri)
+
+    def close(self) -> None:
+        self._engine.dispose()
+
+    def get_experiments(self, updated_since: Optional[int] = None) -> MutableMapping[str, Experiment]:
+        # columns differ between schema versions, so all of them are read
+        query = select(sqlalchemy.literal_column("*")).select_from(_EXPERIMENTS)
+        tags_query = select(*_EXPERIMENT_TAGS.c)
+        if updated_since is not None:
+            query = query.where(column("last_update_time") >= updated_since)
+
+        with self._engine.connect() as connection:
+            result = connection.execute(query)
+            columns = list(result.keys())
+            rows = [dict(zip(columns, row)) for row in result]
+
+            if updated_since is not None:
+                experiment_ids = [row["experiment_id"] for row in rows]
+                tags_query = tags_query.where(_EXPERIMENT_TAGS.c.experiment_id.in_(experiment_ids))
+            tags: Dict[str, List[ExperimentTag]] = defaultdict(list)
+            for key, value, experiment_id in connection.execute(tags_query):
+                tags[str(experiment_id)].append(ExperimentTag(key, value))
+
+        experiments = {}
+        for row in sorted(rows, key=lambda item: item["experiment_id"]):
+            if row["lifecycle_stage"] != LifecycleStage.ACTIVE:
+                continue
+
+            experiment_id = str(row["experiment_id"])
+            experiments[experiment_id] = build_experiment(row, tags[experiment_id])
+
+        return experiments
+
+    def iter_runs(self, experiment_ids: List[str], selection: Optional[RunSelection] = None) -> Iterator[MlflowRun]:
+        query = _select_runs(select(*_RUNS.c), experiment_ids, selection).order_by(
+            _RUNS.c.experiment_id, _START_TIME.desc(), _RUNS.c.run_uuid
+        )
+        max_runs = selection.max_runs if selection is not None else None
+
+        fetched, last_row = 0, None
+        while max_runs is None or fetched < max_runs:
+            page_size = RUNS_PAGE_SIZE if max_runs is None else min(RUNS_PAGE_SIZE, max_runs - fetched)
+            page_query = query if last_row is None else query.where(_after_run(last_row))
+
+            # a connection is held only while a page is read, not while its runs are being exported
+            with self._engine.connect() as connection:
+                rows = connection.execute(page_query.limit(page_size)).fetchall()
+                runs = list(self._build_runs(connection, rows))
+
+            yield from runs
+
+            if len(rows) < page_size:
+                break
+            fetched, last_row = fetched + len(rows), rows[-1]
+
+    def count_runs(self, experiment_ids: List[str], selection: Optional[RunSelection] = None) -> int:
+        query = _select_runs(select(sqlalchemy.func.count()).select_from(_RUNS), experiment_ids, selection)
+        with self._engine.connect() as connection:
+            return connection.execute(query).scalar()
+
+    @staticmethod
+    def _build_runs(connection, rows: Sequence[tuple]) -> Iterator[MlflowRun]:
+        if not rows:
+            return
+
+        run_ids = [row[0] for row in rows]
+        params = _load_key_values(connection, _PARAMS, run_ids)
+        tags = _load_key_values(connection, _TAGS, run_ids)
+        metrics = _load_latest_metrics(connection, run_ids)
+
+        for run_id, name, experiment_id, user_id, status, start_time, end_time, lifecycle_stage, artifact_uri in rows:
+            yield MlflowRun(
+                run_info=RunInfo.from_dictionary(
+                    {
+                        "run_uuid": run_id,
+                        "run_id": run_id,
+                        "run_name": name,
+                        "experiment_id": str(experiment_id),
+                        "user_id": user_id,
+                        "status": status,
+                        "start_time": start_time,
+                        "end_time": end_time,
+                        "lifecycle_stage": lifecycle_stage,
+                        "artifact_uri": artifact_uri,
+                    }
+                ),
+                run_data=RunData(
+                    metrics=metrics[run_id],
+                    params=[Param(key, value) for key, value in params[run_id]],
+                    tags=[RunTag(key, value) for key, value in tags[run_id]],
+                ),
+            )
+
+    def get_metric_series(self, mlflow_run: MlflowRun, key: str) -> MetricSeries:
+        for _, series in self.iter_metric_series(mlflow_run, [key]):
+            return series
+
+    def iter_metric_series(self, mlflow_run: MlflowRun, keys: Sequence[str]) -> Iterator[Tuple[str, MetricSeries]]:
+        yield from self._iter_metric_rows(mlflow_run, keys, page_size=None)
+
+    def iter_metric_pages(
+        self, mlflow_run: MlflowRun, keys: Sequence[str], page_size: int
+    ) -> Iterator[Tuple[str, MetricSeries]]:
+        yield from self._iter_metric_rows(mlflow_run, keys, page_size)
+
+    def _iter_metric_rows(
+        self, mlflow_run: MlflowRun, keys: Sequence[str], page_size: Optional[int]
+    ) -> Iterator[Tuple[str, MetricSeries]]:
+        """Reads the histories of all keys with a single query.
+
+        Rows are sorted by key, so each history, or each page of it if `page_size` is given,
+        is yielded as soon as it is complete and only one of them is kept in memory at a time.
+        """
+        if not keys:
+            return
+
+        query = (
+            select(_METRICS.c.key, _METRICS.c.value, _METRICS.c.timestamp, _METRICS.c.step, _METRICS.c.is_nan)
+            .where(_METRICS.c.run_uuid == mlflow_run.info.run_id)
+            .where(_METRICS.c.key.in_(list(keys)))
+            .order_by(_METRICS.c.key, _METRICS.c.step, _METRICS.c.timestamp)
+        )
+
+        remaining = set(keys)
+        current_key, series = None, MetricSeries()
+
+        with self._engine.connect() as connection:
+            result = connection.execution_options(stream_results=True).execute(query)
+
+            while True:
+                rows = result.fetchmany(METRICS_PAGE_SIZE)
+                if not rows:
+                    break
+
+                for key, value, timestamp, step, is_nan in rows:
+                    if key != current_key:
+                        if series:
+                            yield current_key, series
+                        remaining.discard(key)
+                        current_key, series = key, MetricSeries()
+
+                    series.append(math.nan if is_nan else value, timestamp, step)
+
+                    if page_size is not None and len(series) >= page_size:
+                        yield current_key, series
+                        series = MetricSeries()
+
+        if series:
+            yield current_key, series
+
+        for key in keys:
+            if key in remaining:
+                yield key, MetricSeries()
+
+
+def _load_key_values(
+    connection, source: sqlalchemy.sql.expression.TableClause, run_ids: List[str]
+) -> Dict[str, List[Tuple[str, str]]]:
+    values: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+    query = select(source.c.run_uuid, source.c.key, source.c.value).where(source.c.run_uuid.in_(run_ids))
+
+    for run_id, key, value in connection.execute(query):
+        values[run_id].append((key, value))
+
+    return values
+
+
+def _load_latest_metrics(connection, run_ids: List[str]) -> Dict[str, List[Metric]]:
+    metrics: Dict[str, List[Metric]] = defaultdict(list)
+    query = select(*_LATEST_METRICS.c).where(_LATEST_METRICS.c.run_uuid.in_(run_ids))
+
+    for run_id, key, value, timestamp, step, is_nan in connection.execute(query):
+        metrics[run_id].append(Metric(key, math.nan if is_nan else value, timestamp, step))
+
+    return metrics
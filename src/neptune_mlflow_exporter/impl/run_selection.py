@@ -0,0 +1,165 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = [
+    "RunSelection",
+    "LIFECYCLE_STAGES",
+]
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from mlflow.entities import (
+    Experiment,
+    LifecycleStage,
+    RunStatus,
+    ViewType,
+)
+
+LIFECYCLE_STAGES = {
+    "active": ViewType.ACTIVE_ONLY,
+    "deleted": ViewType.DELETED_ONLY,
+    "all": ViewType.ALL,
+}
+
+
+@dataclass(frozen=True)
+class RunSelection:
+    """Selects the experiments and runs to export, so that the other ones are never fetched.
+
+    Experiments can be selected by their names or ids, all active experiments by default.
+    Runs are selected by an MLflow search `filter_string`, a window of their start time, their lifecycle stage
+    and a limit on their number. In watch mode, only runs changed since the previous poll are selected.
+    All criteria are passed to `search_experiments` and `search_runs`,
+    and store readers apply the ones they can evaluate in their queries.
+    """
+
+    experiment_names: Sequence[str] = ()
+    experiment_ids: Sequence[str] = ()
+    filter_string: Optional[str] = None
+    started_after: Optional[datetime] = None
+    started_before: Optional[datetime] = None
+    lifecycle_stage: str = "all"
+    # limits the fetched runs, also the ones skipped later as already exported
+    max_runs: Optional[int] = None
+    # runs started or ended since then, or still running
+    changed_since: Optional[datetime] = None
+
+    def __post_init__(self) -> None:
+        if self.lifecycle_stage not in LIFECYCLE_STAGES:
+            raise ValueError(
+                f"Unknown lifecycle stage '{self.lifecycle_stage}', use one of: {', '.join(LIFECYCLE_STAGES)}"
+            )
+
+        if self.max_runs is not None and (not isinstance(self.max_runs, int) or self.max_runs <= 0):
+            raise ValueError("Max runs must be a positive integer")
+
+        if self.started_after is not None and self.started_before is not None:
+            if self.started_after >= self.started_before:
+                raise ValueError("Start of the time window must be before its end")
+
+    @property
+    def selects_experiments(self) -> bool:
+        return bool(self.experiment_names or self.experiment_ids)
+
+    @property
+    def view_type(self) -> int:
+        return LIFECYCLE_STAGES[self.lifecycle_stage]
+
+    @property
+    def start_time_range(self) -> Tuple[Optional[int], Optional[int]]:
+        """Returns the window of the start time in milliseconds, as stored by MLflow, the end being exclusive."""
+        return _to_millis(self.started_after), _to_millis(self.started_before)
+
+    @property
+    def changed_since_millis(self) -> Optional[int]:
+        return _to_millis(self.changed_since)
+
+    def selects_experiment(self, experiment: Experiment) -> bool:
+        if not self.selects_experiments:
+            return experiment.lifecycle_stage == LifecycleStage.ACTIVE
+
+        return experiment.experiment_id in self.experiment_ids or experiment.name in self.experiment_names
+
+    def selects_run(
+        self,
+        lifecycle_stage: Optional[str],
+        start_time: Optional[int],
+        end_time: Optional[int] = None,
+        status: Optional[str] = None,
+    ) -> bool:
+        """Evaluates all criteria but the filter string, for readers which cannot push them into a query."""
+        if self.lifecycle_stage != "all" and lifecycle_stage != self.lifecycle_stage:
+            return False
+
+        start, end = self.start_time_range
+        if start is not None and (start_time is None or start_time < start):
+            return False
+        if end is not None and (start_time is None or start_time >= end):
+            return False
+
+        changed_since = self.changed_since_millis
+        if changed_since is not None:
+            return (
+                (start_time is not None and start_time >= changed_since)
+                or (end_time is not None and end_time >= changed_since)
+                or status == RunStatus.to_string(RunStatus.RUNNING)
+            )
+
+        return True
+
+    def search_filter(self) -> str:
+        """Returns the `filter_string` of `search_runs`, with the start time window added to it.
+
+        MLflow filters are conjunctions only, so the clauses are simply joined with `and`.
+        """
+        clauses = [self.filter_string] if self.filter_string else []
+
+        start, end = self.start_time_range
+        if start is not None:
+            clauses.append(f"attributes.start_time >= {start}")
+        if end is not None:
+            clauses.append(f"attributes.start_time < {end}")
+
+        return " and ".join(clauses)
+
+    def search_filters(self) -> List[str]:
+        """Returns the filter strings of all searches needed for the selection.
+
+        Changed runs take three searches, for the started, the ended and the running ones,
+        as MLflow filters cannot express alternatives.
+        """
+        if self.changed_since is None:
+            return [self.search_filter()]
+
+        since = self.changed_since_millis
+        clauses = [
+            f"attributes.start_time >= {since}",
+            f"attributes.end_time >= {since}",
+            f"attributes.status = '{RunStatus.to_string(RunStatus.RUNNING)}'",
+        ]
+        base = self.search_filter()
+        return [f"{base} and {clause}" if base else clause for clause in clauses]
+
+
+def _to_millis(moment: Optional[datetime]) -> Optional[int]:
+    return int(moment.timestamp() * 1000) if moment is not None else None
@@ -0,0 +1,231 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = [
+    "AdaptiveLimit",
+    "RequestScheduler",
+    "ScheduledClient",
+    "TokenBucket",
+    "is_throttling_error",
+]
+
+import functools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    Optional,
+    TypeVar,
+)
+
+from neptune_mlflow_exporter.impl.instrumentation import ExportInstrumentation
+
+T = TypeVar("T")
+
+THROTTLING_STATUS_CODES = frozenset({429, 503, 504})
+# error codes of MLflow REST API exceptions
+THROTTLING_ERROR_CODES = frozenset({"REQUEST_LIMIT_EXCEEDED", "RESOURCE_EXHAUSTED", "TEMPORARILY_UNAVAILABLE"})
+# MLflow reports throttled responses without an error body, its exhausted HTTP retries and timeouts
+# only in the message of a generic exception
+THROTTLING_MESSAGES = (
+    "error code 429",
+    "error code 503",
+    "error code 504",
+    "too many 429",
+    "max retries exceeded",
+    "timed out",
+    "read timeout",
+)
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Tells if a request failed because the backend is overloaded, so it should be retried later."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if status_code in THROTTLING_STATUS_CODES:
+        return True
+
+    if getattr(error, "error_code", None) in THROTTLING_ERROR_CODES:
+        return True
+
+    message = str(error).lower()
+    return any(throttling_message in message for throttling_message in THROTTLING_MESSAGES)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Returns the delay requested by the `Retry-After` header of a throttled response, if it is in seconds."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return float(headers["Retry-After"]) if headers else None
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, and bursts of up to `burst` requests.
+
+    Tokens are taken in advance, so a request waits for the ones taken by the requests before it.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+class AdaptiveLimit:
+    """Limits concurrent requests, looking for the highest concurrency the backend sustains.
+
+    The limit follows AIMD, like TCP congestion control. Every successful request raises it by `1 / limit`,
+    so by one for every full window of requests, and a throttled request cuts it by `decrease_factor`.
+    Requests sent with the same limit are throttled together, so the limit is cut at most once per `cooldown`.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, decrease_factor: float = 0.5, cooldown: float = 1.0):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.limit = float(maximum)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._decreased_at = float("-inf")
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify()
+
+    def on_success(self) -> None:
+        with self._condition:
+            previous = int(self.limit)
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            if int(self.limit) > previous:
+                self._condition.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._condition:
+            now = time.monotonic()
+            if now - self._decreased_at < self.cooldown:
+                return
+
+            self._decreased_at = now
+            self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+
+
+class RequestScheduler:
+    """Paces the requests of all export threads to one backend, and retries the throttled ones.
+
+    Requests take a token of the optional rate limit and a slot of the adaptive concurrency limit.
+    Throttled requests are retried up to `max_retries` times, after the delay asked by the backend or
+    an exponential backoff with full jitter, so that the retries of concurrent requests are spread out.
+    Other errors are raised immediately.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        rate: Optional[float] = None,
+        max_concurrency: int = 8,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        instrumentation: Optional[ExportInstrumentation] = None,
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate) if rate is not None else None
+        self.limit = AdaptiveLimit(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.instrumentation = instrumentation or ExportInstrumentation()
+
+    def call(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        attempt = 0
+
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+
+            try:
+                with self.limit.slot():
+                    result = function(*args, **kwargs)
+            except Exception as e:
+                if not is_throttling_error(e) or attempt >= self.max_retries:
+                    raise
+
+                self.limit.on_throttle()
+                self.instrumentation.increment(f"{self.name}_throttled")
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+                attempt += 1
+                # the slot is released while waiting, so other requests can still use it
+                time.sleep(delay)
+                continue
+
+            self.limit.on_success()
+            return result
+
+
+class ScheduledClient:
+    """Proxy of a client, sending the calls of all its methods through a scheduler."""
+
+    def __init__(self, client: Any, scheduler: RequestScheduler):
+        self._client = client
+        self._scheduler = scheduler
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def scheduled(*args: Any, **kwargs: Any) -> Any:
+            return self._scheduler.call(attribute, *args, **kwargs)
+
+        return scheduled
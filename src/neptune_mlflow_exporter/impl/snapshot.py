@@ -0,0 +1,198 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["SnapshotWriter"]
+
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    List,
+    Optional,
+)
+
+import click
+import mlflow
+from mlflow.entities import Experiment
+from mlflow.entities import Run as MlflowRun
+
+from neptune_mlflow_exporter.impl.components import (
+    ExportConfig,
+    Fetcher,
+    MetricHistoryFetcher,
+)
+from neptune_mlflow_exporter.impl.readers.base import EXPERIMENT_FIELDS
+from neptune_mlflow_exporter.impl.readers.snapshot import (
+    EXPERIMENTS_FOLDER_NAME,
+    RUN_FILE_NAME,
+    SNAPSHOT_FILE_NAME,
+    SNAPSHOT_FORMAT,
+    STEPS_FILE_NAME,
+    TIMESTAMPS_FILE_NAME,
+    VALUES_FILE_NAME,
+)
+
+
+class SnapshotWriter:
+    """Dumps the selected MLflow experiments and runs with their metric histories into a local snapshot.
+
+    The snapshot is exported to Neptune later with `SnapshotReader`, so reading MLflow and writing Neptune
+    can be retried, parallelised and benchmarked independently. Every run is written to its own directory
+    and completed by writing its `run.json` last, so an interrupted snapshot is resumed by taking it again
+    into the same directory. Experiments already in the snapshot are kept, so a snapshot can also be extended
+    with another selection. Artifacts are not copied, only their manifest is recorded.
+    Neptune is not accessed at all.
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher,
+        metric_history_fetcher: MetricHistoryFetcher,
+        client: mlflow.tracking.MlflowClient,
+        config: ExportConfig,
+    ):
+        self.fetcher = fetcher
+        self.metric_history_fetcher = metric_history_fetcher
+        self.mlflow_client = client
+        self.config = config
+
+    def write(self, root_directory: str) -> None:
+        experiments = self.fetcher.get_all_mlflow_experiments()
+
+        os.makedirs(root_directory, exist_ok=True)
+        snapshot_path = os.path.join(root_directory, SNAPSHOT_FILE_NAME)
+        # runs of experiments written by earlier snapshots into the directory stay readable
+        snapshot_experiments = {
+            fields["experiment_id"]: fields for fields in (_read_json(snapshot_path) or {}).get("experiments", [])
+        }
+        for experiment_id, experiment in experiments.items():
+            snapshot_experiments[experiment_id] = _experiment_to_dict(experiment)
+
+        _write_json(
+            snapshot_path,
+            {
+                "format": SNAPSHOT_FORMAT,
+                "byteorder": sys.byteorder,
+                "tracking_uri": self.config.mlflow_tracking_uri,
+                "experiments": list(snapshot_experiments.values()),
+            },
+        )
+
+        # the same bounded window of in-flight runs as in the export
+        max_pending = 2 * self.config.workers
+        pending: Deque[Future] = deque()
+
+        with ThreadPoolExecutor(max_workers=self.config.workers) as executor:
+            for mlflow_run in self.fetcher.iter_mlflow_runs(list(experiments.keys())):
+                pending.append(executor.submit(self._write_run, root_directory, mlflow_run))
+
+                if len(pending) >= max_pending:
+                    click.echo(pending.popleft().result())
+
+            while pending:
+                click.echo(pending.popleft().result())
+
+    def _write_run(self, root_directory: str, mlflow_run: MlflowRun) -> str:
+        run_directory = os.path.join(
+            root_directory, EXPERIMENTS_FOLDER_NAME, mlflow_run.info.experiment_id, mlflow_run.info.run_id
+        )
+        if os.path.exists(os.path.join(run_directory, RUN_FILE_NAME)):
+            return f"Ignoring mlflow_run '{mlflow_run.info.run_name}' since it is already in the snapshot"
+
+        try:
+            os.makedirs(run_directory, exist_ok=True)
+            metrics = self._write_metrics(run_directory, mlflow_run)
+            artifacts = [] if self.config.exclude_artifacts else self._list_artifacts(mlflow_run.info.run_id)
+
+            _write_json(
+                os.path.join(run_directory, RUN_FILE_NAME),
+                {
+                    "info": dict(mlflow_run.info),
+                    "params": mlflow_run.data.params,
+                    "tags": mlflow_run.data.tags,
+                    "latest_metrics": mlflow_run.data.metrics,
+                    "metrics": metrics,
+                    "artifacts": artifacts,
+                },
+            )
+        except Exception as e:
+            return f"Error writing run '{mlflow_run.info.run_name}' to the snapshot: {e}"
+
+        return f"Run '{mlflow_run.info.run_name}' was written to the snapshot"
+
+    def _write_metrics(self, run_directory: str, mlflow_run: MlflowRun) -> Dict[str, List[int]]:
+        """Appends the histories to the columns of the run and returns the offset and the length of every key."""
+        keys = list(mlflow_run.data.metrics.keys())
+        metrics: Dict[str, List[int]] = {}
+        offset = 0
+
+        with open(os.path.join(run_directory, VALUES_FILE_NAME), "wb") as values, open(
+            os.path.join(run_directory, TIMESTAMPS_FILE_NAME), "wb"
+        ) as timestamps, open(os.path.join(run_directory, STEPS_FILE_NAME), "wb") as steps:
+            # pages of a key come one after another, so every history is a contiguous slice of the columns
+            for key, series in self.metric_history_fetcher.iter_metric_pages(
+                mlflow_run, keys, self.config.metric_page_size
+            ):
+                series.values.tofile(values)
+                series.timestamps.tofile(timestamps)
+                series.steps.tofile(steps)
+
+                metrics.setdefault(key, [offset, 0])[1] += len(series)
+                offset += len(series)
+
+        return metrics
+
+    def _list_artifacts(self, run_id: str) -> List[Dict[str, Any]]:
+        artifacts = []
+        directories = [None]
+
+        while directories:
+            for info in self.mlflow_client.list_artifacts(run_id, directories.pop()):
+                artifacts.append({"path": info.path, "is_dir": info.is_dir, "file_size": info.file_size})
+                if info.is_dir:
+                    directories.append(info.path)
+
+        return artifacts
+
+
+def _experiment_to_dict(experiment: Experiment) -> Dict[str, Any]:
+    fields = {name: getattr(experiment, name) for name in EXPERIMENT_FIELDS}
+    fields["tags"] = experiment.tags
+    return fields
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _write_json(path: str, content: Dict[str, Any]) -> None:
+    # replaced atomically, so the file is either complete or missing
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w") as file:
+        json.dump(content, file)
+    os.replace(temporary_path, path)
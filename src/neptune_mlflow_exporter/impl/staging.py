@@ -0,0 +1,92 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["StagingArea", "StagingDirectory"]
+
+import os
+import shutil
+import tempfile
+import threading
+from typing import Optional
+
+from neptune_mlflow_exporter.impl.artifact_strategy import get_dir_size
+
+
+class StagingDirectory:
+    """A directory, with an absolute path, which holds the files of a single artifact until they are uploaded."""
+
+    def __init__(self, area: "StagingArea", path: str, size: int):
+        self.area = area
+        self.path = path
+        self.size = size
+
+    def measure(self) -> None:
+        """Charges the staging area for the size of the downloaded files, if it exceeds the reserved one."""
+        self.area._resize(self, max(self.size, get_dir_size(self.path)))
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.area._resize(self, 0)
+
+
+class StagingArea:
+    """Hands out staging directories under a common root within a disk budget.
+
+    Every artifact is staged in its own directory and referred to by absolute paths only, so artifacts
+    can be handled on many threads at once. Space is reserved before a download and released
+    when its directory is removed. A single artifact larger than the whole budget is staged
+    only when nothing else is.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_size: Optional[int] = None):
+        self.root = os.path.abspath(root) if root is not None else None
+        self.max_size = max_size
+        self._used = 0
+        self._condition = threading.Condition()
+
+        if self.root is not None:
+            os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def used(self) -> int:
+        return self._used
+
+    def try_reserve(self, size: int) -> Optional[StagingDirectory]:
+        """Returns a new staging directory, or None if it does not fit within the budget."""
+        with self._condition:
+            if not self._fits(size):
+                return None
+            return self._create(size)
+
+    def reserve(self, size: int) -> StagingDirectory:
+        """Returns a new staging directory, waiting until the space is released by other ones if needed."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._fits(size))
+            return self._create(size)
+
+    def _fits(self, size: int) -> bool:
+        return self.max_size is None or self._used == 0 or self._used + size <= self.max_size
+
+    def _create(self, size: int) -> StagingDirectory:
+        path = tempfile.mkdtemp(prefix="neptune-mlflow-", dir=self.root)
+        self._used += size
+        return StagingDirectory(self, path, size)
+
+    def _resize(self, directory: StagingDirectory, size: int) -> None:
+        with self._condition:
+            self._used += size - directory.size
+            directory.size = size
+            self._condition.notify_all()
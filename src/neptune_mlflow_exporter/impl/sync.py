@@ -13,7 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from typing import Optional
+from contextlib import nullcontext
+from datetime import datetime
+from typing import (
+    Optional,
+    Sequence,
+)
 
 try:
     from neptune import init_project
@@ -22,7 +27,12 @@ except ImportError:
     from neptune.new import init_project
     from neptune.new.integrations.utils import verify_type
 
-from neptune_mlflow_exporter.impl import NeptuneExporter
+from neptune_mlflow_exporter.impl import (
+    DownsamplingPolicy,
+    NeptuneExporter,
+    RunSelection,
+)
+from neptune_mlflow_exporter.impl.artifact_cache import DEDUP_POLICIES
 
 
 def sync(
@@ -31,6 +41,42 @@ def sync(
     mlflow_tracking_uri: Optional[str] = None,
     exclude_artifacts: bool = False,
     max_artifact_size: int = 50,
+    workers: int = 1,
+    state_dir: Optional[str] = None,
+    incremental: bool = False,
+    metric_workers: int = 4,
+    metric_page_size: int = 10000,
+    downsample: Optional[str] = None,
+    downsample_points: int = 10000,
+    downsample_keys: Sequence[str] = (),
+    downsample_exclude: Sequence[str] = (),
+    artifact_workers: int = 4,
+    max_artifact_bandwidth: Optional[float] = None,
+    staging_dir: Optional[str] = None,
+    max_staging_size: Optional[int] = None,
+    artifact_mounts: Sequence[str] = (),
+    artifact_dedup: Optional[str] = None,
+    pack_threshold: Optional[int] = None,
+    artifact_include: Sequence[str] = (),
+    artifact_exclude: Sequence[str] = (),
+    dry_run: bool = False,
+    dry_run_sample: int = 20,
+    progress_interval: Optional[float] = 10.0,
+    report_file: Optional[str] = None,
+    experiment_names: Sequence[str] = (),
+    experiment_ids: Sequence[str] = (),
+    filter_string: Optional[str] = None,
+    started_after: Optional[datetime] = None,
+    started_before: Optional[datetime] = None,
+    lifecycle_stage: str = "all",
+    max_runs: Optional[int] = None,
+    snapshot_dir: Optional[str] = None,
+    from_snapshot: Optional[str] = None,
+    watch: bool = False,
+    poll_interval: float = 60.0,
+    mlflow_rate: Optional[float] = None,
+    neptune_rate: Optional[float] = None,
+    run_retries: int = 2,
 ) -> None:
 
     verify_type("max_artifact_size", max_artifact_size, int)
@@ -38,7 +84,156 @@ def sync(
     if max_artifact_size <= 0:
         raise ValueError("Max artifact size must be a positive integer")
 
-    with init_project(project=project_name, api_token=api_token) as project:
+    verify_type("workers", workers, int)
+
+    if workers <= 0:
+        raise ValueError("Number of workers must be a positive integer")
+
+    if state_dir is not None:
+        verify_type("state_dir", state_dir, str)
+
+    verify_type("incremental", incremental, bool)
+
+    verify_type("metric_workers", metric_workers, int)
+
+    if metric_workers <= 0:
+        raise ValueError("Number of metric workers must be a positive integer")
+
+    verify_type("metric_page_size", metric_page_size, int)
+
+    if metric_page_size <= 0:
+        raise ValueError("Metric page size must be a positive integer")
+
+    verify_type("artifact_workers", artifact_workers, int)
+
+    if artifact_workers <= 0:
+        raise ValueError("Number of artifact workers must be a positive integer")
+
+    if max_artifact_bandwidth is not None:
+        verify_type("max_artifact_bandwidth", max_artifact_bandwidth, (int, float))
+
+        if max_artifact_bandwidth <= 0:
+            raise ValueError("Max artifact bandwidth must be a positive number")
+
+    if staging_dir is not None:
+        verify_type("staging_dir", staging_dir, str)
+
+    if max_staging_size is not None:
+        verify_type("max_staging_size", max_staging_size, int)
+
+        if max_staging_size <= 0:
+            raise ValueError("Max staging size must be a positive integer")
+
+    mounts = {}
+    for mount in artifact_mounts:
+        verify_type("artifact_mounts", mount, str)
+        prefix, separator, mount_dir = mount.partition("=")
+
+        if not separator or not prefix or not mount_dir:
+            raise ValueError(f"Artifact mount '{mount}' must have the form PREFIX=PATH")
+
+        mounts[prefix] = mount_dir
+
+    if artifact_dedup is not None:
+        if artifact_dedup not in DEDUP_POLICIES:
+            raise ValueError(f"Artifact deduplication policy must be one of: {', '.join(DEDUP_POLICIES)}")
+
+        if state_dir is None:
+            raise ValueError("Artifact deduplication requires a state directory")
+
+    if pack_threshold is not None:
+        verify_type("pack_threshold", pack_threshold, int)
+
+        if pack_threshold <= 0:
+            raise ValueError("Pack threshold must be a positive integer")
+
+    verify_type("dry_run", dry_run, bool)
+
+    verify_type("dry_run_sample", dry_run_sample, int)
+
+    if dry_run_sample <= 0:
+        raise ValueError("Dry run sample must be a positive integer")
+
+    if progress_interval is not None:
+        verify_type("progress_interval", progress_interval, (int, float))
+
+        if progress_interval < 0:
+            raise ValueError("Progress interval must not be negative")
+
+    if report_file is not None:
+        verify_type("report_file", report_file, str)
+
+    if filter_string is not None:
+        verify_type("filter_string", filter_string, str)
+
+    if max_runs is not None:
+        verify_type("max_runs", max_runs, int)
+
+    if snapshot_dir is not None:
+        verify_type("snapshot_dir", snapshot_dir, str)
+
+        if from_snapshot is not None or dry_run:
+            raise ValueError("Taking a snapshot cannot be combined with exporting from one or with a dry run")
+
+    if from_snapshot is not None:
+        verify_type("from_snapshot", from_snapshot, str)
+
+        if filter_string is not None:
+            raise ValueError("Filter strings are evaluated by MLflow, so they can only be used when taking a snapshot")
+
+    verify_type("watch", watch, bool)
+
+    verify_type("poll_interval", poll_interval, (int, float))
+
+    if poll_interval <= 0:
+        raise ValueError("Poll interval must be a positive number")
+
+    if watch and (snapshot_dir is not None or from_snapshot is not None or dry_run):
+        raise ValueError("Watching MLflow cannot be combined with snapshots or with a dry run")
+
+    if mlflow_rate is not None:
+        verify_type("mlflow_rate", mlflow_rate, (int, float))
+
+        if mlflow_rate <= 0:
+            raise ValueError("MLflow request rate must be a positive number")
+
+    if neptune_rate is not None:
+        verify_type("neptune_rate", neptune_rate, (int, float))
+
+        if neptune_rate <= 0:
+            raise ValueError("Neptune request rate must be a positive number")
+
+    verify_type("run_retries", run_retries, int)
+
+    if run_retries < 0:
+        raise ValueError("Number of run retries must not be negative")
+
+    downsampling = None
+    if downsample is not None:
+        downsampling = DownsamplingPolicy(
+            algorithm=downsample,
+            target_points=downsample_points,
+            include=tuple(downsample_keys),
+            exclude=tuple(downsample_exclude),
+        )
+
+    selection = RunSelection(
+        experiment_names=tuple(experiment_names),
+        experiment_ids=tuple(experiment_ids),
+        filter_string=filter_string,
+        started_after=started_after,
+        started_before=started_before,
+        lifecycle_stage=lifecycle_stage,
+        max_runs=max_runs,
+    )
+
+    # taking a snapshot does not access Neptune
+    if snapshot_dir is not None:
+        project_context = nullcontext()
+    else:
+        project_context = init_project(project=project_name, api_token=api_token)
+
+    with project_context as project:
         NeptuneExporter(
             project=project,
             project_name=project_name,
@@ -46,4 +241,31 @@ def sync(
             mlflow_tracking_uri=mlflow_tracking_uri,
             exclude_artifacts=exclude_artifacts,
             max_artifact_size=max_artifact_size,
+            workers=workers,
+            state_dir=state_dir,
+            incremental=incremental,
+            metric_workers=metric_workers,
+            metric_page_size=metric_page_size,
+            downsampling=downsampling,
+            artifact_workers=artifact_workers,
+            max_artifact_bandwidth=max_artifact_bandwidth,
+            staging_dir=staging_dir,
+            max_staging_size=max_staging_size,
+            artifact_mounts=mounts,
+            artifact_dedup=artifact_dedup,
+            pack_threshold=pack_threshold,
+            artifact_include=artifact_include,
+            artifact_exclude=artifact_exclude,
+            dry_run=dry_run,
+            dry_run_sample=dry_run_sample,
+            progress_interval=progress_interval,
+            report_file=report_file,
+            selection=selection,
+            snapshot_dir=snapshot_dir,
+            from_snapshot=from_snapshot,
+            watch=watch,
+            poll_interval=poll_interval,
+            mlflow_rate=mlflow_rate,
+            neptune_rate=neptune_rate,
+            run_retries=run_retries,
         ).run()
@@ -0,0 +1,165 @@
+#
+# Copyright (c) 2023, Neptune Labs Sp. z o.o.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = ["ExportWatcher"]
+
+import json
+import os
+import time
+from dataclasses import replace
+from datetime import (
+    datetime,
+    timedelta,
+)
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+)
+
+import click
+from mlflow.entities import Experiment
+from mlflow.entities import Run as MlflowRun
+
+from neptune_mlflow_exporter.impl.components import (
+    Fetcher,
+    StreamedData,
+)
+from neptune_mlflow_exporter.impl.orchestrator import ExportOrchestrator
+
+CURSOR_FILE_NAME = "watch_cursor.json"
+# runs stamped by a clock slightly behind the local one are still found by the next poll
+CURSOR_OVERLAP = timedelta(minutes=1)
+
+
+class ExportWatcher:
+    """Keeps mirroring MLflow runs to Neptune, polling MLflow every `poll_interval` seconds.
+
+    The first poll exports all selected runs, unless a cursor of a previous watch is found in the state directory.
+    Later polls only search for the runs started or ended since the previous poll and the ones still running,
+    and only fetch the experiments created or changed since then, so their cost follows the activity in MLflow
+    instead of its size. Runs are still searched in all known experiments, as logging runs does not change
+    the `last_update_time` of their experiments. Neptune's runs table is read once,
+    and the runs exported by the watcher are remembered, so they are updated with their new metric points
+    instead of being exported again. Runs which failed are exported again by the next poll, and the cursor
+    saved in the state directory does not move past them. All polls share the same clients, thread pools and caches.
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher,
+        orchestrator: ExportOrchestrator,
+        poll_interval: float,
+        state_dir: Optional[str] = None,
+    ):
+        self.fetcher = fetcher
+        self.orchestrator = orchestrator
+        self.poll_interval = poll_interval
+        self.state_dir = state_dir
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        instrumentation = self.fetcher.instrumentation
+        selection = self.fetcher.selection
+
+        with instrumentation.phase("existing_run_ids"):
+            neptune_run_ids = self.fetcher.get_existing_neptune_run_ids()
+
+        cursor = self._load_cursor()
+        # experiments found by the previous polls, each poll adds the ones created or changed since the previous one
+        experiments: Optional[MutableMapping[str, Experiment]] = None
+        # runs which failed, by their ids, which may not be changed again by the time of the next poll
+        failed_runs: Dict[str, MlflowRun] = {}
+        polls = 0
+
+        try:
+            while max_polls is None or polls < max_polls:
+                start = time.monotonic()
+                poll_time = datetime.now()
+                since = cursor - CURSOR_OVERLAP if cursor is not None else None
+                poll_selection = replace(selection, changed_since=since)
+
+                with instrumentation.phase("fetch_experiments"):
+                    if experiments is None:
+                        experiments = self.fetcher.get_all_mlflow_experiments()
+                    else:
+                        experiments.update(self.fetcher.get_all_mlflow_experiments(updated_since=since))
+
+                run_ids: List[str] = []
+                fetched_runs = self.fetcher.iter_mlflow_runs(list(experiments.keys()), poll_selection)
+                mlflow_runs = _with_failed(fetched_runs, failed_runs)
+                self.orchestrator.export(
+                    StreamedData(
+                        mlflow_experiments=experiments,
+                        mlflow_runs=instrumentation.time_iterator("fetch_run", _remember(mlflow_runs, run_ids)),
+                        neptune_run_ids=neptune_run_ids,
+                    )
+                )
+
+                failed_runs = {mlflow_run.info.run_id: mlflow_run for mlflow_run in self.orchestrator.failed_runs}
+                # the other runs are in Neptune now, so the next polls update them
+                neptune_run_ids.update(run_id for run_id in run_ids if run_id not in failed_runs)
+                click.echo(
+                    f"Synchronized {len(run_ids) - len(failed_runs)} changed runs, {len(failed_runs)} failed, "
+                    f"next poll in {self.poll_interval:g} s"
+                )
+
+                cursor = poll_time
+                # a restarted watch searches for the failed runs again
+                if not failed_runs:
+                    self._save_cursor(cursor)
+                polls += 1
+
+                if max_polls is None or polls < max_polls:
+                    time.sleep(max(0.0, self.poll_interval - (time.monotonic() - start)))
+        except KeyboardInterrupt:
+            click.echo("Watch stopped")
+
+    def _load_cursor(self) -> Optional[datetime]:
+        if self.state_dir is None:
+            return None
+
+        try:
+            with open(os.path.join(self.state_dir, CURSOR_FILE_NAME)) as cursor_file:
+                return datetime.fromisoformat(json.load(cursor_file)["cursor"])
+        except FileNotFoundError:
+            return None
+
+    def _save_cursor(self, cursor: datetime) -> None:
+        if self.state_dir is None:
+            return
+
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(os.path.join(self.state_dir, CURSOR_FILE_NAME), "w") as cursor_file:
+            json.dump({"cursor": cursor.isoformat()}, cursor_file)
+
+
+def _with_failed(mlflow_runs: Iterable[MlflowRun], failed_runs: Dict[str, MlflowRun]) -> Iterator[MlflowRun]:
+    """Yields the fetched runs, followed by the failed runs of the previous poll which were not fetched again."""
+    pending = dict(failed_runs)
+    for mlflow_run in mlflow_runs:
+        pending.pop(mlflow_run.info.run_id, None)
+        yield mlflow_run
+
+    yield from pending.values()
+
+
+def _remember(mlflow_runs: Iterable[MlflowRun], run_ids: List[str]) -> Iterator[MlflowRun]:
+    for mlflow_run in mlflow_runs:
+        run_ids.append(mlflow_run.info.run_id)
+        yield mlflow_run
@@ -0,0 +1,131 @@
+"""Generators of synthetic MLflow tracking stores for the export benchmarks.
+
+The stores are created through the MLflow store API, so they are laid out exactly as MLflow does it.
+Metric files of file stores are written directly, as logging millions of points one by one through
+the API would take longer than the benchmark itself.
+"""
+
+import inspect
+import os
+import time
+from dataclasses import dataclass
+from typing import List
+
+from mlflow.entities import (
+    Metric,
+    Param,
+    RunTag,
+)
+from mlflow.utils.file_utils import local_file_uri_to_path
+
+# MLflow rejects batches of more metrics
+METRIC_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class StoreShape:
+    experiments: int = 1
+    runs: int = 10
+    metric_keys: int = 5
+    points_per_key: int = 1000
+    params: int = 10
+    artifacts: int = 5
+    artifact_size: int = 100 * 1024  # bytes
+
+    @property
+    def total_runs(self) -> int:
+        return self.experiments * self.runs
+
+    @property
+    def total_points(self) -> int:
+        return self.total_runs * self.metric_keys * self.points_per_key
+
+    @property
+    def total_artifact_bytes(self) -> int:
+        return self.total_runs * self.artifacts * self.artifact_size
+
+
+def generate_file_store(root: str, shape: StoreShape) -> str:
+    """Creates a file store in `root` and returns its tracking URI."""
+    from mlflow.store.tracking.file_store import FileStore
+
+    store = FileStore(os.path.join(root, "mlruns"))
+
+    for run_id in _create_runs(store, shape):
+        run = store.get_run(run_id)
+        run_dir = os.path.dirname(local_file_uri_to_path(run.info.artifact_uri))
+        metrics_dir = os.path.join(run_dir, "metrics")
+        os.makedirs(metrics_dir, exist_ok=True)
+
+        for key in _metric_keys(shape):
+            with open(os.path.join(metrics_dir, key), "w") as metric_file:
+                for step, (timestamp, value) in enumerate(_metric_points(shape)):
+                    metric_file.write(f"{timestamp} {value} {step}\n")
+
+    return store.root_directory
+
+
+def generate_sqlite_store(root: str, shape: StoreShape) -> str:
+    """Creates a SQLite store in `root`, with artifacts next to it, and returns its tracking URI."""
+    from mlflow.store.tracking.sqlalchemy_store import SqlAlchemyStore
+
+    tracking_uri = f"sqlite:///{os.path.join(os.path.abspath(root), 'mlflow.db')}"
+    store = SqlAlchemyStore(tracking_uri, os.path.join(os.path.abspath(root), "artifacts"))
+
+    for run_id in _create_runs(store, shape):
+        metrics = [
+            Metric(key, value, timestamp, step)
+            for key in _metric_keys(shape)
+            for step, (timestamp, value) in enumerate(_metric_points(shape))
+        ]
+        for start in range(0, len(metrics), METRIC_BATCH_SIZE):
+            store.log_batch(run_id, metrics=metrics[start : start + METRIC_BATCH_SIZE], params=[], tags=[])
+
+    return tracking_uri
+
+
+def _create_runs(store, shape: StoreShape) -> List[str]:
+    """Creates experiments and runs with their params and artifacts, and returns ids of the runs."""
+    # MLflow 2 requires run names
+    with_run_name = "run_name" in inspect.signature(store.create_run).parameters
+    run_ids = []
+
+    for experiment_index in range(shape.experiments):
+        experiment_id = store.create_experiment(f"benchmark-{experiment_index}")
+
+        for run_index in range(shape.runs):
+            run_name = f"run-{experiment_index}-{run_index}"
+            kwargs = {"run_name": run_name} if with_run_name else {}
+            run = store.create_run(
+                experiment_id=experiment_id,
+                user_id="benchmark",
+                start_time=int(time.time() * 1000),
+                tags=[RunTag("mlflow.runName", run_name)],
+                **kwargs,
+            )
+
+            params = [Param(f"param-{index}", str(index)) for index in range(shape.params)]
+            store.log_batch(run.info.run_id, metrics=[], params=params, tags=[])
+            _write_artifacts(local_file_uri_to_path(run.info.artifact_uri), shape)
+            run_ids.append(run.info.run_id)
+
+    return run_ids
+
+
+def _write_artifacts(artifact_dir: str, shape: StoreShape) -> None:
+    os.makedirs(artifact_dir, exist_ok=True)
+
+    for index in range(shape.artifacts):
+        # random content, so that compression does not make packed artifacts unrealistically cheap
+        with open(os.path.join(artifact_dir, f"artifact-{index}.bin"), "wb") as artifact_file:
+            artifact_file.write(os.urandom(shape.artifact_size))
+
+
+def _metric_keys(shape: StoreShape) -> List[str]:
+    return [f"metric-{index}" for index in range(shape.metric_keys)]
+
+
+def _metric_points(shape: StoreShape):
+    start = int(time.time() * 1000)
+    for step in range(shape.points_per_key):
+        yield start + step, 1.0 / (step + 1)
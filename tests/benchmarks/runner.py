@@ -0,0 +1,230 @@
+"""Export benchmarks running against synthetic MLflow stores and Neptune's debug mode.
+
+Every case is generated once per store type, then exported in a fresh process, so that its peak RSS
+is not inflated by the generator or by the previous cases. No network access is needed.
+
+Results are appended to a JSON lines file together with the package version and the git commit,
+and every result is compared with the previous one of the same case, store and shape:
+
+    python -m tests.benchmarks --case small --store file
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from datetime import (
+    datetime,
+    timezone,
+)
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+
+import click
+
+from tests.benchmarks.generator import (
+    StoreShape,
+    generate_file_store,
+    generate_sqlite_store,
+)
+
+CASES = {
+    "small": StoreShape(runs=20, metric_keys=5, points_per_key=1000, artifacts=5, artifact_size=100 * 1024),
+    "metrics": StoreShape(runs=5, metric_keys=20, points_per_key=100000, artifacts=0),
+    "artifacts": StoreShape(runs=5, metric_keys=1, points_per_key=100, artifacts=50, artifact_size=1024 * 1024),
+}
+
+STORES = {
+    "file": generate_file_store,
+    "sqlite": generate_sqlite_store,
+}
+
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "results.jsonl")
+
+# compared with the previous result of the same case
+METRICS = ["runs_per_second", "points_per_second", "mb_per_second", "peak_rss_mb"]
+
+
+class EmptyProject:
+    """Stands in for the Neptune project, which has no runs yet when a benchmark starts.
+
+    Debug mode projects cannot list their runs, e.g. `fetch_runs_table` fails with a TypeError in neptune 1.14,
+    and the runs are created in debug mode anyway, so they would never be listed.
+    """
+
+    @staticmethod
+    def fetch_runs_table(**kwargs) -> List[Any]:
+        return []
+
+
+def export(tracking_uri: str, state_dir: str, options: Dict[str, Any]) -> Dict[str, float]:
+    """Exports all runs of the store to debug mode Neptune runs and measures it.
+
+    Runs in a child process, so `peak_rss_mb` only covers the export.
+    """
+    from neptune_mlflow_exporter.impl import NeptuneExporter
+
+    # runs created by the orchestrator pick the mode up from the environment
+    os.environ["NEPTUNE_MODE"] = "debug"
+
+    exporter = NeptuneExporter(
+        EmptyProject(),
+        project_name="organization/project",
+        mlflow_tracking_uri=tracking_uri,
+        state_dir=state_dir,
+        **options,
+    )
+
+    start = time.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        exporter.run()
+    seconds = time.monotonic() - start
+
+    return {"seconds": seconds, "peak_rss_mb": _peak_rss_mb()}
+
+
+def run_case(name: str, store: str, shape: StoreShape, work_dir: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    case_dir = tempfile.mkdtemp(prefix=f"{name}-{store}-", dir=work_dir)
+    tracking_uri = STORES[store](case_dir, shape)
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        measured = executor.submit(export, tracking_uri, os.path.join(case_dir, "state"), options).result()
+
+    seconds = measured["seconds"]
+    return {
+        "case": name,
+        "store": store,
+        "shape": asdict(shape),
+        "options": options,
+        "version": _package_version(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "seconds": round(seconds, 3),
+        "runs_per_second": round(shape.total_runs / seconds, 3),
+        "points_per_second": round(shape.total_points / seconds, 1),
+        "mb_per_second": round(shape.total_artifact_bytes / (1024 * 1024) / seconds, 3),
+        "peak_rss_mb": measured["peak_rss_mb"],
+    }
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+
+    with open(path) as results_file:
+        return [json.loads(line) for line in results_file if line.strip()]
+
+
+def save_result(path: str, result: Dict[str, Any]) -> None:
+    with open(path, "a") as results_file:
+        results_file.write(json.dumps(result, sort_keys=True) + "\n")
+
+
+def find_previous(results: List[Dict[str, Any]], result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    for previous in reversed(results):
+        if all(previous.get(key) == result[key] for key in ("case", "store", "shape", "options")):
+            return previous
+    return None
+
+
+def format_result(result: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> str:
+    parts = [f"{result['case']} ({result['store']}): {result['seconds']:.1f} s"]
+
+    for metric in METRICS:
+        value = result[metric]
+        if value is None:
+            continue
+
+        part = f"{metric}={value}"
+        if previous is not None and previous.get(metric):
+            change = (value - previous[metric]) / previous[metric] * 100
+            part += f" ({change:+.1f}% vs {previous.get('version') or previous.get('commit')})"
+        parts.append(part)
+
+    return ", ".join(parts)
+
+
+@click.command()
+@click.option(
+    "--case",
+    "cases",
+    help="Benchmark case to run, can be repeated. All cases by default",
+    multiple=True,
+    type=click.Choice(list(CASES)),
+)
+@click.option(
+    "--store",
+    "stores",
+    help="Store type to run against, can be repeated. All store types by default",
+    multiple=True,
+    type=click.Choice(list(STORES)),
+)
+@click.option("--results", help="JSON lines file where results are appended", default=RESULTS_FILE, type=str)
+@click.option("--work-dir", help="Directory where the stores are generated, a temporary one if not provided", type=str)
+@click.option("--workers", help="Number of runs exported concurrently", default=1, type=int)
+@click.option("--artifact-workers", help="Number of artifacts transferred concurrently", default=4, type=int)
+@click.option("--no-save", help="Only print the results", is_flag=True, default=False)
+def main(
+    cases: List[str],
+    stores: List[str],
+    results: str,
+    work_dir: Optional[str],
+    workers: int,
+    artifact_workers: int,
+    no_save: bool,
+) -> None:
+    """Runs the export benchmarks and compares them with the previous results."""
+    options = {"workers": workers, "artifact_workers": artifact_workers}
+    history = load_results(results)
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        for name in cases or CASES:
+            for store in stores or STORES:
+                result = run_case(name, store, CASES[name], work_dir or temporary_dir, options)
+                click.echo(format_result(result, find_previous(history, result)))
+
+                if not no_save:
+                    save_result(results, result)
+                history.append(result)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        # not available on Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _package_version() -> Optional[str]:
+    try:
+        from neptune_mlflow_exporter.impl.version import __version__
+
+        return __version__
+    except ImportError:
+        return None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,34 @@
+import os
+
+from neptune_mlflow_exporter.impl.artifact_cache import (
+    ArtifactCache,
+    hash_artifact,
+)
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def test_directories_with_same_files_have_same_digest(tmp_path):
+    for name in ("first", "second"):
+        _write(str(tmp_path / name / "model" / "weights.bin"), "weights")
+        _write(str(tmp_path / name / "model" / "config.json"), "{}")
+    _write(str(tmp_path / "third" / "model" / "weights.bin"), "other weights")
+    _write(str(tmp_path / "third" / "model" / "config.json"), "{}")
+
+    assert hash_artifact(str(tmp_path / "first")) == hash_artifact(str(tmp_path / "second"))
+    assert hash_artifact(str(tmp_path / "first")) != hash_artifact(str(tmp_path / "third"))
+
+
+def test_cache_is_persisted(tmp_path):
+    with ArtifactCache(str(tmp_path)) as cache:
+        assert cache.get("digest") is None
+        cache.add("digest", 10, "run", "model.pt")
+
+    with ArtifactCache(str(tmp_path)) as cache:
+        reference = cache.get("digest")
+
+    assert (reference.run_id, reference.path, reference.size) == ("run", "model.pt", 10)
@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock
+
+from mlflow.entities import FileInfo
+
+from neptune_mlflow_exporter.impl.artifact_planner import ArtifactPlanner
+
+ARTIFACTS = {
+    None: [FileInfo("model", True, None), FileInfo("plot.png", False, 10), FileInfo("weights.bin", False, 1000)],
+    "model": [FileInfo("model/checkpoints", True, None), FileInfo("model/config.json", False, 5)],
+    "model/checkpoints": [FileInfo("model/checkpoints/1.pt", False, 60), FileInfo("model/checkpoints/2.pt", False, 60)],
+}
+
+
+def _client():
+    client = MagicMock()
+    client.list_artifacts.side_effect = lambda run_id, path=None: ARTIFACTS[path]
+    return client
+
+
+def _plan(max_artifact_size, planner=None):
+    planner = planner or ArtifactPlanner(_client())
+    return [(artifact.info.path, artifact.size) for artifact in planner.plan("run", max_artifact_size)]
+
+
+def test_directories_within_limit_are_exported_whole():
+    assert _plan(200) == [("model", 125), ("plot.png", 10)]
+
+
+def test_oversized_directories_are_split_into_their_parts():
+    assert _plan(100) == [
+        ("model/checkpoints/1.pt", 60),
+        ("model/checkpoints/2.pt", 60),
+        ("model/config.json", 5),
+        ("plot.png", 10),
+    ]
+    assert _plan(50) == [("model/config.json", 5), ("plot.png", 10)]
+
+
+def test_excluded_directories_are_not_listed():
+    client = _client()
+
+    plan = _plan(1000, ArtifactPlanner(client, exclude=["model/checkpoints"]))
+
+    assert plan == [("model/config.json", 5), ("plot.png", 10), ("weights.bin", 1000)]
+    assert [call.args[1] for call in client.list_artifacts.call_args_list] == [None, "model"]
+
+
+def test_only_directories_which_may_contain_included_paths_are_listed():
+    client = _client()
+
+    plan = _plan(1000, ArtifactPlanner(client, include=["model/checkpoints/*", "*.png"]))
+    assert plan == [("model/checkpoints", 120), ("plot.png", 10)]
+
+    client.list_artifacts.reset_mock()
+    plan = _plan(1000, ArtifactPlanner(client, include=["weights.*"]))
+    assert plan == [("weights.bin", 1000)]
+    assert [call.args[1] for call in client.list_artifacts.call_args_list] == [None]
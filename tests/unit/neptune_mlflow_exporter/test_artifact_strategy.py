@@ -1,3 +1,7 @@
+import json
+import os
+import tarfile
+from collections import defaultdict
 from unittest.mock import (
     MagicMock,
     patch,
@@ -8,6 +12,7 @@ from mlflow.entities import FileInfo
 from neptune_mlflow_exporter.impl.artifact_strategy import (
     DirectoryUploadStrategy,
     FileUploadStrategy,
+    PackedDirectoryUploadStrategy,
 )
 
 
@@ -37,3 +42,68 @@ def test_directory_upload_strategy_does_not_upload_dir_above_limit_size(
     mock_get_dir_size.assert_called_once()
 
     mock_upload.assert_not_called()
+
+
+def test_nested_artifacts_are_uploaded_from_their_download_path(tmp_path):
+    artifact_dir = tmp_path / "artifacts"
+    os.makedirs(str(artifact_dir / "outputs" / "model" / "checkpoints"))
+    for name in ["outputs/model/weights.bin", "outputs/model/checkpoints/1.ckpt"]:
+        with open(str(artifact_dir / name), "wb") as file:
+            file.write(b"x" * 10)
+
+    mlflow_run = MagicMock()
+    mlflow_run.info.artifact_uri = artifact_dir.as_uri()
+    uploaded = {}
+
+    def record(path, wait=True):
+        # the staged files are removed after the upload, so they are checked while it runs
+        uploaded[path] = sorted(os.listdir(os.path.dirname(path))) if path.endswith("*") else os.path.isfile(path)
+
+    handlers = defaultdict(lambda: MagicMock(upload=record, upload_files=record))
+    neptune_run = MagicMock()
+    neptune_run.__getitem__.side_effect = handlers.__getitem__
+
+    FileUploadStrategy(tracking_uri="", max_file_size=500).upload_artifact(
+        neptune_run, FileInfo("outputs/model/weights.bin", False, 10), mlflow_run
+    )
+    DirectoryUploadStrategy(tracking_uri="", max_file_size=500).upload_artifact(
+        neptune_run, FileInfo("outputs/model/checkpoints", True, None), mlflow_run
+    )
+
+    assert set(handlers) == {"artifacts/outputs/model/weights.bin", "artifacts/outputs/model/checkpoints"}
+    assert list(uploaded.values()) == [True, ["1.ckpt"]]
+
+
+def test_packed_directory_upload_strategy_packs_small_files(tmp_path):
+    source_dir, scratch_dir = tmp_path / "source", tmp_path / "scratch"
+    os.makedirs(str(source_dir / "logs" / "events"))
+    os.makedirs(str(scratch_dir))
+    for name, size in [("events/1.tfevents", 10), ("events/2.tfevents", 20), ("model.bin", 1000)]:
+        with open(str(source_dir / "logs" / name), "wb") as file:
+            file.write(b"x" * size)
+
+    handlers = defaultdict(MagicMock)
+    neptune_run = MagicMock()
+    neptune_run.__getitem__.side_effect = handlers.__getitem__
+
+    strategy = PackedDirectoryUploadStrategy(tracking_uri="", max_file_size=5000, pack_threshold=100)
+    strategy.upload_to_neptune(neptune_run, FileInfo("logs", True, None), str(source_dir), scratch_dir=str(scratch_dir))
+
+    assert set(handlers) == {
+        "artifacts/logs/model.bin",
+        "packed_artifacts/logs/files",
+        "packed_artifacts/logs/manifest",
+    }
+
+    archive_path = handlers["packed_artifacts/logs/files"].upload.call_args.args[0]
+    with tarfile.open(archive_path) as archive:
+        assert archive.getnames() == ["events/1.tfevents", "events/2.tfevents"]
+
+    manifest_path = handlers["packed_artifacts/logs/manifest"].upload.call_args.args[0]
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    assert [(entry["path"], entry["size"]) for entry in manifest["files"]] == [
+        ("events/1.tfevents", 10),
+        ("events/2.tfevents", 20),
+    ]
+    assert os.path.dirname(os.path.dirname(archive_path)) == str(scratch_dir)
@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from mlflow.entities import FileInfo
+
+from neptune_mlflow_exporter.impl.artifact_cache import (
+    DEDUP_REFERENCE,
+    ArtifactCache,
+)
+from neptune_mlflow_exporter.impl.artifact_planner import PlannedArtifact
+from neptune_mlflow_exporter.impl.components import ArtifactTransfer
+from neptune_mlflow_exporter.impl.components.artifact_transfer import BandwidthLimiter
+from neptune_mlflow_exporter.impl.instrumentation import ExportInstrumentation
+from neptune_mlflow_exporter.impl.journal import (
+    RunCheckpoint,
+    artifact_stage,
+)
+from neptune_mlflow_exporter.impl.scheduler import RequestScheduler
+from neptune_mlflow_exporter.impl.staging import StagingArea
+
+
+def _artifacts(count):
+    return [PlannedArtifact(FileInfo(f"model_{index}.pt", False, 10), 10) for index in range(count)]
+
+
+def _mlflow_run(artifact_uri="s3://bucket/1/run/artifacts"):
+    mlflow_run = MagicMock()
+    mlflow_run.info.run_id = "run"
+    mlflow_run.info.artifact_uri = artifact_uri
+    return mlflow_run
+
+
+def _assert_exist(paths):
+    # uploads queued without waiting read the staged files until the run is flushed
+    assert all(os.path.exists(path) for path in paths)
+
+
+@patch("neptune_mlflow_exporter.impl.artifact_strategy.download_artifacts")
+def test_artifacts_are_downloaded_concurrently_and_flushed_once(mock_download_artifacts):
+    barrier = threading.Barrier(3, timeout=5)
+    staged_files = []
+
+    def download_artifacts(artifact_uri, dst_path):
+        # would time out if the three artifacts were not downloaded at the same time
+        barrier.wait()
+        path = os.path.join(dst_path, os.path.basename(artifact_uri))
+        with open(path, "w") as file:
+            file.write("content")
+        staged_files.append(path)
+
+    mock_download_artifacts.side_effect = download_artifacts
+    neptune_run = MagicMock()
+    neptune_run.wait.side_effect = lambda: _assert_exist(staged_files)
+    checkpoint = RunCheckpoint(None, "run")
+
+    transfer = ArtifactTransfer(workers=3)
+    try:
+        transfer.export(neptune_run, _mlflow_run(), _artifacts(3), 100, None, checkpoint)
+    finally:
+        transfer.close()
+
+    upload = neptune_run.__getitem__.return_value.upload
+    assert upload.call_count == 3
+    assert all(call.kwargs["wait"] is False for call in upload.call_args_list)
+    neptune_run.wait.assert_called_once()
+    assert all(checkpoint.is_completed(artifact_stage(artifact.info.path)) for artifact in _artifacts(3))
+    assert all(os.path.isabs(call.args[0]) for call in upload.call_args_list)
+    assert not any(os.path.exists(path) for path in staged_files)
+
+
+@patch("neptune_mlflow_exporter.impl.artifact_strategy.download_artifacts")
+def test_run_is_flushed_early_when_staging_budget_is_exhausted(mock_download_artifacts, tmp_path):
+    staging_area = StagingArea(str(tmp_path / "staging"), max_size=25)
+    neptune_run = MagicMock()
+
+    transfer = ArtifactTransfer(workers=1, staging_area=staging_area)
+    try:
+        transfer.export(neptune_run, _mlflow_run(), _artifacts(5), 100, None, RunCheckpoint(None, "run"))
+    finally:
+        transfer.close()
+
+    # two artifacts of 10 bytes fit in the budget at once
+    assert neptune_run.wait.call_count == 3
+    assert staging_area.used == 0
+    assert os.listdir(str(tmp_path / "staging")) == []
+
+
+@patch("neptune_mlflow_exporter.impl.artifact_strategy.download_artifacts")
+def test_completed_artifacts_are_skipped(mock_download_artifacts):
+    checkpoint = RunCheckpoint(None, "run")
+    for artifact in _artifacts(2):
+        checkpoint.complete(artifact_stage(artifact.info.path))
+    neptune_run = MagicMock()
+
+    ArtifactTransfer(workers=1).export(neptune_run, _mlflow_run(), _artifacts(2), 100, None, checkpoint)
+
+    mock_download_artifacts.assert_not_called()
+    neptune_run.wait.assert_not_called()
+
+
+@patch("neptune_mlflow_exporter.impl.scheduler.time.sleep")
+@patch("neptune_mlflow_exporter.impl.artifact_strategy.download_artifacts")
+def test_throttled_downloads_are_retried_by_the_scheduler(mock_download_artifacts, mock_sleep):
+    def download_artifacts(artifact_uri, dst_path):
+        if mock_download_artifacts.call_count == 1:
+            raise ConnectionError("connection reset")
+        with open(os.path.join(dst_path, os.path.basename(artifact_uri)), "w") as file:
+            file.write("content")
+
+    mock_download_artifacts.side_effect = download_artifacts
+    neptune_run = MagicMock()
+    scheduler = RequestScheduler("mlflow", max_concurrency=1)
+
+    transfer = ArtifactTransfer(workers=1, scheduler=scheduler)
+    try:
+        transfer.export(neptune_run, _mlflow_run(), _artifacts(1), 100, None, RunCheckpoint(None, "run"))
+    finally:
+        transfer.close()
+
+    assert mock_download_artifacts.call_count == 2
+    assert scheduler.instrumentation.to_dict()["counters"]["mlflow_throttled"] == 1
+    neptune_run["artifacts/model_0.pt"].upload.assert_called_once()
+
+
+def test_upload_is_timed_until_the_run_is_flushed(tmp_path):
+    neptune_run = MagicMock()
+    neptune_run.wait.side_effect = lambda: time.sleep(0.05)
+    instrumentation = ExportInstrumentation()
+    for artifact in _artifacts(2):
+        (tmp_path / artifact.info.path).write_bytes(b"x" * 10)
+
+    transfer = ArtifactTransfer(workers=1, instrumentation=instrumentation)
+    try:
+        transfer.export(neptune_run, _mlflow_run(str(tmp_path)), _artifacts(2), 100, None, RunCheckpoint(None, "run"))
+    finally:
+        transfer.close()
+
+    phases = instrumentation.to_dict()["phases"]
+    assert phases["artifact_upload_queue"]["count"] == 2
+    assert phases["artifact_upload"]["count"] == 1
+    assert phases["artifact_upload"]["sum_seconds"] >= 0.05
+
+
+def test_bandwidth_limiter_delays_transfers_over_the_limit():
+    limiter = BandwidthLimiter(bytes_per_second=1000)
+
+    start = time.monotonic()
+    limiter.consume(100)
+    limiter.consume(100)
+    limiter.consume(100)
+
+    assert time.monotonic() - start >= 0.2
+
+
+@patch("neptune_mlflow_exporter.impl.artifact_strategy.download_artifacts")
+def test_local_artifacts_are_uploaded_from_their_source(mock_download_artifacts, tmp_path):
+    neptune_run = MagicMock()
+    transfer = ArtifactTransfer(workers=1, artifact_mounts={"s3://bucket": str(tmp_path)})
+    artifact_dir = tmp_path / "1" / "run" / "artifacts"
+    os.makedirs(str(artifact_dir))
+
+    for artifact_uri in ["s3://bucket/1/run/artifacts", artifact_dir.as_uri()]:
+        transfer.export(neptune_run, _mlflow_run(artifact_uri), _artifacts(1), 100, None, RunCheckpoint(None, "run"))
+
+    mock_download_artifacts.assert_not_called()
+    upload = neptune_run.__getitem__.return_value.upload
+    assert [call.args[0] for call in upload.call_args_list] == [str(artifact_dir / "model_0.pt")] * 2
+
+
+@patch("neptune_mlflow_exporter.impl.artifact_strategy.download_artifacts")
+def test_identical_artifacts_are_uploaded_once(mock_download_artifacts, tmp_path):
+    def download_artifacts(artifact_uri, dst_path):
+        with open(os.path.join(dst_path, os.path.basename(artifact_uri)), "w") as file:
+            file.write("same content")
+
+    mock_download_artifacts.side_effect = download_artifacts
+    first_run, second_run = MagicMock(), MagicMock()
+
+    with ArtifactCache(str(tmp_path), DEDUP_REFERENCE) as cache:
+        transfer = ArtifactTransfer(workers=2, cache=cache)
+        try:
+            transfer.export(first_run, _mlflow_run(), _artifacts(1), 100, None, RunCheckpoint(None, "first"))
+            transfer.export(second_run, _mlflow_run(), _artifacts(1), 100, None, RunCheckpoint(None, "second"))
+        finally:
+            transfer.close()
+
+        assert (cache.saved_artifacts, cache.saved_bytes) == (1, 10)
+
+    first_run["artifacts/model_0.pt"].upload.assert_called_once()
+    second_run["artifacts/model_0.pt"].upload.assert_not_called()
+    second_run.__setitem__.assert_called_once()
+    assert second_run.__setitem__.call_args.args[0] == "artifact_references/model_0.pt"
+
+
+@patch("neptune_mlflow_exporter.impl.components.artifact_transfer.get_local_artifact_dir", return_value=None)
+def test_nested_artifacts_are_hashed_where_they_are_downloaded(mock_get_local_artifact_dir, tmp_path):
+    artifact_dir = tmp_path / "artifacts"
+    os.makedirs(str(artifact_dir / "outputs" / "model"))
+    with open(str(artifact_dir / "outputs" / "model" / "weights.bin"), "w") as file:
+        file.write("same content")
+    artifacts = [PlannedArtifact(FileInfo("outputs/model/weights.bin", False, 12), 12)]
+    first_run, second_run = MagicMock(), MagicMock()
+
+    # artifacts are downloaded by MLflow from the artifact store, as they would be from a remote one
+    with ArtifactCache(str(tmp_path / "cache"), DEDUP_REFERENCE) as cache:
+        transfer = ArtifactTransfer(workers=1, cache=cache)
+        try:
+            for neptune_run, run_id in [(first_run, "first"), (second_run, "second")]:
+                mlflow_run = _mlflow_run(artifact_dir.as_uri())
+                transfer.export(neptune_run, mlflow_run, artifacts, 100, None, RunCheckpoint(None, run_id))
+        finally:
+            transfer.close()
+
+        assert (cache.saved_artifacts, cache.saved_bytes) == (1, 12)
+
+    first_run["artifacts/outputs/model/weights.bin"].upload.assert_called_once()
+    assert second_run.__setitem__.call_args.args[0] == "artifact_references/outputs/model/weights.bin"
@@ -0,0 +1,19 @@
+import pytest
+
+from tests.benchmarks.generator import StoreShape
+from tests.benchmarks.runner import (
+    format_result,
+    run_case,
+)
+
+TINY = StoreShape(runs=2, metric_keys=2, points_per_key=10, params=2, artifacts=1, artifact_size=10)
+
+
+@pytest.mark.parametrize("store", ["file", "sqlite"])
+def test_benchmark_runs_on_a_tiny_store(store, tmp_path):
+    result = run_case("tiny", store, TINY, str(tmp_path), {"workers": 1, "artifact_workers": 1})
+
+    assert (result["case"], result["store"], result["shape"]["runs"]) == ("tiny", store, 2)
+    assert result["seconds"] > 0
+    assert result["runs_per_second"] > 0
+    assert format_result(result, None).startswith(f"tiny ({store}): ")
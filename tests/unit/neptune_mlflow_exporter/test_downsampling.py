@@ -0,0 +1,69 @@
+import math
+
+import pytest
+
+from neptune_mlflow_exporter.impl.downsampling import (
+    DownsamplingPolicy,
+    lttb,
+    min_max,
+    stride,
+)
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
+
+
+def _series(values):
+    return MetricSeries(values=values, timestamps=range(len(values)), steps=range(len(values)))
+
+
+def _sine(length):
+    return _series([math.sin(index / 50) for index in range(length)])
+
+
+@pytest.mark.parametrize("algorithm", [lttb, stride, min_max])
+def test_keeps_target_size_and_endpoints(algorithm):
+    indices = algorithm(_sine(10000), 100)
+
+    assert len(indices) <= 100
+    assert indices[0] == 0
+    assert indices[-1] == 9999
+    assert indices == sorted(set(indices))
+
+
+@pytest.mark.parametrize("algorithm", [lttb, stride, min_max])
+def test_short_series_are_not_changed(algorithm):
+    assert algorithm(_sine(50), 100) == list(range(50))
+
+
+def test_min_max_keeps_spikes():
+    values = [0.0] * 10000
+    values[1234] = 100.0
+    values[8765] = -100.0
+
+    indices = min_max(_series(values), 20)
+
+    assert 1234 in indices
+    assert 8765 in indices
+
+
+def test_lttb_keeps_spikes():
+    values = [0.0] * 10000
+    values[4321] = 100.0
+
+    assert 4321 in lttb(_series(values), 100)
+
+
+def test_policy_respects_key_patterns():
+    policy = DownsamplingPolicy("stride", 10, include=("train/*",), exclude=("train/lr",))
+    series = _sine(1000)
+
+    assert len(policy.apply("train/loss", series)) <= 10
+    assert len(policy.apply("train/lr", series)) == 1000
+    assert len(policy.apply("val/loss", series)) == 1000
+
+
+def test_policy_validates_arguments():
+    with pytest.raises(ValueError):
+        DownsamplingPolicy("unknown", 100)
+
+    with pytest.raises(ValueError):
+        DownsamplingPolicy("lttb", 2)
@@ -0,0 +1,89 @@
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from mlflow.entities import FileInfo
+
+from neptune_mlflow_exporter.impl.artifact_planner import PlannedArtifact
+from neptune_mlflow_exporter.impl.components import (
+    ExportConfig,
+    FetchedData,
+)
+from neptune_mlflow_exporter.impl.dry_run import (
+    CALIBRATION_BYTES,
+    DryRun,
+)
+
+
+def _mock_mlflow_run(run_id: str) -> MagicMock:
+    mlflow_run = MagicMock()
+    mlflow_run.info.run_id = run_id
+    mlflow_run.data.metrics = {"loss": 0.1, "accuracy": 0.9}
+    return mlflow_run
+
+
+def _dry_run(run_ids, *, existing=(), sample_size=20, artifact_size=1000, **config) -> DryRun:
+    fetcher = MagicMock()
+    fetcher.fetch_data.return_value = FetchedData(
+        mlflow_experiments={"0": MagicMock()},
+        mlflow_runs=[_mock_mlflow_run(run_id) for run_id in run_ids],
+        neptune_run_ids=set(existing),
+    )
+    metric_history_fetcher = MagicMock()
+    metric_history_fetcher.iter_metric_histories.side_effect = lambda run, keys: ((key, [0] * 100) for key in keys)
+    artifact_planner = MagicMock()
+    artifact_planner.plan.return_value = [PlannedArtifact(FileInfo("model.pt", False, artifact_size), artifact_size)]
+    return DryRun(
+        fetcher,
+        metric_history_fetcher,
+        artifact_planner,
+        ExportConfig(
+            exclude_artifacts=config.pop("exclude_artifacts", False),
+            max_artifact_size=artifact_size,
+            project_name=None,
+            api_token=None,
+            mlflow_tracking_uri=None,
+            **config,
+        ),
+        sample_size,
+    )
+
+
+@patch("neptune_mlflow_exporter.impl.dry_run.choose_upload_strategy")
+def test_existing_runs_are_skipped_and_sample_is_extrapolated(choose_upload_strategy):
+    dry_run = _dry_run([f"run-{index}" for index in range(10)], existing={"run-0", "run-1"}, sample_size=4)
+
+    estimate = dry_run.run()
+
+    assert (estimate.experiments, estimate.runs, estimate.skipped_runs, estimate.sampled_runs) == (1, 8, 2, 4)
+    assert estimate.metric_points == 8 * 2 * 100
+    assert (estimate.artifacts, estimate.artifact_bytes) == (8, 8 * 1000)
+    assert dry_run.metric_history_fetcher.iter_metric_histories.call_count == 4
+    assert choose_upload_strategy.return_value.download.call_count == 4
+
+
+@patch("neptune_mlflow_exporter.impl.dry_run.choose_upload_strategy")
+def test_incremental_export_counts_existing_runs(choose_upload_strategy):
+    estimate = _dry_run(["run-0", "run-1"], existing={"run-0"}, incremental=True).run()
+
+    assert (estimate.runs, estimate.skipped_runs) == (2, 0)
+
+
+@patch("neptune_mlflow_exporter.impl.dry_run.choose_upload_strategy")
+def test_excluded_artifacts_are_neither_planned_nor_downloaded(choose_upload_strategy):
+    dry_run = _dry_run(["run-0"], exclude_artifacts=True)
+
+    estimate = dry_run.run()
+
+    assert (estimate.artifacts, estimate.artifact_bytes, estimate.download_rate) == (0, 0, None)
+    dry_run.artifact_planner.plan.assert_not_called()
+    choose_upload_strategy.assert_not_called()
+
+
+@patch("neptune_mlflow_exporter.impl.dry_run.choose_upload_strategy")
+def test_artifacts_above_calibration_budget_are_not_downloaded(choose_upload_strategy):
+    estimate = _dry_run(["run-0", "run-1"], artifact_size=CALIBRATION_BYTES + 1).run()
+
+    assert (estimate.artifacts, estimate.download_rate) == (2, None)
+    choose_upload_strategy.return_value.download.assert_not_called()
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from unittest.mock import (
+    ANY,
+    MagicMock,
+)
+
+from mlflow.entities import (
+    Metric,
+    Run,
+    RunData,
+    RunInfo,
+)
+
+from neptune_mlflow_exporter.impl.components import Exporter
+from neptune_mlflow_exporter.impl.downsampling import DownsamplingPolicy
+from neptune_mlflow_exporter.impl.journal import (
+    ExportJournal,
+    RunCheckpoint,
+)
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
+
+
+def _mlflow_run(metrics) -> Run:
+    info = MagicMock(spec=RunInfo)
+    info.run_id = "run"
+    return Run(run_info=info, run_data=RunData(metrics=metrics[-1:]))
+
+
+def _history():
+    return [Metric("loss", float(step), 1000 * (step + 1), step) for step in range(5)]
+
+
+def test_sync_run_data_appends_only_new_points(tmp_path):
+    client = MagicMock()
+    client.get_metric_history.return_value = _history()
+    neptune_run = MagicMock()
+
+    with ExportJournal(str(tmp_path)) as journal:
+        journal.set_metric_cursors("run", {"loss": (2, 3000)})
+        checkpoint = RunCheckpoint(journal, "run")
+
+        Exporter(client).sync_run_data(neptune_run, _mlflow_run(_history()), checkpoint)
+        checkpoint.commit(neptune_run)
+
+        assert journal.get_metric_cursors("run") == {"loss": (4, 5000)}
+
+    neptune_run["run_data/metrics/loss"].extend.assert_called_once_with([3.0, 4.0], steps=[3, 4], timestamps=[4.0, 5.0])
+
+
+class _FakeNeptuneRun:
+    """Keeps the fields and series written to a Neptune run, and fails when a whole series is read back."""
+
+    def __init__(self):
+        self.fields = {}
+        self.series = defaultdict(list)
+
+    def __setitem__(self, path, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                self[f"{path}/{key}"] = item
+        else:
+            self.fields[path] = value
+
+    def __getitem__(self, path):
+        return _FakeHandler(self, path)
+
+    def exists(self, path):
+        return path in self.series or any(field == path or field.startswith(path + "/") for field in self.fields)
+
+
+class _FakeHandler:
+    def __init__(self, run, path):
+        self._run = run
+        self._path = path
+
+    def extend(self, values, steps, timestamps):
+        self._run.series[self._path].extend(zip(steps, values))
+
+    def fetch(self):
+        prefix = self._path + "/"
+        return {field[len(prefix) :]: value for field, value in self._run.fields.items() if field.startswith(prefix)}
+
+    def fetch_values(self, include_timestamp=True):
+        raise AssertionError(f"the whole series {self._path} was fetched")
+
+
+def test_sync_run_data_reads_cursor_from_neptune_without_journal():
+    client = MagicMock()
+    client.get_metric_history.return_value = _history()[:3]
+    neptune_run = _FakeNeptuneRun()
+    exporter = Exporter(client, record_metric_cursors=True)
+
+    exporter.export_run_data(neptune_run, _mlflow_run(_history()[:3]))
+    client.get_metric_history.return_value = _history()
+    exporter.sync_run_data(neptune_run, _mlflow_run(_history()))
+
+    assert neptune_run.series["run_data/metrics/loss"] == [(step, float(step)) for step in range(5)]
+    assert neptune_run["sync/metric_cursors/loss"].fetch() == {"step": 4, "timestamp": 5000}
+
+
+def test_export_run_data_records_cursors_in_neptune_only_if_asked_to():
+    client = MagicMock()
+    client.get_metric_history.return_value = _history()
+    neptune_run = _FakeNeptuneRun()
+
+    Exporter(client).export_run_data(neptune_run, _mlflow_run(_history()))
+
+    assert not neptune_run.exists("sync/metric_cursors")
+
+
+def test_export_run_data_records_metric_cursor():
+    client = MagicMock()
+    client.get_metric_history.return_value = _history()
+    checkpoint = RunCheckpoint(None, "run")
+
+    Exporter(client).export_run_data(MagicMock(), _mlflow_run(_history()), checkpoint)
+
+    assert checkpoint.get_metric_cursor("loss") == (4, 5000)
+
+
+def test_export_run_data_streams_history_page_by_page():
+    fetcher = MagicMock()
+    fetcher.iter_metric_pages.return_value = iter(
+        [("loss", MetricSeries.from_metrics(_history()[:3])), ("loss", MetricSeries.from_metrics(_history()[3:]))]
+    )
+    fetcher.iter_metric_histories.return_value = iter([])
+    neptune_run = MagicMock()
+    checkpoint = RunCheckpoint(None, "run")
+
+    Exporter(MagicMock(), fetcher, metric_page_size=3).export_run_data(neptune_run, _mlflow_run(_history()), checkpoint)
+
+    fetcher.iter_metric_pages.assert_called_once_with(ANY, ["loss"], 3)
+    extend = neptune_run["run_data/metrics/loss"].extend
+    assert [call.args[0] for call in extend.call_args_list] == [[0.0, 1.0, 2.0], [3.0, 4.0]]
+    assert checkpoint.get_metric_cursor("loss") == (4, 5000)
+
+
+def test_export_run_data_continues_a_history_after_the_checkpoint_cursor():
+    client = MagicMock()
+    client.get_metric_history.return_value = _history()
+    neptune_run = MagicMock()
+    checkpoint = RunCheckpoint(None, "run")
+    # a previous attempt exported the first three points before failing
+    checkpoint.update_metric_cursor("loss", (2, 3000))
+
+    Exporter(client).export_run_data(neptune_run, _mlflow_run(_history()), checkpoint)
+
+    extend = neptune_run["run_data/metrics/loss"].extend
+    assert [call.args[0] for call in extend.call_args_list] == [[3.0, 4.0]]
+
+
+def test_export_run_data_downsamples_long_histories():
+    history = [Metric("loss", float(step), 1000 * (step + 1), step) for step in range(100)]
+    client = MagicMock()
+    client.get_metric_history.return_value = history
+    neptune_run = MagicMock()
+    checkpoint = RunCheckpoint(None, "run")
+
+    exporter = Exporter(client, downsampling=DownsamplingPolicy("stride", 10))
+    exporter.export_run_data(neptune_run, _mlflow_run(history), checkpoint)
+
+    values = neptune_run["run_data/metrics/loss"].extend.call_args.args[0]
+    assert len(values) <= 10
+    assert checkpoint.get_metric_cursor("loss") == (99, 100000)
+
+
+def test_close_releases_only_components_created_by_the_exporter():
+    artifact_transfer = MagicMock()
+    owning = Exporter(MagicMock())
+    borrowing = Exporter(MagicMock(), artifact_transfer=artifact_transfer)
+
+    owning.close()
+    borrowing.close()
+
+    assert owning.artifact_transfer._executor._shutdown
+    artifact_transfer.close.assert_not_called()
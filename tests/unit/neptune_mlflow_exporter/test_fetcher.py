@@ -0,0 +1,124 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from mlflow.entities import ViewType
+from mlflow.store.entities import PagedList
+
+from neptune_mlflow_exporter.impl.components import Fetcher
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+
+
+def _paged_search_runs(pages):
+    def search_runs(*, page_token, **kwargs):
+        index = int(page_token or 0)
+        token = str(index + 1) if index + 1 < len(pages) else None
+        return PagedList(pages[index], token)
+
+    return search_runs
+
+
+def test_iter_mlflow_runs_is_lazy():
+    client = MagicMock()
+    client.search_runs.side_effect = _paged_search_runs([["a", "b"], ["c"]])
+
+    runs = Fetcher(MagicMock(), client).iter_mlflow_runs(["0"])
+
+    assert next(runs) == "a"
+    assert client.search_runs.call_count == 1
+
+    assert list(runs) == ["b", "c"]
+    assert client.search_runs.call_count == 2
+
+
+def test_iter_mlflow_runs_handles_empty_server():
+    client = MagicMock()
+    client.search_runs.side_effect = _paged_search_runs([[]])
+
+    assert Fetcher(MagicMock(), client).get_all_mlflow_runs(["0"]) == []
+
+
+def test_selection_is_pushed_into_search_runs():
+    client = MagicMock()
+    client.search_runs.side_effect = _paged_search_runs([["a", "b"], ["c"], ["d"]])
+    selection = RunSelection(
+        filter_string="tags.team = 'vision'",
+        started_after=datetime.fromtimestamp(1),
+        lifecycle_stage="active",
+        max_runs=3,
+    )
+
+    runs = Fetcher(MagicMock(), client, selection=selection).get_all_mlflow_runs(["0"])
+
+    assert runs == ["a", "b", "c"]
+    assert [call.kwargs["max_results"] for call in client.search_runs.call_args_list] == [3, 1]
+    assert client.search_runs.call_args.kwargs["filter_string"] == (
+        "tags.team = 'vision' and attributes.start_time >= 1000"
+    )
+    assert client.search_runs.call_args.kwargs["run_view_type"] == ViewType.ACTIVE_ONLY
+
+
+def test_selected_experiments_are_fetched_without_searching():
+    client = MagicMock()
+    client.get_experiment_by_name.return_value.experiment_id = "7"
+
+    fetcher = Fetcher(MagicMock(), client, selection=RunSelection(experiment_names=["exp"]))
+
+    experiments = fetcher.get_all_mlflow_experiments()
+
+    assert list(experiments) == ["7"]
+    client.get_experiment_by_name.assert_called_once_with("exp")
+    client.search_experiments.assert_not_called()
+
+
+def test_updated_experiments_are_searched_by_last_update_time():
+    client = MagicMock()
+    client.search_experiments.return_value = PagedList([], None)
+
+    experiments = Fetcher(MagicMock(), client).get_all_mlflow_experiments(updated_since=datetime.fromtimestamp(1))
+
+    assert experiments == {}
+    assert client.search_experiments.call_args.kwargs["filter_string"] == "last_update_time >= 1000"
+
+
+def test_runs_are_counted_only_by_readers():
+    reader = MagicMock()
+    reader.count_runs.return_value = 5
+
+    assert Fetcher(MagicMock(), MagicMock(), reader=reader).count_mlflow_runs(["0"]) == 5
+    limited = RunSelection(max_runs=3)
+    assert Fetcher(MagicMock(), MagicMock(), reader=reader, selection=limited).count_mlflow_runs(["0"]) == 3
+    assert Fetcher(MagicMock(), MagicMock()).count_mlflow_runs(["0"]) is None
+
+
+def test_reader_is_bypassed_for_filter_strings():
+    client, reader = MagicMock(), MagicMock()
+    client.search_runs.side_effect = _paged_search_runs([["a"]])
+    reader.iter_runs.return_value = iter(["b", "c"])
+
+    limited = RunSelection(max_runs=1)
+    assert Fetcher(MagicMock(), client, reader=reader, selection=limited).get_all_mlflow_runs(["0"]) == ["b"]
+
+    selection = RunSelection(filter_string="params.lr = '0.1'")
+    assert Fetcher(MagicMock(), client, reader=reader, selection=selection).get_all_mlflow_runs(["0"]) == ["a"]
+
+
+def test_changed_runs_are_searched_once_per_change():
+    def make_run(run_id):
+        run = MagicMock()
+        run.info.run_id = run_id
+        return run
+
+    started, ended, running = make_run("started"), make_run("ended"), make_run("running")
+    results = {
+        "attributes.start_time >= 1000": [started, running],
+        "attributes.end_time >= 1000": [ended],
+        "attributes.status = 'RUNNING'": [running],
+    }
+    client = MagicMock()
+    client.search_runs.side_effect = lambda *, filter_string, **kwargs: PagedList(results[filter_string], None)
+    selection = RunSelection(changed_since=datetime.fromtimestamp(1))
+
+    runs = list(Fetcher(MagicMock(), client).iter_mlflow_runs(["0"], selection))
+
+    assert runs == [started, running, ended]
+    assert client.search_runs.call_count == 3
@@ -0,0 +1,141 @@
+import os
+from datetime import datetime
+
+import pytest
+import yaml
+
+from neptune_mlflow_exporter.impl.readers import (
+    FileStoreReader,
+    get_store_reader,
+)
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+@pytest.fixture
+def mlruns(tmp_path):
+    root = tmp_path / "mlruns"
+
+    _write(
+        str(root / "1" / "meta.yaml"),
+        yaml.safe_dump(
+            {
+                "experiment_id": "1",
+                "name": "exp",
+                "artifact_location": "file:///artifacts",
+                "lifecycle_stage": "active",
+                "creation_time": 1000,
+                "last_update_time": 2000,
+            }
+        ),
+    )
+    _write(str(root / "1" / "tags" / "team"), "research")
+
+    run_directory = root / "1" / "abc"
+    _write(
+        str(run_directory / "meta.yaml"),
+        yaml.safe_dump(
+            {
+                "run_id": "abc",
+                "run_uuid": "abc",
+                "run_name": "first",
+                "experiment_id": "1",
+                "user_id": "user",
+                "status": 3,
+                "start_time": 1000,
+                "end_time": 5000,
+                "lifecycle_stage": "active",
+                "artifact_uri": "file:///artifacts/abc",
+            }
+        ),
+    )
+    _write(str(run_directory / "params" / "lr"), "0.1")
+    _write(str(run_directory / "tags" / "nested" / "tag"), "value")
+    _write(str(run_directory / "metrics" / "loss"), "1000 0.5 0\n2000 0.25 1\n3000 nan 2\n")
+    _write(str(run_directory / "metrics" / "val" / "acc"), "1000 0.9\n")
+
+    _write(str(root / "2" / "meta.yaml"), yaml.safe_dump({"experiment_id": "2", "lifecycle_stage": "deleted"}))
+
+    return str(root)
+
+
+def test_reads_active_experiments(mlruns):
+    experiments = FileStoreReader(mlruns).get_experiments()
+
+    assert list(experiments) == ["1"]
+    assert experiments["1"].name == "exp"
+    assert experiments["1"].tags == {"team": "research"}
+
+
+def test_reads_experiments_updated_since(mlruns):
+    reader = FileStoreReader(mlruns)
+
+    assert list(reader.get_experiments(updated_since=2000)) == ["1"]
+    assert list(reader.get_experiments(updated_since=2001)) == []
+
+
+def test_reads_runs_with_params_tags_and_metric_keys(mlruns):
+    (run,) = FileStoreReader(mlruns).iter_runs(["1"])
+
+    assert run.info.run_id == "abc"
+    assert run.info.run_name == "first"
+    assert run.info.status == "FINISHED"
+    assert run.data.params == {"lr": "0.1"}
+    assert run.data.tags == {"nested/tag": "value"}
+    assert set(run.data.metrics) == {"loss", "val/acc"}
+
+
+def test_skips_runs_which_are_not_selected(mlruns):
+    reader = FileStoreReader(mlruns)
+
+    assert [run.info.run_id for run in reader.iter_runs(["1"], RunSelection(lifecycle_stage="active"))] == ["abc"]
+    assert list(reader.iter_runs(["1"], RunSelection(lifecycle_stage="deleted"))) == []
+
+    started_after = RunSelection(started_after=datetime.fromtimestamp(2))
+    assert list(reader.iter_runs(["1"], started_after)) == []
+    started_before = RunSelection(started_before=datetime.fromtimestamp(2))
+    assert [run.info.run_id for run in reader.iter_runs(["1"], started_before)] == ["abc"]
+
+    ended_since = RunSelection(changed_since=datetime.fromtimestamp(4))
+    assert [run.info.run_id for run in reader.iter_runs(["1"], ended_since)] == ["abc"]
+    assert list(reader.iter_runs(["1"], RunSelection(changed_since=datetime.fromtimestamp(6)))) == []
+
+
+def test_counts_selected_runs(mlruns):
+    reader = FileStoreReader(mlruns)
+
+    assert reader.count_runs(["1", "2"]) == 1
+    assert reader.count_runs(["1"], RunSelection(started_after=datetime.fromtimestamp(2))) == 0
+
+
+def test_reads_metric_series(mlruns):
+    reader = FileStoreReader(mlruns)
+    (run,) = reader.iter_runs(["1"])
+
+    loss = reader.get_metric_series(run, "loss")
+    assert loss.values.tolist()[:2] == [0.5, 0.25]
+    assert loss.steps.tolist() == [0, 1, 2]
+    assert loss.timestamps.tolist() == [1000, 2000, 3000]
+
+    # files of old MLflow versions have no step column
+    assert reader.get_metric_series(run, "val/acc").steps.tolist() == [0]
+
+
+def test_reads_metric_pages(mlruns):
+    reader = FileStoreReader(mlruns)
+    (run,) = reader.iter_runs(["1"])
+
+    pages = [(key, series.steps.tolist()) for key, series in reader.iter_metric_pages(run, ["loss", "val/acc"], 2)]
+
+    assert pages == [("loss", [0, 1]), ("loss", [2]), ("val/acc", [0])]
+
+
+def test_store_reader_is_chosen_for_local_paths(mlruns):
+    assert isinstance(get_store_reader(mlruns), FileStoreReader)
+    assert isinstance(get_store_reader("file://" + mlruns), FileStoreReader)
+    assert get_store_reader("http://localhost:5000") is None
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from neptune_mlflow_exporter.impl.instrumentation import (
+    ExportInstrumentation,
+    Histogram,
+    ProgressLine,
+)
+
+
+def test_histogram_quantiles_are_bucket_bounds():
+    histogram = Histogram(buckets=(0.1, 1.0, 10.0))
+
+    for value in (0.05, 0.05, 0.5, 20.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 0, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(1.0) == 20.0
+    assert Histogram().quantile(0.5) is None
+
+
+def test_phases_are_recorded_even_if_they_fail():
+    instrumentation = ExportInstrumentation()
+
+    with instrumentation.phase("run"):
+        pass
+    with pytest.raises(RuntimeError), instrumentation.phase("run"):
+        raise RuntimeError()
+
+    assert instrumentation.to_dict()["phases"]["run"]["count"] == 2
+
+
+def test_iterator_items_are_timed():
+    instrumentation = ExportInstrumentation()
+
+    assert list(instrumentation.time_iterator("fetch_run", iter([1, 2, 3]))) == [1, 2, 3]
+    assert instrumentation.to_dict()["phases"]["fetch_run"]["count"] == 3
+
+
+def test_report_formats(tmp_path):
+    instrumentation = ExportInstrumentation()
+    instrumentation.increment("metric_points", 100)
+    instrumentation.increment("runs_exported")
+    instrumentation.observe("run_info", 0.02)
+
+    instrumentation.write_report(str(tmp_path / "report.json"))
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report["counters"] == {"metric_points": 100, "runs_exported": 1}
+    assert report["phases"]["run_info"]["buckets"]["0.025"] == 1
+
+    instrumentation.write_report(str(tmp_path / "report.prom"))
+    lines = (tmp_path / "report.prom").read_text().splitlines()
+    assert "neptune_mlflow_export_metric_points_total 100" in lines
+    assert 'neptune_mlflow_export_phase_seconds_bucket{phase="run_info",le="0.01"} 0' in lines
+    assert 'neptune_mlflow_export_phase_seconds_bucket{phase="run_info",le="0.025"} 1' in lines
+    assert 'neptune_mlflow_export_phase_seconds_count{phase="run_info"} 1' in lines
+
+
+def test_progress_shows_eta_once_total_is_known():
+    progress = ProgressLine(ExportInstrumentation())
+
+    assert "ETA" not in progress.format(5)
+    assert progress.format(5).startswith("Progress: 5 runs")
+    assert progress.format(5, 10).startswith("Progress: 5/10 runs")
+    assert "ETA" in progress.format(5, 10)
@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+from neptune_mlflow_exporter.impl.journal import (
+    RUN_INFO_STAGE,
+    ExportJournal,
+    RunCheckpoint,
+    metric_stage,
+)
+
+
+def test_stages_survive_reopening(tmp_path):
+    with ExportJournal(str(tmp_path)) as journal:
+        checkpoint = RunCheckpoint(journal, "run")
+        checkpoint.start_run()
+        checkpoint.complete(RUN_INFO_STAGE)
+        checkpoint.complete(metric_stage("loss"))
+        checkpoint.commit(MagicMock())
+
+    with ExportJournal(str(tmp_path)) as journal:
+        checkpoint = RunCheckpoint(journal, "run")
+
+        assert checkpoint.is_run_started()
+        assert not checkpoint.is_run_completed()
+        assert checkpoint.is_completed(metric_stage("loss"))
+        assert not checkpoint.is_completed(metric_stage("acc"))
+
+
+def test_stages_are_recorded_only_after_neptune_sync(tmp_path):
+    neptune_run = MagicMock()
+
+    with ExportJournal(str(tmp_path)) as journal:
+        checkpoint = RunCheckpoint(journal, "run")
+        checkpoint.start_run()
+        checkpoint.complete(RUN_INFO_STAGE)
+
+        assert journal.get_completed_stages("run") == set()
+
+        checkpoint.complete_run(neptune_run)
+
+        neptune_run.wait.assert_called_once()
+        assert journal.get_completed_stages("run") == {RUN_INFO_STAGE}
+        assert journal.is_run_completed("run")
+
+
+def test_checkpoint_without_journal_records_nothing():
+    neptune_run = MagicMock()
+    checkpoint = RunCheckpoint(None, "run")
+
+    checkpoint.complete(RUN_INFO_STAGE)
+    checkpoint.complete_run(neptune_run)
+
+    assert not checkpoint.is_run_started()
+    neptune_run.wait.assert_not_called()
@@ -0,0 +1,87 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from mlflow.entities import Metric
+
+from neptune_mlflow_exporter.impl.components import MetricHistoryFetcher
+
+
+def _values(histories):
+    return [(key, series.values.tolist()) for key, series in histories]
+
+
+def test_histories_are_fetched_concurrently_and_yielded_in_key_order():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def get_metric_history(run_id, key):
+        # would time out if the three keys were not requested at the same time
+        barrier.wait()
+        return [Metric(key, float(ord(key)), 0, 0)]
+
+    client = MagicMock()
+    client.get_metric_history.side_effect = get_metric_history
+
+    fetcher = MetricHistoryFetcher(client, workers=3)
+    try:
+        histories = _values(fetcher.iter_metric_histories(MagicMock(), ["c", "a", "b"]))
+    finally:
+        fetcher.close()
+
+    assert histories == [("c", [99.0]), ("a", [97.0]), ("b", [98.0])]
+
+
+def test_single_worker_fetches_sequentially():
+    client = MagicMock()
+    client.get_metric_history.side_effect = lambda run_id, key: [Metric(key, 1.0, 0, 0)]
+
+    fetcher = MetricHistoryFetcher(client)
+
+    assert _values(fetcher.iter_metric_histories(MagicMock(), ["a", "b"])) == [("a", [1.0]), ("b", [1.0])]
+
+
+def test_reader_is_used_instead_of_client():
+    client = MagicMock()
+    reader = MagicMock()
+
+    fetcher = MetricHistoryFetcher(client, reader=reader)
+    list(fetcher.iter_metric_histories(MagicMock(), ["a"]))
+
+    reader.iter_metric_series.assert_called_once()
+    client.get_metric_history.assert_not_called()
+
+
+def test_requests_ahead_are_limited_to_the_workers():
+    in_flight, max_in_flight = [], []
+    lock = threading.Lock()
+
+    def get_metric_history(run_id, key):
+        with lock:
+            in_flight.append(key)
+            max_in_flight.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.remove(key)
+        return [Metric(key, 1.0, 0, 0)]
+
+    client = MagicMock()
+    client.get_metric_history.side_effect = get_metric_history
+    keys = [f"key{index}" for index in range(10)]
+
+    fetcher = MetricHistoryFetcher(client, workers=2)
+    try:
+        histories = list(fetcher.iter_metric_pages(MagicMock(), keys, 2))
+    finally:
+        fetcher.close()
+
+    assert [key for key, _ in histories] == keys
+    assert max(max_in_flight) == 2
+
+
+def test_whole_histories_are_yielded_as_pages_without_pagination():
+    client = MagicMock()
+    client.get_metric_history.side_effect = lambda run_id, key: [Metric(key, 1.0, 0, step) for step in range(3)]
+
+    fetcher = MetricHistoryFetcher(client)
+
+    assert _values(fetcher.iter_metric_pages(MagicMock(), ["a"], 2)) == [("a", [1.0, 1.0, 1.0])]
@@ -0,0 +1,81 @@
+import time
+import tracemalloc
+
+from mlflow.entities import Metric
+
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
+
+
+def _metrics(length):
+    return [Metric("loss", step / 7, 1600000000000 + step, step) for step in range(length)]
+
+
+def test_chunks_match_legacy_conversion():
+    metrics = _metrics(25) + [Metric("loss", 1.0, 0, 25)]
+
+    chunks = list(MetricSeries.from_metrics(metrics).iter_chunks(10))
+
+    assert [len(values) for values, _, _ in chunks] == [10, 10, 6]
+    assert sum((values for values, _, _ in chunks), []) == [metric.value for metric in metrics]
+    assert sum((steps for _, steps, _ in chunks), []) == [metric.step for metric in metrics]
+    assert sum((timestamps for _, _, timestamps in chunks), []) == [
+        metric.timestamp / 1e3 if metric.timestamp else None for metric in metrics
+    ]
+
+
+def test_cursor_and_filtering():
+    series = MetricSeries(values=[1.0, 2.0, 3.0, 4.0], timestamps=[10, 30, 20, 40], steps=[0, 1, 1, 2])
+
+    assert series.last_cursor() == (2, 40)
+    assert series.after((1, 20)).values.tolist() == [2.0, 4.0]
+    assert series.take([0, 3]).steps.tolist() == [0, 2]
+    assert len(MetricSeries().after((0, 0))) == 0
+
+
+def _legacy_conversion(metrics):
+    metric_values = list(map(lambda metric: metric.value, metrics))
+    metric_timestamps = list(map(lambda metric: metric.timestamp / 1e3 if metric.timestamp else None, metrics))
+    metric_steps = list(map(lambda metric: metric.step, metrics))
+    return metric_values, metric_steps, metric_timestamps
+
+
+def _chunked_conversion(metrics):
+    values, steps, timestamps = [], [], []
+    for chunk_values, chunk_steps, chunk_timestamps in MetricSeries.from_metrics(metrics).iter_chunks(10000):
+        values.extend(chunk_values)
+        steps.extend(chunk_steps)
+        timestamps.extend(chunk_timestamps)
+    return values, steps, timestamps
+
+
+def _streamed_conversion(metrics):
+    for _ in MetricSeries.from_metrics(metrics).iter_chunks(10000):
+        pass
+
+
+def _measure(conversion, metrics):
+    start = time.perf_counter()
+    conversion(metrics)
+    elapsed = time.perf_counter() - start
+
+    # measured in a separate run, since tracing allocations slows the conversion down
+    tracemalloc.start()
+    try:
+        conversion(metrics)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def test_conversion_benchmark():
+    metrics = _metrics(200000)
+
+    assert _chunked_conversion(metrics) == _legacy_conversion(metrics)
+
+    legacy_time, legacy_peak = _measure(_legacy_conversion, metrics)
+    streamed_time, streamed_peak = _measure(_streamed_conversion, metrics)
+
+    assert streamed_peak < legacy_peak
+    # without NumPy the chunks are converted with Python loops, which may be somewhat slower, but not by much
+    assert streamed_time < 2 * legacy_time
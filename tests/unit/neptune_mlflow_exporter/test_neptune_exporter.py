@@ -1,3 +1,12 @@
+import pytest
+
+from neptune_mlflow_exporter.impl import NeptuneExporter
+
+
 class TestNeptuneExporter:
     def test_client_received_correct_tracking_uri(self, neptune_exporter):
         assert neptune_exporter.mlflow_client.tracking_uri == "test_tracking_uri"
+
+    def test_artifact_dedup_requires_state_dir(self, neptune_project):
+        with pytest.raises(ValueError, match="requires a state directory"):
+            NeptuneExporter(project=neptune_project, artifact_dedup="skip")
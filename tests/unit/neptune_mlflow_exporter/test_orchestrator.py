@@ -0,0 +1,198 @@
+import threading
+import time
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from neptune_mlflow_exporter.impl.components import (
+    ExportConfig,
+    StreamedData,
+)
+from neptune_mlflow_exporter.impl.journal import (
+    EXPERIMENT_STAGE,
+    RUN_INFO_STAGE,
+    ExportJournal,
+)
+from neptune_mlflow_exporter.impl.orchestrator import (
+    RUN_RETRY_BACKOFF,
+    ExportOrchestrator,
+)
+
+
+def _mock_mlflow_run(run_id: str) -> MagicMock:
+    mlflow_run = MagicMock()
+    mlflow_run.info.run_id = run_id
+    mlflow_run.info.run_name = f"name-{run_id}"
+    mlflow_run.info.experiment_id = "0"
+    return mlflow_run
+
+
+def _orchestrator(
+    run_ids, *, existing=(), workers=1, exporter=None, journal=None, total_runs=None
+) -> ExportOrchestrator:
+    fetcher = MagicMock()
+    fetcher.stream_data.return_value = StreamedData(
+        mlflow_experiments={"0": MagicMock()},
+        mlflow_runs=iter([_mock_mlflow_run(run_id) for run_id in run_ids]),
+        neptune_run_ids=set(existing),
+        total_runs=total_runs,
+    )
+    config = ExportConfig(
+        exclude_artifacts=True,
+        max_artifact_size=50,
+        project_name=None,
+        api_token=None,
+        mlflow_tracking_uri=None,
+        workers=workers,
+    )
+    return ExportOrchestrator(fetcher=fetcher, exporter=exporter or MagicMock(), config=config, journal=journal)
+
+
+@patch("neptune_mlflow_exporter.impl.orchestrator.click.echo")
+@patch("neptune_mlflow_exporter.impl.orchestrator.NeptuneRun")
+def test_output_order_does_not_depend_on_workers(mock_neptune_run, mock_echo):
+    exporter = MagicMock()
+    # the earliest runs are the slowest ones, so they finish last
+    exporter.export_run_info.side_effect = lambda _, run: time.sleep(0.05 / int(run.info.run_id))
+
+    _orchestrator(["1", "2", "3", "4"], existing={"3"}, workers=4, exporter=exporter).run()
+
+    assert [c.args[0] for c in mock_echo.call_args_list] == [
+        "Loading mlflow_run 'name-1'",
+        "Run 'name-1' was saved",
+        "Loading mlflow_run 'name-2'",
+        "Run 'name-2' was saved",
+        "Ignoring mlflow_run 'name-3' since it already exists",
+        "Loading mlflow_run 'name-4'",
+        "Run 'name-4' was saved",
+    ]
+
+
+@patch("neptune_mlflow_exporter.impl.orchestrator.click.echo")
+@patch("neptune_mlflow_exporter.impl.orchestrator.NeptuneRun")
+def test_failed_run_does_not_stop_other_runs(mock_neptune_run, mock_echo):
+    exporter = MagicMock()
+
+    def fail_first(_, run):
+        if run.info.run_id == "1":
+            raise RuntimeError("boom")
+
+    exporter.export_run_info.side_effect = fail_first
+
+    _orchestrator(["1", "2"], workers=2, exporter=exporter).run()
+
+    messages = [c.args[0] for c in mock_echo.call_args_list]
+    assert "Error exporting run 'name-1': boom" in messages
+    assert "Run 'name-2' was saved" in messages
+    assert exporter.export_run_data.call_count == 1
+
+
+@patch("neptune_mlflow_exporter.impl.orchestrator.click.echo")
+@patch("neptune_mlflow_exporter.impl.orchestrator.NeptuneRun")
+def test_concurrency_is_bounded_by_workers(mock_neptune_run, mock_echo):
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def track(*_):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+
+    exporter = MagicMock()
+    exporter.export_run_info.side_effect = track
+
+    _orchestrator([str(i) for i in range(1, 13)], workers=3, exporter=exporter).run()
+
+    assert 1 < peak[0] <= 3
+
+
+@patch("neptune_mlflow_exporter.impl.orchestrator.click.echo")
+@patch("neptune_mlflow_exporter.impl.orchestrator.NeptuneRun")
+def test_journal_resumes_partially_exported_runs(mock_neptune_run, mock_echo, tmp_path):
+    exporter = MagicMock()
+
+    with ExportJournal(str(tmp_path)) as journal:
+        journal.start_run("1")
+        journal.complete_run("1")
+        journal.start_run("2")
+        journal.mark_stages_completed("2", [EXPERIMENT_STAGE, RUN_INFO_STAGE])
+
+        # run "2" exists in Neptune, but it is in the journal, so it is resumed rather than skipped
+        _orchestrator(["1", "2"], existing={"2"}, exporter=exporter, journal=journal).run()
+
+        assert journal.is_run_completed("2")
+
+    assert [c.args[0] for c in mock_echo.call_args_list] == [
+        "Ignoring mlflow_run 'name-1' since it was already exported",
+        "Resuming mlflow_run 'name-2'",
+        "Run 'name-2' was saved",
+    ]
+    exporter.export_experiment_metadata.assert_not_called()
+    exporter.export_run_info.assert_not_called()
+    exporter.export_run_data.assert_called_once()
+
+
+@patch("neptune_mlflow_exporter.impl.orchestrator.time.sleep")
+@patch("neptune_mlflow_exporter.impl.orchestrator.click.echo")
+@patch("neptune_mlflow_exporter.impl.orchestrator.NeptuneRun")
+def test_failed_runs_are_retried_after_other_runs(mock_neptune_run, mock_echo, mock_sleep):
+    exporter = MagicMock()
+    failures = [TimeoutError("timed out")]
+
+    def fail_once(_, run):
+        if run.info.run_id == "1" and failures:
+            raise failures.pop()
+
+    exporter.export_run_info.side_effect = fail_once
+
+    orchestrator = _orchestrator(["1", "2"], exporter=exporter)
+    orchestrator.run()
+
+    assert [c.args[0] for c in mock_echo.call_args_list] == [
+        "Loading mlflow_run 'name-1'",
+        "Error exporting run 'name-1': timed out",
+        "Loading mlflow_run 'name-2'",
+        "Run 'name-2' was saved",
+        "Retrying 1 failed runs, attempt 1 of 2",
+        "Resuming mlflow_run 'name-1'",
+        "Run 'name-1' was saved",
+    ]
+    # the failure was caused by throttling, so the retry waits for the backend to recover
+    mock_sleep.assert_called_once_with(RUN_RETRY_BACKOFF)
+    # the retry continues after the experiment metadata, which already reached Neptune without a journal
+    assert exporter.export_experiment_metadata.call_count == 2
+    assert orchestrator._completed == 2
+
+
+@patch("neptune_mlflow_exporter.impl.orchestrator.click.echo")
+@patch("neptune_mlflow_exporter.impl.orchestrator.NeptuneRun")
+def test_runs_failing_to_open_are_retried(mock_neptune_run, mock_echo):
+    mock_neptune_run.side_effect = RuntimeError("unavailable")
+
+    orchestrator = _orchestrator(["1"])
+    orchestrator.run()
+
+    messages = [c.args[0] for c in mock_echo.call_args_list]
+    assert messages.count("Error exporting run 'name-1': unavailable") == 3
+    assert messages[-1] == "1 runs could not be exported"
+    assert [mlflow_run.info.run_id for mlflow_run in orchestrator.failed_runs] == ["1"]
+
+
+@patch("neptune_mlflow_exporter.impl.orchestrator.click.echo")
+@patch("neptune_mlflow_exporter.impl.orchestrator.NeptuneRun")
+def test_progress_has_a_total_from_the_first_run_if_runs_were_counted(mock_neptune_run, mock_echo):
+    counted = _orchestrator([str(i) for i in range(1, 6)], total_runs=5)
+    counted.progress = MagicMock()
+    streamed = _orchestrator([str(i) for i in range(1, 6)])
+    streamed.progress = MagicMock()
+
+    counted.run()
+    streamed.run()
+
+    assert [c.args for c in counted.progress.update.call_args_list] == [(n, 5) for n in range(1, 6)]
+    # otherwise the total is known only once the last window of runs is being reported
+    assert [c.args[1] for c in streamed.progress.update.call_args_list] == [None, None, None, None, 5]
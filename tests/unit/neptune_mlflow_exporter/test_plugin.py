@@ -31,7 +31,47 @@ class TestPlugin(unittest.TestCase):
         self.assertEqual(result.exit_code, 0)
 
         mock_sync.assert_called_once_with(
-            project_name=None, api_token=None, mlflow_tracking_uri=None, exclude_artifacts=False, max_artifact_size=50
+            project_name=None,
+            api_token=None,
+            mlflow_tracking_uri=None,
+            exclude_artifacts=False,
+            max_artifact_size=50,
+            workers=1,
+            state_dir=None,
+            incremental=False,
+            metric_workers=4,
+            metric_page_size=10000,
+            downsample=None,
+            downsample_points=10000,
+            downsample_keys=(),
+            downsample_exclude=(),
+            artifact_workers=4,
+            max_artifact_bandwidth=None,
+            staging_dir=None,
+            max_staging_size=None,
+            artifact_mounts=(),
+            artifact_dedup=None,
+            pack_threshold=None,
+            artifact_include=(),
+            artifact_exclude=(),
+            dry_run=False,
+            dry_run_sample=20,
+            progress_interval=10.0,
+            report_file=None,
+            experiment_names=(),
+            experiment_ids=(),
+            filter_string=None,
+            started_after=None,
+            started_before=None,
+            lifecycle_stage="all",
+            max_runs=None,
+            snapshot_dir=None,
+            from_snapshot=None,
+            watch=False,
+            poll_interval=60.0,
+            mlflow_rate=None,
+            neptune_rate=None,
+            run_retries=2,
         )
 
     def test_invalid_max_artifact_size(self):
@@ -42,3 +82,8 @@ class TestPlugin(unittest.TestCase):
         result = self.runner.invoke(sync, ["-m", 0])
         self.assertEqual(result.exit_code, 1)
         self.assertIsInstance(result.exception, ValueError)
+
+    def test_invalid_workers(self):
+        result = self.runner.invoke(sync, ["-w", 0])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIsInstance(result.exception, ValueError)
@@ -0,0 +1,40 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from neptune_mlflow_exporter.impl.components import NeptuneRunIndex
+
+
+def _entry(custom_run_id, creation_time):
+    entry = MagicMock()
+    entry.get_attribute_value.side_effect = {
+        "sys/custom_run_id": custom_run_id,
+        "sys/creation_time": creation_time,
+    }.get
+    return entry
+
+
+def test_only_required_columns_are_fetched():
+    project = MagicMock()
+    project.fetch_runs_table.return_value = [_entry("a", datetime(2023, 1, 1)), _entry(None, datetime(2023, 1, 2))]
+
+    assert NeptuneRunIndex(project).get_run_ids() == {"a"}
+    project.fetch_runs_table.assert_called_once_with(columns=["sys/custom_run_id", "sys/creation_time"])
+
+
+def test_persisted_index_is_refreshed_incrementally(tmp_path):
+    project = MagicMock()
+    project.fetch_runs_table.return_value = [_entry("a", datetime(2023, 1, 1)), _entry("b", datetime(2023, 1, 5))]
+
+    index = NeptuneRunIndex(project, str(tmp_path))
+    assert index.get_run_ids() == {"a", "b"}
+    index.close()
+
+    project.fetch_runs_table.reset_mock()
+    project.fetch_runs_table.return_value = [_entry("b", datetime(2023, 1, 5)), _entry("c", datetime(2023, 1, 6))]
+
+    index = NeptuneRunIndex(project, str(tmp_path))
+    assert index.get_run_ids() == {"a", "b", "c"}
+    index.close()
+
+    query = project.fetch_runs_table.call_args.kwargs["query"]
+    assert query == '(`sys/creation_time`:datetime >= "2023-01-04T00:00:00Z")'
@@ -0,0 +1,125 @@
+import threading
+import time
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+import pytest
+
+from neptune_mlflow_exporter.impl.scheduler import (
+    AdaptiveLimit,
+    RequestScheduler,
+    ScheduledClient,
+    TokenBucket,
+    is_throttling_error,
+)
+
+
+class _HttpError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = MagicMock(status_code=status_code, headers=headers or {})
+
+
+def test_throttling_errors_are_detected():
+    assert is_throttling_error(_HttpError(429))
+    assert is_throttling_error(_HttpError(503))
+    assert is_throttling_error(TimeoutError())
+    assert is_throttling_error(Exception("Max retries exceeded with url: /api/2.0/mlflow/runs/search"))
+    assert is_throttling_error(Exception("API request to endpoint /api/2.0/mlflow/runs/get failed with error code 429"))
+
+    assert not is_throttling_error(_HttpError(404))
+    assert not is_throttling_error(ValueError("invalid metric"))
+
+
+def test_token_bucket_paces_requests_after_a_burst():
+    bucket = TokenBucket(rate=100, burst=2)
+
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+
+    # the burst is free, the other 3 requests wait 10 ms each
+    assert time.monotonic() - start >= 0.025
+
+
+def test_adaptive_limit_increases_additively_and_decreases_multiplicatively():
+    limit = AdaptiveLimit(maximum=8, cooldown=60)
+
+    limit.on_throttle()
+    limit.on_throttle()  # throttled together with the previous request
+    assert limit.limit == 4
+
+    # about one window of successful requests raises the limit by one
+    for _ in range(5):
+        limit.on_success()
+    assert int(limit.limit) == 5
+
+    for _ in range(100):
+        limit.on_success()
+    assert limit.limit == 8
+
+
+def test_adaptive_limit_bounds_concurrency():
+    limit = AdaptiveLimit(maximum=4, cooldown=60)
+    limit.on_throttle()
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def request():
+        with limit.slot():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 2
+
+
+@patch("neptune_mlflow_exporter.impl.scheduler.time.sleep")
+def test_throttled_requests_are_retried_with_backoff(mock_sleep):
+    function = MagicMock(side_effect=[_HttpError(429), _HttpError(429, {"Retry-After": "7"}), "result"])
+    scheduler = RequestScheduler("mlflow", max_concurrency=4, backoff=2)
+
+    assert scheduler.call(function, "a", key="b") == "result"
+
+    function.assert_called_with("a", key="b")
+    assert 0 <= mock_sleep.call_args_list[0].args[0] <= 2
+    assert mock_sleep.call_args_list[1].args[0] == 7
+    assert scheduler.limit.limit < 4
+    assert scheduler.instrumentation.counter("mlflow_throttled") == 2
+
+
+@patch("neptune_mlflow_exporter.impl.scheduler.time.sleep")
+def test_other_errors_and_exhausted_retries_are_raised(mock_sleep):
+    scheduler = RequestScheduler("mlflow", max_retries=2)
+
+    with pytest.raises(ValueError):
+        scheduler.call(MagicMock(side_effect=ValueError("invalid")))
+    mock_sleep.assert_not_called()
+
+    with pytest.raises(_HttpError):
+        scheduler.call(MagicMock(side_effect=_HttpError(429)))
+    assert mock_sleep.call_count == 2
+
+
+def test_scheduled_client_schedules_method_calls():
+    client = MagicMock()
+    client.tracking_uri = "uri"
+    client.search_runs.return_value = ["run"]
+    scheduler = MagicMock(wraps=RequestScheduler("mlflow"))
+
+    scheduled_client = ScheduledClient(client, scheduler)
+
+    assert scheduled_client.search_runs(experiment_ids=["0"]) == ["run"]
+    assert scheduled_client.tracking_uri == "uri"
+    scheduler.call.assert_called_once_with(client.search_runs, experiment_ids=["0"])
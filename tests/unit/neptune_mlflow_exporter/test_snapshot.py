@@ -0,0 +1,146 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from mlflow.entities import (
+    Experiment,
+    FileInfo,
+    Metric,
+    Param,
+)
+from mlflow.entities import Run as MlflowRun
+from mlflow.entities import (
+    RunData,
+    RunInfo,
+    RunTag,
+)
+
+from neptune_mlflow_exporter.impl.components import ExportConfig
+from neptune_mlflow_exporter.impl.metric_series import MetricSeries
+from neptune_mlflow_exporter.impl.readers import SnapshotReader
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+from neptune_mlflow_exporter.impl.snapshot import SnapshotWriter
+
+ARTIFACTS = {
+    None: [FileInfo("model", True, None), FileInfo("plot.png", False, 10)],
+    "model": [FileInfo("model/weights.bin", False, 1000)],
+}
+
+
+def _mlflow_run(run_id, start_time, experiment_id="1"):
+    return MlflowRun(
+        run_info=RunInfo.from_dictionary(
+            {
+                "run_uuid": run_id,
+                "run_id": run_id,
+                "run_name": f"name-{run_id}",
+                "experiment_id": experiment_id,
+                "user_id": "user",
+                "status": "FINISHED",
+                "start_time": start_time,
+                "end_time": None,
+                "lifecycle_stage": "active",
+                "artifact_uri": f"file:///artifacts/{run_id}",
+            }
+        ),
+        run_data=RunData(
+            metrics=[Metric("loss", 0.1, 0, 0), Metric("acc", 0.9, 0, 0)],
+            params=[Param("lr", "0.1")],
+            tags=[RunTag("team", "vision")],
+        ),
+    )
+
+
+def _metric_pages(mlflow_run, keys, page_size):
+    histories = {"loss": [1.0, 0.5, 0.25], "acc": [0.9]}
+    for key in keys:
+        values = histories[key]
+        for start in range(0, len(values), page_size):
+            page = values[start : start + page_size]
+            yield key, MetricSeries(page, [1000 + start + i for i in range(len(page))], range(start, start + len(page)))
+
+
+def _take_snapshot(root, runs, experiments=("1",), **config):
+    fetcher = MagicMock()
+    fetcher.get_all_mlflow_experiments.return_value = {
+        experiment_id: Experiment(experiment_id, f"exp-{experiment_id}", "file:///artifacts", "active")
+        for experiment_id in experiments
+    }
+    fetcher.iter_mlflow_runs.return_value = iter(runs)
+    metric_history_fetcher = MagicMock()
+    metric_history_fetcher.iter_metric_pages.side_effect = _metric_pages
+    client = MagicMock()
+    client.list_artifacts.side_effect = lambda run_id, path=None: ARTIFACTS[path]
+
+    SnapshotWriter(
+        fetcher,
+        metric_history_fetcher,
+        client,
+        ExportConfig(
+            exclude_artifacts=False,
+            max_artifact_size=50,
+            project_name=None,
+            api_token=None,
+            mlflow_tracking_uri=None,
+            metric_page_size=2,
+            **config,
+        ),
+    ).write(str(root))
+    return metric_history_fetcher
+
+
+def test_snapshot_round_trip(tmp_path):
+    _take_snapshot(tmp_path, [_mlflow_run("a", 1000), _mlflow_run("b", 2000)])
+    reader = SnapshotReader(str(tmp_path))
+
+    assert list(reader.get_experiments()) == ["1"]
+    runs = list(reader.iter_runs(["1"]))
+    assert [run.info.run_id for run in runs] == ["b", "a"]
+    assert runs[0].data.params == {"lr": "0.1"}
+    assert runs[0].data.tags == {"team": "vision"}
+    assert set(runs[0].data.metrics) == {"loss", "acc"}
+
+    pages = reader.iter_metric_pages(runs[0], ["loss", "acc", "missing"], 2)
+    assert [(key, list(series.values), list(series.steps)) for key, series in pages] == [
+        ("loss", [1.0, 0.5], [0, 1]),
+        ("loss", [0.25], [2]),
+        ("acc", [0.9], [0]),
+        ("missing", [], []),
+    ]
+    assert list(reader.get_metric_series(runs[0], "loss").timestamps) == [1000, 1001, 1002]
+
+    assert [info.path for info in reader.list_artifacts("a")] == ["model", "plot.png"]
+    assert [(info.path, info.file_size) for info in reader.list_artifacts("a", "model")] == [
+        ("model/weights.bin", 1000)
+    ]
+
+
+def test_snapshot_is_resumed_and_filtered(tmp_path):
+    _take_snapshot(tmp_path, [_mlflow_run("a", 1000)])
+    metric_history_fetcher = _take_snapshot(tmp_path, [_mlflow_run("a", 1000), _mlflow_run("b", 2000)])
+
+    assert [call.args[0].info.run_id for call in metric_history_fetcher.iter_metric_pages.call_args_list] == ["b"]
+
+    reader = SnapshotReader(str(tmp_path))
+    selection = RunSelection(started_before=datetime.fromtimestamp(1.5))
+    assert [run.info.run_id for run in reader.iter_runs(["1"], selection)] == ["a"]
+
+
+def test_artifacts_are_listed_before_runs_are_iterated(tmp_path):
+    _take_snapshot(tmp_path, [_mlflow_run("a", 1000)])
+    reader = SnapshotReader(str(tmp_path))
+
+    assert [info.path for info in reader.list_artifacts("a")] == ["model", "plot.png"]
+    with pytest.raises(ValueError):
+        reader.list_artifacts("missing")
+
+
+def test_snapshot_extended_with_another_selection_keeps_earlier_experiments(tmp_path):
+    _take_snapshot(tmp_path, [_mlflow_run("a", 1000)])
+    _take_snapshot(tmp_path, [_mlflow_run("b", 2000, experiment_id="2")], experiments=("2",))
+    reader = SnapshotReader(str(tmp_path))
+
+    experiments = reader.get_experiments()
+    assert sorted(experiments) == ["1", "2"]
+    assert experiments["1"].name == "exp-1"
+    assert [run.info.run_id for run in reader.iter_runs(list(experiments))] == ["a", "b"]
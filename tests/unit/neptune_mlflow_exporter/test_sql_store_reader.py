@@ -0,0 +1,122 @@
+import math
+
+import pytest
+from mlflow.entities import (
+    Metric,
+    Param,
+    RunTag,
+)
+from mlflow.tracking import MlflowClient
+
+from neptune_mlflow_exporter.impl.readers import (
+    get_store_reader,
+    sql_store,
+)
+from neptune_mlflow_exporter.impl.readers.sql_store import SqlStoreReader
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+
+
+@pytest.fixture(scope="module")
+def tracking_store(tmp_path_factory):
+    uri = f"sqlite:///{tmp_path_factory.mktemp('sql_store') / 'mlflow.db'}"
+    client = MlflowClient(tracking_uri=uri)
+
+    experiment_id = client.create_experiment("exp", tags={"team": "research"})
+    run = client.create_run(experiment_id, tags={"mlflow.runName": "first"})
+    client.log_batch(
+        run.info.run_id,
+        metrics=[Metric("loss", value, 1000 + step, step) for step, value in enumerate([0.5, 0.25, float("nan")])]
+        + [Metric("val/acc", 0.9, 1000, 0)],
+        params=[Param("lr", "0.1")],
+        tags=[RunTag("custom", "value")],
+    )
+    client.set_terminated(run.info.run_id)
+
+    reader = SqlStoreReader(uri)
+    yield client, reader, experiment_id
+    reader.close()
+
+
+def test_reads_same_experiments_as_client(tracking_store):
+    client, reader, experiment_id = tracking_store
+
+    experiments = reader.get_experiments()
+
+    assert set(experiments) == {experiment.experiment_id for experiment in client.search_experiments()}
+    assert experiments[experiment_id].name == "exp"
+    assert experiments[experiment_id].tags == {"team": "research"}
+
+
+def test_reads_experiments_updated_since(tracking_store):
+    _, reader, experiment_id = tracking_store
+    last_update_time = reader.get_experiments()[experiment_id].last_update_time
+
+    assert experiment_id in reader.get_experiments(updated_since=last_update_time)
+    assert experiment_id not in reader.get_experiments(updated_since=last_update_time + 1)
+
+
+def test_reads_same_runs_as_client(tracking_store):
+    client, reader, experiment_id = tracking_store
+
+    (run,) = reader.iter_runs([experiment_id])
+    expected = client.get_run(run.info.run_id)
+
+    assert run.info.run_name == expected.info.run_name
+    assert run.info.status == expected.info.status == "FINISHED"
+    assert run.info.end_time == expected.info.end_time
+    assert run.data.params == expected.data.params
+    assert run.data.tags == expected.data.tags
+    assert set(run.data.metrics) == set(expected.data.metrics)
+
+
+def test_counts_selected_runs(tracking_store):
+    _, reader, experiment_id = tracking_store
+
+    assert reader.count_runs([experiment_id]) == 1
+    assert reader.count_runs([experiment_id], RunSelection(lifecycle_stage="deleted")) == 0
+
+
+def test_reads_runs_in_pages_without_holding_a_connection(tracking_store, monkeypatch):
+    client, reader, _ = tracking_store
+    experiment_id = client.create_experiment("paged")
+    run_ids = [client.create_run(experiment_id, start_time=1000 + index).info.run_id for index in range(5)]
+    monkeypatch.setattr(sql_store, "RUNS_PAGE_SIZE", 2)
+
+    runs = reader.iter_runs([experiment_id])
+    first = next(runs)
+
+    assert reader._engine.pool.checkedout() == 0
+    assert [first.info.run_id] + [run.info.run_id for run in runs] == run_ids[::-1]
+    assert [run.info.run_id for run in reader.iter_runs([experiment_id], RunSelection(max_runs=3))] == run_ids[:1:-1]
+
+
+def test_reads_all_metric_histories_of_a_run(tracking_store):
+    client, reader, experiment_id = tracking_store
+    (run,) = reader.iter_runs([experiment_id])
+
+    histories = dict(reader.iter_metric_series(run, ["val/acc", "loss", "missing"]))
+
+    loss = histories["loss"]
+    assert loss.steps.tolist() == [0, 1, 2]
+    assert loss.timestamps.tolist() == [1000, 1001, 1002]
+    assert loss.values.tolist()[:2] == [0.5, 0.25]
+    assert math.isnan(loss.values[2])
+
+    assert histories["val/acc"].values.tolist() == [0.9]
+    assert len(histories["missing"]) == 0
+
+
+def test_reads_metric_histories_in_pages(tracking_store):
+    client, reader, experiment_id = tracking_store
+    (run,) = reader.iter_runs([experiment_id])
+
+    pages = [(key, series.steps.tolist()) for key, series in reader.iter_metric_pages(run, ["loss", "missing"], 2)]
+
+    assert pages == [("loss", [0, 1]), ("loss", [2]), ("missing", [])]
+
+
+def test_store_reader_is_chosen_for_database_uris(tracking_store):
+    reader = get_store_reader("sqlite:///:memory:")
+
+    assert isinstance(reader, SqlStoreReader)
+    reader.close()
@@ -0,0 +1,53 @@
+import os
+import threading
+
+from neptune_mlflow_exporter.impl.staging import StagingArea
+
+
+def test_directories_are_created_under_the_root(tmp_path):
+    staging_area = StagingArea(str(tmp_path / "staging"))
+
+    staging_dir = staging_area.reserve(10)
+
+    assert os.path.isabs(staging_dir.path)
+    assert os.path.dirname(staging_dir.path) == str(tmp_path / "staging")
+
+    staging_dir.cleanup()
+    assert not os.path.exists(staging_dir.path)
+
+
+def test_reservations_wait_for_the_budget(tmp_path):
+    staging_area = StagingArea(str(tmp_path), max_size=100)
+    first = staging_area.reserve(60)
+
+    assert staging_area.try_reserve(60) is None
+
+    reserved = threading.Event()
+    thread = threading.Thread(target=lambda: reserved.set() if staging_area.reserve(60) else None)
+    thread.start()
+    assert not reserved.wait(0.1)
+
+    first.cleanup()
+    thread.join(timeout=5)
+    assert reserved.is_set()
+    assert staging_area.used == 60
+
+
+def test_artifact_larger_than_budget_is_staged_alone(tmp_path):
+    staging_area = StagingArea(str(tmp_path), max_size=100)
+
+    staging_dir = staging_area.try_reserve(1000)
+
+    assert staging_dir is not None
+    assert staging_area.try_reserve(1) is None
+
+
+def test_downloaded_size_is_measured(tmp_path):
+    staging_area = StagingArea(str(tmp_path))
+    staging_dir = staging_area.reserve(0)
+
+    with open(os.path.join(staging_dir.path, "file"), "w") as file:
+        file.write("x" * 42)
+    staging_dir.measure()
+
+    assert staging_area.used == 42
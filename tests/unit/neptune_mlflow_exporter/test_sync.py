@@ -12,3 +12,87 @@ def test_invalid_max_artifact_size() -> None:
 
     with pytest.raises(TypeError):
         sync(max_artifact_size=50.5)
+
+
+def test_invalid_workers() -> None:
+    with pytest.raises(ValueError):
+        sync(workers=0)
+
+    with pytest.raises(TypeError):
+        sync(workers=2.5)
+
+
+def test_invalid_metric_workers() -> None:
+    with pytest.raises(ValueError):
+        sync(metric_workers=0)
+
+
+def test_invalid_metric_page_size() -> None:
+    with pytest.raises(ValueError):
+        sync(metric_page_size=0)
+
+
+def test_invalid_artifact_transfer_limits() -> None:
+    with pytest.raises(ValueError):
+        sync(artifact_workers=0)
+
+    with pytest.raises(ValueError):
+        sync(max_artifact_bandwidth=0)
+
+    with pytest.raises(ValueError):
+        sync(max_staging_size=0)
+
+    with pytest.raises(ValueError):
+        sync(artifact_mounts=["s3://bucket"])
+
+    with pytest.raises(ValueError):
+        sync(pack_threshold=0)
+
+    with pytest.raises(ValueError):
+        sync(dry_run_sample=0)
+
+    with pytest.raises(ValueError):
+        sync(progress_interval=-1)
+
+    with pytest.raises(ValueError):
+        sync(max_runs=0)
+
+    with pytest.raises(ValueError):
+        sync(lifecycle_stage="archived")
+
+    with pytest.raises(ValueError):
+        sync(snapshot_dir="snapshot", from_snapshot="snapshot")
+
+    with pytest.raises(ValueError):
+        sync(from_snapshot="snapshot", filter_string="params.lr = '0.1'")
+
+    with pytest.raises(ValueError):
+        sync(poll_interval=0)
+
+    with pytest.raises(ValueError):
+        sync(watch=True, dry_run=True)
+
+    with pytest.raises(ValueError):
+        sync(mlflow_rate=0)
+
+    with pytest.raises(ValueError):
+        sync(neptune_rate=-1)
+
+    with pytest.raises(ValueError):
+        sync(run_retries=-1)
+
+
+def test_invalid_artifact_dedup() -> None:
+    with pytest.raises(ValueError):
+        sync(artifact_dedup="unknown", state_dir="state")
+
+    with pytest.raises(ValueError, match="requires a state directory"):
+        sync(artifact_dedup="skip")
+
+
+def test_invalid_downsampling() -> None:
+    with pytest.raises(ValueError):
+        sync(downsample="unknown")
+
+    with pytest.raises(ValueError):
+        sync(downsample="lttb", downsample_points=0)
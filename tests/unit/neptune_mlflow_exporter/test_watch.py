@@ -0,0 +1,128 @@
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from neptune_mlflow_exporter.impl.instrumentation import ExportInstrumentation
+from neptune_mlflow_exporter.impl.run_selection import RunSelection
+from neptune_mlflow_exporter.impl.watch import (
+    CURSOR_OVERLAP,
+    ExportWatcher,
+)
+
+
+def _mock_mlflow_run(run_id: str) -> MagicMock:
+    mlflow_run = MagicMock()
+    mlflow_run.info.run_id = run_id
+    return mlflow_run
+
+
+def _watcher(polls, state_dir=None):
+    """Returns a watcher finding the given runs in its polls, with the selections and known runs it used."""
+    selections = []
+    known_run_ids = []
+
+    fetcher = MagicMock()
+    fetcher.instrumentation = ExportInstrumentation()
+    fetcher.selection = RunSelection(max_runs=10)
+    fetcher.get_all_mlflow_experiments.return_value = {"0": MagicMock()}
+    fetcher.get_existing_neptune_run_ids.return_value = {"existing"}
+
+    def iter_mlflow_runs(experiment_ids, selection):
+        selections.append(selection)
+        return iter([_mock_mlflow_run(run_id) for run_id in polls[len(selections) - 1]])
+
+    def export(streamed_data):
+        known_run_ids.append(set(streamed_data.neptune_run_ids))
+        list(streamed_data.mlflow_runs)
+
+    fetcher.iter_mlflow_runs.side_effect = iter_mlflow_runs
+    orchestrator = MagicMock()
+    orchestrator.export.side_effect = export
+    orchestrator.failed_runs = []
+
+    return ExportWatcher(fetcher, orchestrator, poll_interval=60, state_dir=state_dir), selections, known_run_ids
+
+
+@patch("neptune_mlflow_exporter.impl.watch.time.sleep")
+@patch("neptune_mlflow_exporter.impl.watch.click.echo")
+def test_later_polls_search_only_changed_runs(mock_echo, mock_sleep):
+    watcher, selections, known_run_ids = _watcher([["a", "b"], ["b", "c"]])
+
+    watcher.run(max_polls=2)
+
+    assert selections[0] == RunSelection(max_runs=10)
+    assert selections[1].changed_since is not None
+    assert selections[1].max_runs == 10
+    # runs exported by the first poll are updated by the second one
+    assert known_run_ids == [{"existing"}, {"existing", "a", "b"}]
+    assert watcher.fetcher.get_existing_neptune_run_ids.call_count == 1
+    assert watcher.fetcher.selection == RunSelection(max_runs=10)
+    assert mock_sleep.call_count == 1
+
+
+@patch("neptune_mlflow_exporter.impl.watch.time.sleep")
+@patch("neptune_mlflow_exporter.impl.watch.click.echo")
+def test_later_polls_fetch_only_updated_experiments(mock_echo, mock_sleep):
+    watcher, selections, _ = _watcher([["a"], ["b"]])
+    watcher.fetcher.get_all_mlflow_experiments.side_effect = [{"0": MagicMock()}, {"1": MagicMock()}]
+
+    watcher.run(max_polls=2)
+
+    first, second = watcher.fetcher.get_all_mlflow_experiments.call_args_list
+    assert first.kwargs == {}
+    assert second.kwargs == {"updated_since": selections[1].changed_since}
+    # runs are still searched in the experiments found before, as new runs do not update their experiment
+    assert [call.args[0] for call in watcher.fetcher.iter_mlflow_runs.call_args_list] == [["0"], ["0", "1"]]
+
+
+@patch("neptune_mlflow_exporter.impl.watch.time.sleep")
+@patch("neptune_mlflow_exporter.impl.watch.click.echo")
+def test_restarted_watch_continues_from_its_cursor(mock_echo, mock_sleep, tmp_path):
+    first_watcher, _, _ = _watcher([["a"]], str(tmp_path))
+    first_watcher.run(max_polls=1)
+
+    watcher, selections, _ = _watcher([["b"]], str(tmp_path))
+    watcher.run(max_polls=1)
+
+    assert selections[0].changed_since is not None
+    assert watcher._load_cursor() - selections[0].changed_since >= CURSOR_OVERLAP
+    assert mock_sleep.call_count == 0
+
+
+@patch("neptune_mlflow_exporter.impl.watch.click.echo")
+def test_watch_stops_when_interrupted(mock_echo):
+    watcher, _, _ = _watcher([["a"]])
+    watcher.orchestrator.export.side_effect = KeyboardInterrupt
+
+    watcher.run()
+
+    mock_echo.assert_called_once_with("Watch stopped")
+    assert watcher.fetcher.selection == RunSelection(max_runs=10)
+
+
+@patch("neptune_mlflow_exporter.impl.watch.time.sleep")
+@patch("neptune_mlflow_exporter.impl.watch.click.echo")
+def test_failed_runs_are_exported_again_by_the_next_poll(mock_echo, mock_sleep, tmp_path):
+    watcher, _, known_run_ids = _watcher([["a", "b"], ["c"]], str(tmp_path))
+    exported_run_ids = []
+
+    def export(streamed_data):
+        known_run_ids.append(set(streamed_data.neptune_run_ids))
+        mlflow_runs = list(streamed_data.mlflow_runs)
+        exported_run_ids.append([mlflow_run.info.run_id for mlflow_run in mlflow_runs])
+        # the first poll fails to export "b"
+        first_poll = len(exported_run_ids) == 1
+        watcher.orchestrator.failed_runs = [run for run in mlflow_runs if first_poll and run.info.run_id == "b"]
+
+    watcher.orchestrator.export.side_effect = export
+    cursors = []
+    mock_sleep.side_effect = lambda seconds: cursors.append(watcher._load_cursor())
+
+    watcher.run(max_polls=2)
+
+    assert exported_run_ids == [["a", "b"], ["c", "b"]]
+    assert known_run_ids == [{"existing"}, {"existing", "a"}]
+    # the cursor is saved only once no failed run is left
+    assert cursors == [None]
+    assert watcher._load_cursor() is not None